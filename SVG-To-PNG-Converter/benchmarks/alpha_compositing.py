@@ -0,0 +1,79 @@
+"""
+Benchmark of the compositing of translucent shapes.
+
+Blending a translucent shape through a transparent layer the size of the whole image
+costs a pass over every pixel of the image for each shape. `SvgPngConverter.paint` only
+allocates and composites a layer over the bounding box of the shape, so its cost follows
+the area of the shape and stays the same when the image grows. Both produce the same pixels.
+
+Usage: python benchmarks/alpha_compositing.py [shape_count]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from PIL import Image, ImageDraw  # noqa: E402
+from svg_png_renderer import SvgPngConverter, SvgShape  # noqa: E402
+
+CANVAS_SIZES = (512, 2048)
+RADII = (8, 32, 128)
+
+
+def build_shapes(shape_count: int, canvas_size: int, radius: int) -> list[SvgShape]:
+    random.seed(0)
+    shapes = []
+    for _ in range(shape_count):
+        x = random.uniform(0, canvas_size)
+        y = random.uniform(0, canvas_size)
+        color = (random.randrange(256), random.randrange(256), random.randrange(256), 128)
+        shapes.append(SvgShape('circle', (x - radius, y - radius, x + radius, y + radius), None, color, 0))
+    return shapes
+
+
+def composite_full_layers(shapes: list[SvgShape], canvas_size: int) -> Image.Image:
+    image = Image.new('RGBA', (canvas_size, canvas_size), 'WHITE')
+    drawer = SvgPngConverter._drawers['circle']
+    for shape in shapes:
+        layer = Image.new('RGBA', image.size, (0, 0, 0, 0))
+        drawer(ImageDraw.Draw(layer), shape)
+        image.alpha_composite(layer)
+    return image
+
+
+def composite_bounding_boxes(shapes: list[SvgShape], canvas_size: int) -> Image.Image:
+    image = Image.new('RGBA', (canvas_size, canvas_size), 'WHITE')
+    draw = ImageDraw.Draw(image)
+    drawer = SvgPngConverter._drawers['circle']
+    for shape in shapes:
+        SvgPngConverter.paint(image, draw, drawer, shape)
+    return image
+
+
+def measure(composite, shapes: list[SvgShape], canvas_size: int) -> tuple[float, Image.Image]:
+    start = time.perf_counter()
+    image = composite(shapes, canvas_size)
+    return (time.perf_counter() - start) / len(shapes), image
+
+
+def main():
+    shape_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    print(f'{shape_count} translucent circles per run, time per shape')
+    print(f'{"canvas":>8} {"radius":>7} {"full layers":>14} {"bounding boxes":>15} {"per 1000 px":>12}')
+    for canvas_size in CANVAS_SIZES:
+        for radius in RADII:
+            shapes = build_shapes(shape_count, canvas_size, radius)
+            full_time, full_image = measure(composite_full_layers, shapes, canvas_size)
+            box_time, box_image = measure(composite_bounding_boxes, shapes, canvas_size)
+            assert full_image.tobytes() == box_image.tobytes(), 'the compositing strategies differ'
+            box_area = (2 * radius + 1) ** 2
+            print(
+                f'{canvas_size:>8} {radius:>7} {full_time * 1e3:11.3f} ms {box_time * 1e3:12.3f} ms '
+                f'{box_time * 1e6 / box_area * 1000:9.2f} us'
+            )
+
+
+if __name__ == '__main__':
+    main()
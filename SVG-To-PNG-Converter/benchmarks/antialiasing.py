@@ -0,0 +1,102 @@
+"""
+Benchmark of the supersampled antialiasing, reporting the time and the peak memory of each level.
+
+The built-in antialiasing supersamples the image one band at a time and downsamples
+every band into the output image. It is compared with rendering the whole image
+supersampled and downsampling it afterwards, which needs the memory of the whole
+supersampled image at once. Every measure runs in its own process, so the peak
+resident memory of each one can be reported.
+
+Usage: python benchmarks/antialiasing.py [image_size]
+"""
+import contextlib
+import io
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from PIL import Image  # noqa: E402
+from svg_png_renderer import SvgDeserializer, SvgDisplayList, SvgPngConverter  # noqa: E402
+
+SHAPE_COUNT = 2000
+LEVELS = (1, 2, 4)
+FILTERS = ('box', 'lanczos')
+
+
+def build_display_list() -> SvgDisplayList:
+    random.seed(0)
+    elements = []
+    for _ in range(SHAPE_COUNT):
+        x, y = random.uniform(0, 1000), random.uniform(0, 1000)
+        if random.random() < 0.5:
+            elements.append(f'<circle cx="{x:.2f}" cy="{y:.2f}" r="{random.uniform(2, 40):.2f}" fill="teal" stroke="black"/>')
+        else:
+            elements.append(
+                f'<line x1="{x:.2f}" y1="{y:.2f}" x2="{random.uniform(0, 1000):.2f}" '
+                f'y2="{random.uniform(0, 1000):.2f}" stroke="purple" stroke-width="2"/>'
+            )
+    svg_bytes = (
+        '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 1000 1000">' + ''.join(elements) + '</svg>'
+    ).encode()
+    return SvgDisplayList.compile(SvgDeserializer.from_bytes(svg_bytes).iter_deserialize())
+
+
+def run(strategy: str, antialiasing: int, antialiasing_filter: str, image_size: int):
+    display_list = build_display_list()
+    output_dim = (image_size, image_size)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        if strategy == 'bands':
+            converter = SvgPngConverter(
+                display_list, output_dim, antialiasing=antialiasing, antialiasing_filter=antialiasing_filter
+            )
+            converter.convert_to_bytes()
+        else:
+            converter = SvgPngConverter(display_list, (image_size * antialiasing, image_size * antialiasing))
+            converter.convert_to_bytes()
+            if antialiasing_filter == 'box':
+                converter.image.reduce(antialiasing).save(io.BytesIO(), 'PNG')
+            else:
+                converter.image.resize(output_dim, Image.Resampling.LANCZOS).save(io.BytesIO(), 'PNG')
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in kilobytes on Linux
+    print(json.dumps({'seconds': elapsed, 'peak_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+
+
+def measure(strategy: str, antialiasing: int, antialiasing_filter: str, image_size: int) -> dict:
+    output = subprocess.run(
+        [sys.executable, __file__, '--run', strategy, str(antialiasing), antialiasing_filter, str(image_size)],
+        check=True, capture_output=True, text=True
+    ).stdout
+    return json.loads(output)
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--run':
+        run(sys.argv[2], int(sys.argv[3]), sys.argv[4], int(sys.argv[5]))
+        return
+
+    image_size = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    output_mb = image_size * image_size * 4 / 2 ** 20
+    print(f'{SHAPE_COUNT} shapes into {image_size}x{image_size}, the output image is {output_mb:.1f} MB')
+    print(f'{"aa":>3} {"filter":>8} {"strategy":>13} {"time":>9} {"peak memory":>12}')
+    for antialiasing in LEVELS:
+        for antialiasing_filter in FILTERS if antialiasing > 1 else FILTERS[:1]:
+            strategies = ('bands', 'whole image') if antialiasing > 1 else ('bands',)
+            for strategy in strategies:
+                result = measure(strategy, antialiasing, antialiasing_filter, image_size)
+                label = strategy if antialiasing > 1 else 'aliased'
+                print(
+                    f'{antialiasing:>3} {antialiasing_filter:>8} {label:>13} '
+                    f'{result["seconds"]:7.2f} s {result["peak_mb"]:9.1f} MB'
+                )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""
+Micro-benchmark for the attribute storage of SvgDeserializedObject.
+
+Compares the previous layout (a list of `Attribute` objects scanned linearly)
+with the current dictionary based layout on a synthetic file with many elements.
+It reports the memory retained per element and the time of the attribute lookups
+done by the draw methods.
+
+Usage: python benchmarks/attribute_storage.py [element_count]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from svg_png_renderer.svg_deserialization import Attribute, SvgDeserializer, SvgDeserializedObject  # noqa: E402
+
+RECT_ATTRIBUTES = ('x', 'y', 'width', 'height', 'stroke-width', 'stroke', 'stroke-opacity', 'fill', 'fill-opacity')
+
+
+class ListBackedObject:
+    """
+    The previous attribute storage, kept here as the reference point of the benchmark.
+    """
+    def __init__(self, tag_name: str):
+        self.attributes: list[Attribute] = []
+        self.tag_name = tag_name
+
+    def add_attribute(self, attribute: Attribute):
+        for i, attr in enumerate(self.attributes):
+            if attr.name == attribute.name:
+                self.attributes[i] = attribute
+                return
+        self.attributes.append(attribute)
+
+    def get_attribute(self, name: str, default: str = '') -> str:
+        for attribute in self.attributes:
+            if attribute.name == name:
+                return attribute.value
+        return default
+
+
+def write_svg(path: str, element_count: int):
+    with open(path, 'w') as file:
+        file.write('<svg width="500" height="500" xmlns="http://www.w3.org/2000/svg">\n')
+        for i in range(element_count):
+            file.write(
+                f'<rect x="{i % 500}" y="{i % 300}" width="10" height="20" stroke-width="2" '
+                f'stroke="black" stroke-opacity="0.5" fill="blue" fill-opacity="0.5"/>\n'
+            )
+        file.write('</svg>\n')
+
+
+def build_list_backed(path: str) -> list[ListBackedObject]:
+    objects = []
+    for svg_object in SvgDeserializer(path).iter_deserialize():
+        list_backed = ListBackedObject(svg_object.tag_name)
+        for name in svg_object._attribute_values:
+            list_backed.add_attribute(Attribute(name, svg_object.get_attribute(name)))
+        objects.append(list_backed)
+    return objects
+
+
+def build_dict_backed(path: str) -> list[SvgDeserializedObject]:
+    return SvgDeserializer(path).deserialize()
+
+
+def measure(label: str, build, path: str, element_count: int):
+    tracemalloc.start()
+    start = time.perf_counter()
+    objects = build(path)
+    build_time = time.perf_counter() - start
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for svg_object in objects:
+        for name in RECT_ATTRIBUTES:
+            svg_object.get_attribute(name)
+    lookup_time = time.perf_counter() - start
+    lookups = len(objects) * len(RECT_ATTRIBUTES)
+
+    print(
+        f'{label:<12} build {build_time:8.2f} s | '
+        f'{retained / element_count:8.1f} bytes/element | '
+        f'{lookup_time / lookups * 1e9:8.1f} ns/lookup'
+    )
+
+
+def main():
+    element_count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'benchmark.svg')
+        write_svg(path, element_count)
+        print(f'{element_count} elements, {os.path.getsize(path) / 2 ** 20:.1f} MiB')
+        measure('list-backed', build_list_backed, path, element_count)
+        measure('dict-backed', build_dict_backed, path, element_count)
+
+
+if __name__ == '__main__':
+    main()
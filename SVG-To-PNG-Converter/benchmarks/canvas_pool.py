@@ -0,0 +1,93 @@
+"""
+Benchmark of a reused converter with pooled canvases against a new converter for every render.
+
+A worker renders many small images of a few sizes, like the icons of a web service. The new
+converters allocate a canvas for every image, while `SvgPngConverter.render` with a
+SvgCanvasPool clears the canvas of its size in place. The canvas allocations are counted by
+wrapping `Image.new`, together with the garbage collections and the throughput, and the
+images of both are checked to be identical. The reused converter is also measured with a
+SvgDisplayList compiled once, since the small images spend more time compiling and encoding
+than allocating their canvas.
+
+The pool saves a third of the canvas allocations and about a third of the garbage collections,
+but its throughput stays within the noise of the runs, a few percent either way, since the
+allocation of a small canvas costs little next to the compiling and the encoding.
+
+Usage: python benchmarks/canvas_pool.py [render_count]
+"""
+import contextlib
+import gc
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from PIL import Image  # noqa: E402
+from svg_png_renderer import SvgDeserializer, SvgDisplayList, SvgPngConverter  # noqa: E402
+from svg_png_renderer.svg_canvas_pool import SvgCanvasPool  # noqa: E402
+
+SIZES = ((64, 64), (128, 128), (96, 48))
+image_allocations = 0
+allocate_image = Image.new
+
+
+def counting_new(*arguments, **keywords):
+    global image_allocations
+    image_allocations += 1
+    return allocate_image(*arguments, **keywords)
+
+
+def render_new(objects: list, render_count: int) -> list[bytes]:
+    images = []
+    for i in range(render_count):
+        png_bytes = SvgPngConverter(objects, SIZES[i % len(SIZES)]).convert_to_bytes()
+        if i < len(SIZES):
+            images.append(png_bytes)
+    return images
+
+
+def render_reused(objects: list, render_count: int) -> list[bytes]:
+    converter = SvgPngConverter(canvas_pool=SvgCanvasPool())
+    images = []
+    for i in range(render_count):
+        png_bytes = converter.render(objects, SIZES[i % len(SIZES)])
+        if i < len(SIZES):
+            images.append(png_bytes)
+    return images
+
+
+def measure(label: str, render, objects: list, render_count: int) -> list[bytes]:
+    global image_allocations
+    image_allocations = 0
+    gc.collect()
+    collections = sum(stats['collections'] for stats in gc.get_stats())
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        images = render(objects, render_count)
+        elapsed = time.perf_counter() - start
+    collections = sum(stats['collections'] for stats in gc.get_stats()) - collections
+    print(
+        f'{label:<36} {render_count / elapsed:8.0f} renders/s | '
+        f'{image_allocations:6} images allocated | {collections:4} garbage collections'
+    )
+    return images
+
+
+def main():
+    render_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    objects = SvgDeserializer(os.path.join(os.path.dirname(__file__), '..', 'file.svg')).deserialize()
+
+    Image.new = counting_new
+    try:
+        new = measure('new converter', render_new, objects, render_count)
+        reused = measure('reused converter, pool', render_reused, objects, render_count)
+        compiled = measure('reused converter, pool, display list', render_reused, SvgDisplayList.compile(objects), render_count)
+    finally:
+        Image.new = allocate_image
+    assert new == reused == compiled, 'the reused converter produced different images'
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark of the memoized color resolution.
+
+Icon sets reuse a dozen colors across many elements. This resolves the fill and stroke
+colors of such a document with an uncached SvgColorResolver and with a cached one, then
+compiles the whole document and reports the hit rate of the shared resolver.
+
+Usage: python benchmarks/color_resolution.py [element_count]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from svg_png_renderer import SvgDeserializer, SvgDisplayList  # noqa: E402
+from svg_png_renderer.svg_color import SvgColorResolver, default_resolver  # noqa: E402
+
+COLORS = (
+    'black', 'white', 'red', '#1e90ff', '#333', 'rgb(255, 165, 0)', 'rgb(10% 20% 30%)',
+    'hsl(120, 60%, 40%)', 'rgba(0, 0, 0, 0.5)', 'teal', 'none', 'currentColor'
+)
+OPACITIES = (1.0, 1.0, 1.0, 0.5)
+
+
+def build_paints(element_count: int) -> list[tuple[str, float]]:
+    random.seed(0)
+    return [(random.choice(COLORS), random.choice(OPACITIES)) for _ in range(element_count * 2)]
+
+
+def build_document(paints: list[tuple[str, float]]) -> bytes:
+    elements = []
+    for i in range(0, len(paints), 2):
+        (fill, fill_opacity), (stroke, stroke_opacity) = paints[i], paints[i + 1]
+        elements.append(
+            f'<rect x="{i % 500}" y="{i % 300}" width="10" height="10" color="purple" '
+            f'fill="{fill}" fill-opacity="{fill_opacity}" stroke="{stroke}" stroke-opacity="{stroke_opacity}"/>'
+        )
+    return ('<svg xmlns="http://www.w3.org/2000/svg">' + ''.join(elements) + '</svg>').encode()
+
+
+def measure(label: str, resolver: SvgColorResolver, paints: list[tuple[str, float]]) -> list:
+    start = time.perf_counter()
+    colors = [resolver.resolve(color, opacity, 'purple') for color, opacity in paints]
+    elapsed = time.perf_counter() - start
+    print(f'{label:<10} {elapsed / len(paints) * 1e6:7.3f} us/color | hit rate {resolver.stats().hit_rate:6.1%}')
+    return colors
+
+
+def main():
+    element_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    paints = build_paints(element_count)
+    print(f'{len(paints)} fill and stroke colors of {element_count} elements, {len(COLORS)} distinct colors')
+
+    uncached = measure('uncached', SvgColorResolver(max_size=0), paints)
+    cached = measure('cached', SvgColorResolver(), paints)
+    assert uncached == cached, 'the cache changed the resolved colors'
+
+    svg_bytes = build_document(paints)
+    default_resolver.clear()
+    start = time.perf_counter()
+    SvgDisplayList.compile(SvgDeserializer.from_bytes(svg_bytes).iter_deserialize())
+    elapsed = time.perf_counter() - start
+    stats = default_resolver.stats()
+    print(
+        f'compiled the document in {elapsed:.2f} s | shared resolver: {stats.hits} hits, '
+        f'{stats.misses} misses, {stats.invalid} invalid, hit rate {stats.hit_rate:.1%}'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark of the encode time against the file size of every encode mode.
+
+A flat icon (file.svg) and the synthetic rects, circles and paths documents are rendered once
+at 1000x800, then the same image is encoded with every mode of `SvgEncodeOptions`: the PNG
+compress levels and strategies, the RGB downgrade, the exact palette, and WebP and JPEG.
+The lossless modes are checked to give back the rendered pixels.
+
+Usage: python benchmarks/image_encoding.py [element_count]
+"""
+import contextlib
+import io
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from PIL import Image, ImageChops  # noqa: E402
+from svg_generator import SCENARIOS  # noqa: E402
+from svg_png_renderer import SvgDeserializer, SvgPngConverter  # noqa: E402
+from svg_png_renderer.svg_encoding import SvgEncodeOptions, SvgImageEncoder  # noqa: E402
+
+OUTPUT_DIM = (1000, 800)
+REPEAT = 3
+MODES = {
+    'png default': SvgEncodeOptions(),
+    'png level 1': SvgEncodeOptions(compress_level=1),
+    'png level 9': SvgEncodeOptions(compress_level=9),
+    'png rle': SvgEncodeOptions(compress_strategy='rle'),
+    'png filtered': SvgEncodeOptions(compress_strategy='filtered'),
+    'png optimize': SvgEncodeOptions(optimize=True),
+    'png rgb': SvgEncodeOptions(downgrade_rgb=True),
+    'png palette': SvgEncodeOptions(palette=True),
+    'png palette 9': SvgEncodeOptions(palette=True, compress_level=9),
+    'webp lossless': SvgEncodeOptions(image_format='webp', lossless=True),
+    'webp q80': SvgEncodeOptions(image_format='webp', quality=80),
+    'jpeg q90': SvgEncodeOptions(image_format='jpeg', quality=90),
+}
+
+
+def render(svg_bytes: bytes) -> Image.Image:
+    converter = SvgPngConverter(SvgDeserializer.from_bytes(svg_bytes).deserialize(), OUTPUT_DIM)
+    with contextlib.redirect_stdout(io.StringIO()):
+        converter.convert_to_bytes()
+    return converter.image
+
+
+def encode(image: Image.Image, options: SvgEncodeOptions) -> tuple[float, bytes]:
+    best = float('inf')
+    for _ in range(REPEAT):
+        output = io.BytesIO()
+        start = time.perf_counter()
+        SvgImageEncoder.encode(image, output, options)
+        best = min(best, time.perf_counter() - start)
+    return best, output.getvalue()
+
+
+def main():
+    element_count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    with open(os.path.join(os.path.dirname(__file__), '..', 'file.svg'), 'rb') as file:
+        documents = {'file': file.read()}
+    for name in ('rects', 'circles', 'paths'):
+        documents[name] = SCENARIOS[name](element_count)
+
+    for name, svg_bytes in documents.items():
+        image = render(svg_bytes)
+        print(f'{name} ({len(image.getcolors(2 ** 24))} colors)')
+        baseline = None
+        for mode, options in MODES.items():
+            seconds, data = encode(image, options)
+            baseline = baseline or len(data)
+            lossless = options.image_format == 'png' or options.lossless
+            if lossless:
+                with Image.open(io.BytesIO(data)) as decoded:
+                    difference = ImageChops.difference(decoded.convert('RGBA'), image).getbbox(alpha_only=False)
+                assert difference is None, f'{mode} changed the pixels of {name}'
+            print(
+                f'  {mode:<14} {seconds * 1e3:8.2f} ms {len(data) / 1024:9.1f} KiB '
+                f'{len(data) / baseline:6.0%}{"" if lossless else "  lossy"}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark of the in-memory pipeline against a temporary file round trip.
+
+A service receiving svg bytes used to write them to a temporary file, convert that file
+into another temporary file and read the png back. This compares it with
+`SvgDeserializer.from_bytes` and `SvgPngConverter.convert_to_bytes`, reporting the
+latency per request and the file system calls counted by an audit hook.
+
+The in-memory pipeline removes the 10 file system calls of every request. On a local disk the
+latency of both is the same within the noise of the runs, since the temporary files stay in the
+page cache, so the gain is the file system calls and not the latency.
+
+Usage: python benchmarks/in_memory_io.py [request_count]
+"""
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from svg_png_renderer import SvgDeserializer, SvgPngConverter  # noqa: E402
+
+FILE_SYSTEM_EVENTS = ('open', 'os.remove', 'os.rename', 'os.mkdir', 'os.listdir', 'os.scandir', 'os.utime')
+file_system_calls = 0
+
+
+def count_file_system_calls(event: str, _):
+    global file_system_calls
+    if event in FILE_SYSTEM_EVENTS:
+        file_system_calls += 1
+
+
+def convert_with_temporary_files(svg_bytes: bytes) -> bytes:
+    with tempfile.TemporaryDirectory() as directory:
+        input_path = os.path.join(directory, 'input.svg')
+        output_path = os.path.join(directory, 'output.png')
+        with open(input_path, 'wb') as file:
+            file.write(svg_bytes)
+        SvgPngConverter(SvgDeserializer(input_path).iter_deserialize(), (500, 500), output_path).convert()
+        with open(output_path, 'rb') as file:
+            return file.read()
+
+
+def convert_in_memory(svg_bytes: bytes) -> bytes:
+    return SvgPngConverter(SvgDeserializer.from_bytes(svg_bytes).iter_deserialize(), (500, 500)).convert_to_bytes()
+
+
+def measure(label: str, convert, svg_bytes: bytes, request_count: int) -> bytes:
+    global file_system_calls
+    file_system_calls = 0
+    latencies = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(request_count):
+            start = time.perf_counter()
+            png_bytes = convert(svg_bytes)
+            latencies.append(time.perf_counter() - start)
+
+    latencies.sort()
+    print(
+        f'{label:<16} mean {sum(latencies) / request_count * 1e3:7.3f} ms | '
+        f'p95 {latencies[int(request_count * 0.95) - 1] * 1e3:7.3f} ms | '
+        f'{file_system_calls / request_count:5.1f} file system calls/request'
+    )
+    return png_bytes
+
+
+def main():
+    request_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    with open(os.path.join(os.path.dirname(__file__), '..', 'file.svg'), 'rb') as file:
+        svg_bytes = file.read()
+
+    sys.addaudithook(count_file_system_calls)
+    temporary = measure('temporary files', convert_with_temporary_files, svg_bytes, request_count)
+    in_memory = measure('in memory', convert_in_memory, svg_bytes, request_count)
+    assert temporary == in_memory, 'the two pipelines produced different images'
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark of the incremental re-render of a dashboard against a full render of every frame.
+
+The dashboard is made of many bars and a gauge. Every frame changes the height of two bars
+and the angle of the needle. The full render deserializes the changed document and converts
+it from scratch, while `SvgIncrementalRenderer` updates the elements and only redraws their
+dirty regions. The incremental render is timed with the full encoding and with the
+patches of the changed regions only, and the last frames of both are checked to have the same pixels.
+
+Usage: python benchmarks/incremental_render.py [frame_count]
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from PIL import ImageChops  # noqa: E402
+from svg_png_renderer import SvgDeserializer, SvgPngConverter  # noqa: E402
+from svg_png_renderer.svg_incremental import SvgIncrementalRenderer  # noqa: E402
+
+OUTPUT_DIM = (1000, 600)
+BAR_COUNT = 400
+COLORS = ('steelblue', 'orange', 'seagreen', 'purple')
+
+
+def dashboard(heights: list[int], angle: int) -> bytes:
+    parts = ['<svg width="1000" height="600" xmlns="http://www.w3.org/2000/svg">']
+    parts.append('<g stroke="black" stroke-width="1">')
+    for i, height in enumerate(heights):
+        x, y = 10 + (i % 100) * 7, 140 + (i // 100) * 120
+        parts.append(
+            f'<rect id="bar{i}" x="{x}" y="{y - height}" width="5" height="{height}" '
+            f'fill="{COLORS[i % len(COLORS)]}" fill-opacity="0.8"/>'
+        )
+    parts.append('</g>')
+    parts.append(
+        f'<g transform="translate(860 300)"><circle r="110" fill="#eee" stroke="gray" stroke-width="8"/>'
+        f'<path id="needle" d="M -6 0 L 0 -100 L 6 0 Z" fill="red" transform="rotate({angle})"/></g>'
+    )
+    parts.append('</svg>')
+    return ''.join(parts).encode()
+
+
+def frames(frame_count: int) -> list[tuple[list[int], int, list]]:
+    """
+    Returns the bar heights, the needle angle and the updates of every frame.
+    """
+    generator = random.Random(7)
+    heights = [generator.randint(5, 100) for _ in range(BAR_COUNT)]
+    result = []
+    for _ in range(frame_count):
+        updates = []
+        for _ in range(2):
+            i = generator.randrange(BAR_COUNT)
+            heights[i] = generator.randint(5, 100)
+            y = 140 + (i // 100) * 120 - heights[i]
+            updates.append((f'bar{i}', {'y': str(y), 'height': str(heights[i])}))
+        angle = generator.randint(-120, 120)
+        updates.append(('needle', {'transform': f'rotate({angle})'}))
+        result.append((list(heights), angle, updates))
+    return result
+
+
+def main():
+    frame_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    generator = random.Random(7)
+    initial = dashboard([generator.randint(5, 100) for _ in range(BAR_COUNT)], 0)
+    all_frames = frames(frame_count)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for heights, angle, _ in all_frames:
+            converter = SvgPngConverter(SvgDeserializer.from_bytes(dashboard(heights, angle)).iter_deserialize(), OUTPUT_DIM)
+            converter.convert_to_bytes()
+        full = (time.perf_counter() - start) / frame_count
+
+        renderer = SvgIncrementalRenderer(SvgDeserializer.from_bytes(initial).deserialize(), OUTPUT_DIM)
+        update_seconds = encode_seconds = patch_seconds = 0.0
+        patch_bytes = 0
+        dirty_pixels = 0
+        renderer.encode_patches()
+        for _, _, updates in all_frames:
+            start = time.perf_counter()
+            regions = renderer.update_many(updates)
+            update_seconds += time.perf_counter() - start
+            dirty_pixels += sum((right - left) * (bottom - top) for left, top, right, bottom in regions)
+
+            start = time.perf_counter()
+            patches = renderer.encode_patches()
+            patch_seconds += time.perf_counter() - start
+            patch_bytes += sum(len(patch) for _, patch in patches)
+
+            start = time.perf_counter()
+            renderer.encode()
+            encode_seconds += time.perf_counter() - start
+
+    total_pixels = OUTPUT_DIM[0] * OUTPUT_DIM[1] * frame_count
+    print(f'{frame_count} frames of {BAR_COUNT} bars and a gauge, {dirty_pixels / total_pixels:.1%} of the pixels redrawn')
+    print(f'full render and encode   {full * 1e3:8.2f} ms/frame')
+    print(f'incremental update       {update_seconds / frame_count * 1e3:8.2f} ms/frame')
+    print(f'  + full encode          {(update_seconds + encode_seconds) / frame_count * 1e3:8.2f} ms/frame')
+    print(
+        f'  + patch encode         {(update_seconds + patch_seconds) / frame_count * 1e3:8.2f} ms/frame, '
+        f'{patch_bytes / frame_count / 1024:.1f} KiB/frame instead of {len(renderer.encode()) / 1024:.1f} KiB'
+    )
+    assert ImageChops.difference(renderer.image, converter.image).getbbox(alpha_only=False) is None, \
+        'the incremental render differs from the full render'
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+"""
+Benchmark and regression suite of the deserialize and render pipeline.
+
+Every scenario of `svg_generator` is deserialized with `SvgDeserializer.deserialize` and
+rendered with `SvgPngConverter`, and both phases are timed separately, as the best of a few
+runs, and measured for peak memory with tracemalloc in a separate run, which only sees the
+Python allocations and not the pixel buffers of Pillow. The results can be written as JSON
+and compared with the results of another commit, in which case a phase that got slower or
+bigger than the threshold fails the run.
+
+The scenarios, and file.svg, are also rendered at a small fixed size and compared pixel by
+pixel with the golden images of benchmarks/golden, so a performance change of the renderer
+cannot silently change its output. The golden images must be updated with --update-golden
+together with RENDERER_VERSION when the output changes on purpose. The scenarios whose edges
+are rounded by Pillow, the paths and the polylines, are also rendered in small tiles by
+SvgTiledPngConverter, with and without antialiasing, which must give the pixels of the serial path.
+
+Usage: python benchmarks/pipeline.py [element_count] [--output results.json]
+       [--baseline previous.json] [--threshold 0.25] [--repeat 3] [--update-golden]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from PIL import Image, ImageChops  # noqa: E402
+from svg_generator import SCENARIOS  # noqa: E402
+from svg_png_renderer import SvgDeserializer, SvgPngConverter  # noqa: E402
+from svg_png_renderer.svg_version import RENDERER_VERSION  # noqa: E402
+from svg_png_renderer.svg_tiling import SvgTiledPngConverter  # noqa: E402
+
+BENCHMARKS_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+GOLDEN_DIRECTORY = os.path.join(BENCHMARKS_DIRECTORY, 'golden')
+EXAMPLE_FILE = os.path.join(BENCHMARKS_DIRECTORY, '..', 'file.svg')
+OUTPUT_DIM = (1000, 800)
+GOLDEN_ELEMENT_COUNT = 200
+GOLDEN_DIM = (250, 200)
+# The scenarios rendered in tiles, with a tile size that does not divide the golden size
+TILED_SCENARIOS = ('paths', 'polylines')
+TILED_ANTIALIASING = (1, 2)
+TILED_TILE_SIZE = 48
+# The metrics compared with the baseline, the smaller the better, with the smallest change
+# that counts as a regression, so the noise of the tiny measurements is ignored
+METRICS = {
+    'deserialize_seconds': 0.01,
+    'convert_seconds': 0.01,
+    'deserialize_peak_bytes': 64 * 2 ** 10,
+    'convert_peak_bytes': 64 * 2 ** 10,
+}
+
+
+def quietly(function: Callable):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function()
+
+
+def best_time(function: Callable, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        quietly(function)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_memory(function: Callable) -> int:
+    tracemalloc.start()
+    try:
+        quietly(function)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def render(svg_bytes: bytes, output_dim: tuple[int, int]) -> Image.Image:
+    converter = SvgPngConverter(SvgDeserializer.from_bytes(svg_bytes).deserialize(), output_dim)
+    quietly(converter.convert_to_bytes)
+    return converter.image
+
+
+def measure(svg_bytes: bytes, repeat: int) -> dict:
+    def deserialize():
+        return SvgDeserializer.from_bytes(svg_bytes).deserialize()
+
+    objects = deserialize()
+
+    def convert():
+        return SvgPngConverter(objects, OUTPUT_DIM).convert_to_bytes()
+
+    return {
+        'file_bytes': len(svg_bytes),
+        'element_count': len(objects),
+        'deserialize_seconds': best_time(deserialize, repeat),
+        'convert_seconds': best_time(convert, repeat),
+        'deserialize_peak_bytes': peak_memory(deserialize),
+        'convert_peak_bytes': peak_memory(convert),
+    }
+
+
+def check_golden_images(update: bool) -> list[str]:
+    """
+    Renders the golden documents and compares them with the golden images, or replaces them.
+    Returns the names of the documents whose pixels changed.
+    """
+    documents = {name: build(GOLDEN_ELEMENT_COUNT) for name, build in SCENARIOS.items()}
+    with open(EXAMPLE_FILE, 'rb') as file:
+        documents['file'] = file.read()
+
+    os.makedirs(GOLDEN_DIRECTORY, exist_ok=True)
+    changed = []
+    for name, svg_bytes in documents.items():
+        image = render(svg_bytes, GOLDEN_DIM)
+        golden_path = os.path.join(GOLDEN_DIRECTORY, f'{name}.png')
+        if update or not os.path.exists(golden_path):
+            image.save(golden_path, 'PNG', optimize=True)
+            continue
+        with Image.open(golden_path) as golden:
+            difference = ImageChops.difference(image, golden.convert('RGBA')).getbbox(alpha_only=False)
+        if difference is not None:
+            print(f'golden image {name}: the pixels inside {difference} changed')
+            changed.append(name)
+    return changed
+
+
+def check_tiled_images() -> list[str]:
+    """
+    Renders the tiled scenarios with SvgTiledPngConverter and with the serial path.
+    Returns the scenarios and antialiasing factors whose tiled pixels differ.
+    """
+    different = []
+    for name in TILED_SCENARIOS:
+        objects = SvgDeserializer.from_bytes(SCENARIOS[name](GOLDEN_ELEMENT_COUNT)).deserialize()
+        for antialiasing in TILED_ANTIALIASING:
+            serial = SvgPngConverter(objects, GOLDEN_DIM, antialiasing=antialiasing)
+            quietly(serial.convert_to_bytes)
+            tiled = SvgTiledPngConverter(
+                objects, GOLDEN_DIM, tile_size=TILED_TILE_SIZE, max_workers=1, antialiasing=antialiasing
+            ).render_image()
+            difference = ImageChops.difference(serial.image, tiled).getbbox(alpha_only=False)
+            if difference is not None:
+                print(f'tiled image {name} x{antialiasing}: the pixels inside {difference} differ')
+                different.append(f'{name} x{antialiasing}')
+    return different
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """
+    Returns a description of every metric that is worse than the baseline by more than the threshold.
+    """
+    regressions = []
+    for name, metrics in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if previous is None or previous.get('element_count') != metrics['element_count']:
+            continue
+        for metric, noise in METRICS.items():
+            before, after = previous.get(metric), metrics[metric]
+            if before and after > before * (1 + threshold) and after - before > noise:
+                regressions.append(f'{name} {metric}: {before:.4g} -> {after:.4g} ({after / before - 1:+.0%})')
+    return regressions
+
+
+def main(arguments: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Benchmarks the deserialize and render pipeline.')
+    parser.add_argument('element_count', nargs='?', type=int, default=2000)
+    parser.add_argument('--output', help='the JSON file the results are written to')
+    parser.add_argument('--baseline', help='the JSON results of another commit to compare with')
+    parser.add_argument('--threshold', type=float, default=0.25, help='the tolerated slowdown, 0.25 for 25%%')
+    parser.add_argument('--repeat', type=int, default=3, help='the number of timed runs of each phase')
+    parser.add_argument('--update-golden', action='store_true', help='replaces the golden images')
+    options = parser.parse_args(arguments)
+
+    results = {
+        'renderer_version': RENDERER_VERSION,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'element_count': options.element_count,
+        'scenarios': {},
+    }
+    print(f'{"scenario":<10} {"size":>9} {"deserialize":>12} {"convert":>9} {"peak deserialize":>17} {"peak convert":>13}')
+    for name, build in SCENARIOS.items():
+        metrics = measure(build(options.element_count), options.repeat)
+        results['scenarios'][name] = metrics
+        print(
+            f'{name:<10} {metrics["file_bytes"] / 1024:7.0f} K {metrics["deserialize_seconds"]:10.3f} s '
+            f'{metrics["convert_seconds"]:7.3f} s {metrics["deserialize_peak_bytes"] / 2 ** 20:13.1f} MiB '
+            f'{metrics["convert_peak_bytes"] / 2 ** 20:9.1f} MiB'
+        )
+
+    if options.output:
+        with open(options.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    failed = False
+    changed = check_golden_images(options.update_golden)
+    if changed:
+        failed = True
+    elif not options.update_golden:
+        print('golden images: unchanged')
+    if check_tiled_images():
+        failed = True
+    else:
+        print('tiled images: identical')
+
+    if options.baseline:
+        with open(options.baseline) as file:
+            regressions = compare(results, json.load(file), options.threshold)
+        for regression in regressions:
+            print(f'regression: {regression}')
+        if regressions:
+            failed = True
+        else:
+            print(f'no regression above {options.threshold:.0%}')
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
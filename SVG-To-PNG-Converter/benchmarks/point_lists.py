@@ -0,0 +1,50 @@
+"""
+Benchmark of the parsing, transform and drawing of long point lists.
+
+Compares the previous per-point loop (str.split and map(float, ...) for every pair,
+then a Python transform of every point) with SvgPoints, on a polyline with many vertices.
+
+Usage: python benchmarks/point_lists.py [vertex_count]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from PIL import Image, ImageDraw  # noqa: E402
+from svg_png_renderer.svg_points import SvgPoints, np  # noqa: E402
+from svg_png_renderer.svg_transform import SvgTransform  # noqa: E402
+
+
+def per_point(points: str, transform: SvgTransform, draw: ImageDraw.ImageDraw):
+    polyline_points = []
+    for point in points.split():
+        x, y = map(float, point.split(','))
+        polyline_points.append(transform.apply_point(x, y))
+    draw.line(polyline_points, fill=(0, 0, 0, 255), width=1)
+
+
+def vectorized(points: str, transform: SvgTransform, draw: ImageDraw.ImageDraw):
+    polyline_points = SvgPoints.transform(SvgPoints.parse(points), *transform)
+    draw.line(SvgPoints.to_pillow(polyline_points), fill=(0, 0, 0, 255), width=1)
+
+
+def main():
+    vertex_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    points = ' '.join(f'{i * 0.01:.3f},{(i * 7) % 1000 * 0.5:.2f}' for i in range(vertex_count))
+    transform = SvgTransform.scaling(2.0)
+    print(f'{vertex_count} vertices, NumPy {"available" if np is not None else "not installed"}')
+
+    images = []
+    for label, render in (('per point', per_point), ('vectorized', vectorized)):
+        image = Image.new('RGBA', (2048, 2048), 'WHITE')
+        start = time.perf_counter()
+        render(points, transform, ImageDraw.Draw(image))
+        print(f'{label:<12} {(time.perf_counter() - start) * 1e3:8.1f} ms')
+        images.append(image.tobytes())
+    assert images[0] == images[1], 'the two renders differ'
+
+
+if __name__ == '__main__':
+    main()
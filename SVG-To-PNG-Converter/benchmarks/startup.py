@@ -0,0 +1,74 @@
+"""
+Benchmark of the startup time of the package and of the command line.
+
+Every command runs in a new interpreter with `-X importtime`, whose report gives the time spent
+importing the modules. The imports of the package are lazy, so the tools that only deserialize
+documents, like `svg.py --validate`, should load neither Pillow nor NumPy, while importing
+SvgPngConverter loads what the whole package used to load. The median of the runs is printed
+with the wall time of the process and the heavy packages that were imported.
+
+Usage: python benchmarks/startup.py [run_count]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+HEAVY_PACKAGES = ('PIL', 'numpy')
+COMMANDS = {
+    'interpreter': ['-c', 'pass'],
+    'import svg_png_renderer': ['-c', 'import svg_png_renderer'],
+    'import SvgDeserializer': ['-c', 'from svg_png_renderer import SvgDeserializer'],
+    'import SvgPngConverter': ['-c', 'from svg_png_renderer import SvgPngConverter'],
+    'svg.py --help': ['svg.py', '--help'],
+    'svg.py --validate': ['svg.py', '--validate', 'file.svg'],
+}
+
+
+def run(arguments: list[str]) -> tuple[float, float, set[str]]:
+    """
+    Returns the import time and the wall time of a command in seconds, and the heavy packages it imported.
+    """
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, '-X', 'importtime', *arguments],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    elapsed = time.perf_counter() - start
+
+    import_microseconds = 0
+    imported = set()
+    for line in process.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # The modules of the first level hold the time of the modules they import
+        if not name[1:].startswith(' '):
+            import_microseconds += int(cumulative)
+        package = name.strip().split('.')[0]
+        if package in HEAVY_PACKAGES:
+            imported.add(package)
+    return import_microseconds / 1e6, elapsed, imported
+
+
+def main():
+    run_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    for label, arguments in COMMANDS.items():
+        import_times = []
+        wall_times = []
+        imported = set()
+        for _ in range(run_count):
+            import_seconds, wall_seconds, imported = run(arguments)
+            import_times.append(import_seconds)
+            wall_times.append(wall_seconds)
+        print(
+            f'{label:<26} {statistics.median(import_times) * 1e3:8.1f} ms imports '
+            f'{statistics.median(wall_times) * 1e3:8.1f} ms process | '
+            f'{", ".join(sorted(imported)) or "no heavy packages"}'
+        )
+
+
+if __name__ == '__main__':
+    main()
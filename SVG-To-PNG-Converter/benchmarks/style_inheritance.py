@@ -0,0 +1,63 @@
+"""
+Benchmark of the inherited presentation attributes.
+
+Builds the same drawing twice: once with the fill, stroke and opacity attributes repeated on
+every shape, and once with them set on the groups that contain the shapes. Both documents
+are deserialized and compiled, and the sizes, the times and the number of distinct computed
+styles are compared. The compiled shapes must be identical.
+
+Usage: python benchmarks/style_inheritance.py [element_count]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from svg_png_renderer import SvgDeserializer, SvgDisplayList  # noqa: E402
+
+GROUP_SIZE = 50
+STYLES = (
+    'fill="#1e90ff" stroke="black" stroke-width="2" fill-opacity="0.8"',
+    'fill="orange" stroke="#333" stroke-width="1" stroke-opacity="0.5"',
+    'fill="teal" stroke="white" stroke-width="3"',
+)
+
+
+def build_documents(element_count: int) -> tuple[bytes, bytes]:
+    flat = ['<svg width="1000" height="1000" xmlns="http://www.w3.org/2000/svg">']
+    grouped = list(flat)
+    for start in range(0, element_count, GROUP_SIZE):
+        style = STYLES[start // GROUP_SIZE % len(STYLES)]
+        grouped.append(f'<g {style}>')
+        for i in range(start, min(start + GROUP_SIZE, element_count)):
+            shape = f'<rect x="{i % 990}" y="{i * 7 % 990}" width="10" height="10"'
+            flat.append(f'{shape} {style}/>')
+            grouped.append(f'{shape}/>')
+        grouped.append('</g>')
+    flat.append('</svg>')
+    grouped.append('</svg>')
+    return ''.join(flat).encode(), ''.join(grouped).encode()
+
+
+def measure(label: str, svg_bytes: bytes) -> SvgDisplayList:
+    start = time.perf_counter()
+    objects = SvgDeserializer.from_bytes(svg_bytes).deserialize()
+    display_list = SvgDisplayList.compile(objects)
+    elapsed = time.perf_counter() - start
+    styles = len({id(svg_object.inherited_style) for svg_object in objects})
+    print(f'{label:<8} {len(svg_bytes) / 1024:9.1f} KiB | {elapsed:6.3f} s | {styles} distinct inherited styles')
+    return display_list
+
+
+def main():
+    element_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    flat_bytes, grouped_bytes = build_documents(element_count)
+    print(f'{element_count} rectangles in groups of {GROUP_SIZE}')
+    flat = measure('flat', flat_bytes)
+    grouped = measure('grouped', grouped_bytes)
+    assert flat.shapes == grouped.shapes, 'the inherited attributes changed the compiled shapes'
+
+
+if __name__ == '__main__':
+    main()
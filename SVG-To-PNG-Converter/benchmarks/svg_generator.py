@@ -0,0 +1,153 @@
+"""
+Generator of synthetic svg documents for the benchmarks.
+
+Every scenario builds a deterministic document from an element count, so the same count
+always gives the same bytes and the rendered images can be compared between commits.
+
+Usage: python benchmarks/svg_generator.py <scenario> [element_count] > document.svg
+"""
+import random
+import sys
+from typing import Callable
+
+WIDTH = 1000
+HEIGHT = 800
+COLORS = ('red', 'blue', 'green', 'black', 'orange', 'purple', '#1e90ff', 'rgb(10, 120, 60)')
+
+
+def header(width: int = WIDTH, height: int = HEIGHT) -> str:
+    return f'<svg width="{width}" height="{height}" xmlns="http://www.w3.org/2000/svg">'
+
+
+def rects(element_count: int) -> bytes:
+    """
+    Rectangles of every size, some of them translucent.
+    """
+    generator = random.Random(1)
+    elements = [header()]
+    for _ in range(element_count):
+        x, y = generator.uniform(-50, WIDTH), generator.uniform(-50, HEIGHT)
+        opacity = generator.choice(('1', '1', '0.6'))
+        elements.append(
+            f'<rect x="{x:.2f}" y="{y:.2f}" width="{generator.uniform(1, 150):.2f}" '
+            f'height="{generator.uniform(1, 150):.2f}" fill="{generator.choice(COLORS)}" '
+            f'stroke="{generator.choice(COLORS)}" stroke-width="{generator.choice((1, 2, 4))}" fill-opacity="{opacity}"/>'
+        )
+    elements.append('</svg>')
+    return ''.join(elements).encode()
+
+
+def circles(element_count: int) -> bytes:
+    """
+    Circles and ellipses, half of them with a translucent stroke.
+    """
+    generator = random.Random(2)
+    elements = [header()]
+    for i in range(element_count):
+        cx, cy = generator.uniform(0, WIDTH), generator.uniform(0, HEIGHT)
+        paint = (
+            f'fill="{generator.choice(COLORS)}" stroke="{generator.choice(COLORS)}" '
+            f'stroke-width="{generator.choice((1, 3))}" stroke-opacity="{generator.choice(("1", "0.5"))}"'
+        )
+        if i % 2:
+            elements.append(f'<circle cx="{cx:.2f}" cy="{cy:.2f}" r="{generator.uniform(1, 60):.2f}" {paint}/>')
+        else:
+            elements.append(
+                f'<ellipse cx="{cx:.2f}" cy="{cy:.2f}" rx="{generator.uniform(1, 80):.2f}" '
+                f'ry="{generator.uniform(1, 40):.2f}" {paint}/>'
+            )
+    elements.append('</svg>')
+    return ''.join(elements).encode()
+
+
+def polylines(element_count: int) -> bytes:
+    """
+    Long polylines, one for every 100 elements, made of 100 points each.
+    """
+    generator = random.Random(3)
+    elements = [header()]
+    for _ in range(max(1, element_count // 100)):
+        x, y = generator.uniform(0, WIDTH), generator.uniform(0, HEIGHT)
+        points = []
+        for _ in range(100):
+            x = min(max(x + generator.uniform(-30, 30), 0), WIDTH)
+            y = min(max(y + generator.uniform(-30, 30), 0), HEIGHT)
+            points.append(f'{x:.2f},{y:.2f}')
+        elements.append(
+            f'<polyline points="{" ".join(points)}" fill="none" stroke="{generator.choice(COLORS)}" '
+            f'stroke-width="{generator.choice((1, 2, 3))}"/>'
+        )
+    elements.append('</svg>')
+    return ''.join(elements).encode()
+
+
+def paths(element_count: int) -> bytes:
+    """
+    Paths made of lines, cubic and quadratic curves and arcs, one for every 4 elements.
+    """
+    generator = random.Random(4)
+    elements = [header()]
+    for _ in range(max(1, element_count // 4)):
+        x, y = generator.uniform(0, WIDTH - 150), generator.uniform(0, HEIGHT - 100)
+        elements.append(
+            f'<path d="M{x:.2f},{y:.2f} c40,-60 80,60 120,0 q30,40 60,0 l-50 80 a30 20 0 1 1 -40 -10 z" '
+            f'fill="{generator.choice(COLORS)}" stroke="{generator.choice(COLORS)}" '
+            f'stroke-width="{generator.choice((1, 2))}" fill-opacity="{generator.choice(("1", "0.4"))}"/>'
+        )
+    elements.append('</svg>')
+    return ''.join(elements).encode()
+
+
+def groups(element_count: int) -> bytes:
+    """
+    Shapes nested in groups 16 levels deep, which set the paint and the transforms.
+    """
+    generator = random.Random(5)
+    depth = 16
+    elements = [header()]
+    remaining = element_count
+    while remaining > 0:
+        elements.append(f'<g transform="translate({generator.uniform(0, WIDTH - 200):.1f} {generator.uniform(0, HEIGHT - 200):.1f})">')
+        for level in range(depth):
+            style = f'fill="{generator.choice(COLORS)}"' if level % 4 == 0 else f'style="stroke: {generator.choice(COLORS)}"'
+            elements.append(f'<g {style} transform="rotate({generator.uniform(-5, 5):.1f}) scale(0.97)">')
+        for _ in range(min(remaining, 20)):
+            elements.append(
+                f'<rect x="{generator.uniform(0, 150):.1f}" y="{generator.uniform(0, 150):.1f}" width="20" height="12"/>'
+            )
+            remaining -= 1
+        elements.append('</g>' * (depth + 1))
+    elements.append('</svg>')
+    return ''.join(elements).encode()
+
+
+def large(element_count: int) -> bytes:
+    """
+    A large file that mixes every kind of element, 5 times the element count.
+    """
+    parts = [rects(element_count * 2), circles(element_count * 2), paths(element_count * 4)]
+    # The bodies of the documents are concatenated under a single root element
+    bodies = [part.decode()[len(header()):-len('</svg>')] for part in parts]
+    return (header() + ''.join(bodies) + '</svg>').encode()
+
+
+SCENARIOS: dict[str, Callable[[int], bytes]] = {
+    'rects': rects,
+    'circles': circles,
+    'polylines': polylines,
+    'paths': paths,
+    'groups': groups,
+    'large': large,
+}
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in SCENARIOS:
+        print(f'Usage: python benchmarks/svg_generator.py <{"|".join(SCENARIOS)}> [element_count]')
+        sys.exit(2)
+    element_count = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    sys.stdout.buffer.write(SCENARIOS[sys.argv[1]](element_count))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark of the use elements and of their rasterized sprites.
+
+Builds an icon grid twice: once with every icon written out in full, and once with a single
+symbol stamped by use elements. Both documents are compiled and rendered, and the rendering
+times and the region where the two images differ, if any, are reported.
+
+Usage: python benchmarks/use_instancing.py [icon_count]
+"""
+import math
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from PIL import ImageChops  # noqa: E402
+from svg_png_renderer import SvgDeserializer, SvgDisplayList, SvgPngConverter  # noqa: E402
+
+ICON = (
+    '<circle cx="12" cy="12" r="10" fill="#1e90ff" stroke="black" stroke-width="1"/>'
+    '<path d="M 6 12 C 6 6 18 6 18 12 S 6 18 6 12 Z" fill="white" fill-opacity="0.6"/>'
+    '<polyline points="4,20 8,16 12,18 16,12 20,14" fill="none" stroke="orange" stroke-width="2"/>'
+)
+SPACING = 30
+
+
+def build_documents(icon_count: int) -> tuple[bytes, bytes, tuple[int, int]]:
+    columns = math.ceil(math.sqrt(icon_count))
+    size = (columns * SPACING, math.ceil(icon_count / columns) * SPACING)
+    header = f'<svg width="{size[0]}" height="{size[1]}" xmlns="http://www.w3.org/2000/svg">'
+    inlined = [header]
+    instanced = [header, f'<defs><g id="icon">{ICON}</g></defs>']
+    for i in range(icon_count):
+        x, y = i % columns * SPACING, i // columns * SPACING
+        inlined.append(f'<g transform="translate({x} {y})">{ICON}</g>')
+        instanced.append(f'<use href="#icon" x="{x}" y="{y}"/>')
+    inlined.append('</svg>')
+    instanced.append('</svg>')
+    return ''.join(inlined).encode(), ''.join(instanced).encode(), size
+
+
+def render(label: str, svg_bytes: bytes, size: tuple[int, int]) -> SvgPngConverter:
+    display_list = SvgDisplayList.compile(SvgDeserializer.from_bytes(svg_bytes).iter_deserialize())
+    converter = SvgPngConverter(display_list, size)
+    start = time.perf_counter()
+    converter.convert_to_bytes()
+    elapsed = time.perf_counter() - start
+    print(f'{label:<10} {len(svg_bytes) / 1024:8.1f} KiB | {len(display_list):6} shapes | render {elapsed:6.3f} s')
+    return converter
+
+
+def main():
+    icon_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    inlined_bytes, instanced_bytes, size = build_documents(icon_count)
+    print(f'{icon_count} icons on a {size[0]}x{size[1]} image')
+    inlined = render('inlined', inlined_bytes, size)
+    instanced = render('instanced', instanced_bytes, size)
+    difference = ImageChops.difference(inlined.image, instanced.image).getbbox(alpha_only=False)
+    print('identical images' if difference is None else f'the images differ inside {difference}')
+
+
+if __name__ == '__main__':
+    main()
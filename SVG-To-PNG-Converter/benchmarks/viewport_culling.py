@@ -0,0 +1,109 @@
+"""
+Benchmark of rendering small crops of a large document, as for map tiles.
+
+A document with many shapes spread over a large user space is compiled once into a
+`SvgDisplayList` and cropped into tiles. Drawing every shape of the document into each tile
+is compared with the viewport culling of `SvgPngConverter`, whose spatial index only visits
+the shapes of the tile. The first crop also builds the index.
+
+Usage: python benchmarks/viewport_culling.py [shape_count]
+"""
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from PIL import Image, ImageDraw  # noqa: E402
+from svg_png_renderer import SvgDeserializer, SvgDisplayList, SvgPngConverter  # noqa: E402
+from svg_png_renderer.svg_transform import SvgTransform  # noqa: E402
+
+DOCUMENT_SIZE = 100000
+TILE_SIZE = 256
+# The side of the crops, in user units, and the number of crops per row and column
+CROP_SIZE = 1000
+CROP_GRID = 4
+
+
+def build_document(shape_count: int) -> bytes:
+    random.seed(0)
+    elements = []
+    for _ in range(shape_count):
+        x = random.uniform(0, DOCUMENT_SIZE)
+        y = random.uniform(0, DOCUMENT_SIZE)
+        kind = random.randrange(3)
+        if kind == 0:
+            elements.append(f'<rect x="{x:.1f}" y="{y:.1f}" width="40" height="30" fill="green" stroke="black"/>')
+        elif kind == 1:
+            elements.append(f'<circle cx="{x:.1f}" cy="{y:.1f}" r="15" fill="blue" stroke="navy"/>')
+        else:
+            points = ' '.join(f'{x + i * 20:.1f},{y + (i % 2) * 20:.1f}' for i in range(8))
+            elements.append(f'<polyline points="{points}" stroke="red" fill="none" stroke-width="3"/>')
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {DOCUMENT_SIZE} {DOCUMENT_SIZE}">'
+        + ''.join(elements) + '</svg>'
+    ).encode()
+
+
+def crops() -> list[tuple[float, float, float, float]]:
+    step = DOCUMENT_SIZE / CROP_GRID
+    return [
+        (column * step + step / 2, row * step + step / 2, CROP_SIZE, CROP_SIZE)
+        for row in range(CROP_GRID) for column in range(CROP_GRID)
+    ]
+
+
+def render_without_culling(display_list: SvgDisplayList, crop) -> tuple[Image.Image, int]:
+    image = Image.new('RGBA', (TILE_SIZE, TILE_SIZE), 'WHITE')
+    draw = ImageDraw.Draw(image)
+    transform = SvgTransform.for_viewport(crop, (0.5, 0.5, False), (TILE_SIZE, TILE_SIZE))
+    drawers = SvgPngConverter._drawers
+    draw_calls = 0
+    for shape in display_list:
+        if shape.kind in drawers:
+            drawers[shape.kind](draw, transform.apply(shape))
+            draw_calls += 1
+    return image, draw_calls
+
+
+def render_with_culling(objects, crop) -> tuple[Image.Image, int]:
+    converter = SvgPngConverter(objects, (TILE_SIZE, TILE_SIZE), crop=crop)
+    converter.convert_to_bytes()
+    draw_calls = sum(1 for _ in SvgPngConverter.place_shapes(objects, (TILE_SIZE, TILE_SIZE), Counter(), crop))
+    return converter.image, draw_calls
+
+
+def measure(label: str, render) -> list[bytes]:
+    images = []
+    total_time = 0.0
+    total_draw_calls = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for crop in crops():
+            start = time.perf_counter()
+            image, draw_calls = render(crop)
+            total_time += time.perf_counter() - start
+            total_draw_calls += draw_calls
+            images.append(image.tobytes())
+
+    count = len(images)
+    print(f'{label:<22} {total_time / count * 1e3:9.2f} ms/tile | {total_draw_calls / count:9.1f} draw calls/tile')
+    return images
+
+
+def main():
+    shape_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    svg_bytes = build_document(shape_count)
+    display_list = SvgDisplayList.compile(SvgDeserializer.from_bytes(svg_bytes).iter_deserialize())
+    print(f'{shape_count} shapes, {len(crops())} crops of {CROP_SIZE}x{CROP_SIZE} user units into {TILE_SIZE}x{TILE_SIZE} tiles')
+
+    reference = measure('no culling', lambda crop: render_without_culling(display_list, crop))
+    culled = measure('viewport culling', lambda crop: render_with_culling(display_list, crop))
+    assert reference == culled, 'the culling changed the rendered tiles'
+
+
+if __name__ == '__main__':
+    main()
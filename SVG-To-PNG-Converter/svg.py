@@ -1,19 +1,226 @@
+import argparse
+import os
 import sys
 import svg_png_renderer as svg
+from svg_png_renderer.svg_batch import SvgBatchConverter
+from svg_png_renderer.svg_encoding import DEFAULT_ENCODE_OPTIONS, IMAGE_FORMATS, PNG_STRATEGIES, SvgEncodeOptions, SvgImageEncoder
+
+
+def parse_size(value: str) -> tuple[int, int]:
+    """
+    Parses an output size given as WIDTHxHEIGHT, or as a single number for square images.
+    """
+    try:
+        parts = [int(part) for part in value.lower().split('x')]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'invalid size: {value}')
+    if len(parts) == 1:
+        parts *= 2
+    if len(parts) != 2 or parts[0] <= 0 or parts[1] <= 0:
+        raise argparse.ArgumentTypeError(f'invalid size: {value}')
+    return parts[0], parts[1]
+
+
+def parse_crop(value: str) -> tuple[float, float, float, float]:
+    """
+    Parses a region of the document given as X,Y,WIDTH,HEIGHT in user units.
+    """
+    try:
+        x, y, width, height = (float(part) for part in value.replace(',', ' ').split())
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'invalid crop: {value}')
+    if width <= 0 or height <= 0:
+        raise argparse.ArgumentTypeError(f'invalid crop: {value}')
+    return x, y, width, height
+
+
+def parse_arguments(arguments: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog='svg.py',
+        description='Converts svg files into png images. A single file without an output '
+                    'directory is saved as image.png, otherwise the files are converted in '
+                    'parallel into the output directory.'
+    )
+    parser.add_argument('inputs', nargs='+', help='svg files, glob patterns or directories')
+    parser.add_argument('-o', '--output-dir', help='the directory where the png files are saved')
+    parser.add_argument('-s', '--size', type=parse_size, default=(500, 500),
+                        help='the output size as WIDTHxHEIGHT (default: 500x500)')
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help='the number of worker processes (default: one per CPU)')
+    parser.add_argument('--cache-dir',
+                        help='a render cache directory, so unchanged files are not rendered again')
+    parser.add_argument('-t', '--tile-size', type=int, default=None,
+                        help='renders a single file in tiles of this size in parallel, for very large images')
+    parser.add_argument('--crop', type=parse_crop, default=None,
+                        help='renders only the X,Y,WIDTH,HEIGHT region of a single file, in user units')
+    parser.add_argument('--aa', type=int, choices=(1, 2, 4), default=1,
+                        help='the antialiasing of a single file, by supersampling (default: 1, no antialiasing)')
+    parser.add_argument('--aa-filter', choices=('box', 'lanczos'), default='box',
+                        help='the filter that downsamples the supersampled image (default: box)')
+    parser.add_argument('--profile', action='store_true',
+                        help='prints where the time of the conversion of a single file goes')
+    parser.add_argument('--format', choices=tuple(IMAGE_FORMATS), default='png',
+                        help='the output format of a single file, saved as image.png, image.webp or image.jpg')
+    parser.add_argument('--compress-level', type=int, choices=range(10), default=6, metavar='0-9',
+                        help='the zlib compression level of the png image (default: 6)')
+    parser.add_argument('--compress-strategy', choices=tuple(PNG_STRATEGIES), default='default',
+                        help='the zlib strategy of the png image (default: default)')
+    parser.add_argument('--optimize', action='store_true',
+                        help='searches for the smallest png image, which is slow')
+    parser.add_argument('--rgb', action='store_true',
+                        help='drops the alpha channel of the opaque images')
+    parser.add_argument('--palette', action='store_true',
+                        help='encodes the opaque png images of at most 256 colors with a palette')
+    parser.add_argument('--quality', type=int, default=90,
+                        help='the quality of the lossy webp and jpeg images, from 1 to 100 (default: 90)')
+    parser.add_argument('--lossless', action='store_true', help='encodes a lossless webp image')
+    parser.add_argument('--validate', action='store_true',
+                        help='only checks that the files are valid svg documents, without rendering them')
+    return parser.parse_args(arguments)
+
+
+def encode_options(arguments: argparse.Namespace) -> SvgEncodeOptions:
+    return SvgEncodeOptions(
+        image_format=arguments.format,
+        compress_level=arguments.compress_level,
+        compress_strategy=arguments.compress_strategy,
+        optimize=arguments.optimize,
+        downgrade_rgb=arguments.rgb,
+        palette=arguments.palette,
+        quality=arguments.quality,
+        lossless=arguments.lossless
+    )
+
+
+def convert_single(
+        filename: str,
+        size: tuple[int, int],
+        tile_size: int = None,
+        jobs: int = None,
+        crop: tuple[float, float, float, float] = None,
+        antialiasing: int = 1,
+        antialiasing_filter: str = 'box',
+        profile: bool = False,
+        options: SvgEncodeOptions = DEFAULT_ENCODE_OPTIONS
+) -> int:
+    profiler = svg.SvgProfiler() if profile else None
+    deserializer = svg.SvgDeserializer(filename, profiler=profiler)
+    deserialized_elements = deserializer.iter_deserialize()
+    path = 'image' + options.extension
+    if tile_size is None:
+        converter = svg.SvgPngConverter(
+            deserialized_elements, size, path, crop, antialiasing, antialiasing_filter, profiler, options
+        )
+        converted = converter.convert()
+    else:
+        # Imported here since the tiles need the worker pool and Pillow, unlike the other commands
+        from svg_png_renderer.svg_tiling import SvgTiledPngConverter
+        converter = SvgTiledPngConverter(
+            deserialized_elements, size, path, tile_size, jobs, crop, antialiasing, antialiasing_filter, options
+        )
+        if profiler is None:
+            converted = converter.convert()
+        else:
+            # The tiles are drawn by worker processes, so only the whole render is timed
+            with profiler.phase('render'):
+                converted = converter.convert()
+            if converted:
+                profiler.record_bytes(os.path.getsize(path))
+    if profiler is not None:
+        print(profiler.stats().format())
+    return 0 if converted else 1
+
+
+def convert_batch(
+        inputs: list[str],
+        output_dir: str,
+        size: tuple[int, int],
+        jobs: int,
+        cache_dir: str
+) -> int:
+    batch_jobs = SvgBatchConverter.collect_jobs(inputs, output_dir)
+    if not batch_jobs:
+        print('No svg files found')
+        return 1
+
+    result = SvgBatchConverter(size, jobs, cache_dir).convert(batch_jobs)
+    for input_path, error in result.failures:
+        print(f'Could not convert {input_path}: {error}')
+    print(
+        f'Converted {result.converted}/{len(batch_jobs)} files in {result.elapsed:.2f} s '
+        f'({result.files_per_second:.1f} files/s), {len(result.failures)} failed'
+    )
+    return 1 if result.failures else 0
+
+
+def validate(inputs: list[str]) -> int:
+    """
+    Parses every file without rendering it, so neither Pillow nor NumPy is loaded.
+    """
+    jobs = SvgBatchConverter.collect_jobs(inputs, '.')
+    if not jobs:
+        print('No svg files found')
+        return 1
+
+    invalid = 0
+    for job in jobs:
+        try:
+            element_count = sum(1 for _ in svg.SvgDeserializer(job.input_path).iter_deserialize())
+        except Exception as e:
+            invalid += 1
+            print(f'Invalid {job.input_path}: {e}')
+            continue
+        print(f'Valid {job.input_path}: {element_count} elements')
+    print(f'Validated {len(jobs)} files, {invalid} invalid')
+    return 1 if invalid else 0
 
 
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python svg.py <filename>.svg")
-        sys.exit(1)
+    arguments = parse_arguments(sys.argv[1:])
+    if arguments.validate:
+        sys.exit(validate(arguments.inputs))
+    options = encode_options(arguments)
+    try:
+        SvgImageEncoder.validate(options)
+    except ValueError as e:
+        print(e)
+        sys.exit(2)
 
-    filename = sys.argv[1]
+    if arguments.output_dir is None and len(arguments.inputs) == 1 and arguments.cache_dir is None:
+        if arguments.tile_size is not None and (options.image_format != 'png' or options.palette):
+            print('The tiled images can only be encoded as png images without a palette')
+            sys.exit(2)
+        if arguments.jobs is not None and arguments.tile_size is None:
+            print('The jobs option only applies to several files or to a single file rendered in tiles')
+            sys.exit(2)
+        sys.exit(convert_single(
+            arguments.inputs[0],
+            arguments.size,
+            arguments.tile_size,
+            arguments.jobs,
+            arguments.crop,
+            arguments.aa,
+            arguments.aa_filter,
+            arguments.profile,
+            options
+        ))
+    if (
+            arguments.tile_size is not None or arguments.crop is not None or arguments.aa != 1
+            or arguments.aa_filter != 'box' or arguments.profile or options != DEFAULT_ENCODE_OPTIONS
+    ):
+        print(
+            'The tile size, crop, aa, aa filter, profile and encoding options only apply '
+            'to a single file without an output directory'
+        )
+        sys.exit(2)
 
-    deserializer = svg.SvgDeserializer(filename)
-    deserialized_elements = deserializer.deserialize()
-    path = 'image.png'
-    converter = svg.SvgPngConverter(deserialized_elements, (500, 500), path)
-    converter.convert()
+    sys.exit(convert_batch(
+        arguments.inputs,
+        arguments.output_dir or '.',
+        arguments.size,
+        arguments.jobs,
+        arguments.cache_dir
+    ))
 
 
 if __name__ == "__main__":
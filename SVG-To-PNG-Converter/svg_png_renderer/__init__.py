@@ -3,10 +3,46 @@ This package provides classes for deserializing SVG files and converting them in
 
 It includes:
 - `SvgDeserializer`: A class for parsing SVG files and turning them into python objects containing relevant information.
+- `SvgDisplayList`: A compiled, reusable form of the deserialized SVG objects that is ready to be drawn.
+- `SvgShape`: A single compiled shape of a `SvgDisplayList`.
 - `SvgPngConverter`: A class for converting deserialized SVG objects into PNG images.
+- `SvgProfiler`: An opt-in recorder of the time spent by each phase of a conversion.
+
+The classes are imported from their modules when they are first used, so the tools that only
+deserialize documents do not load Pillow and NumPy.
 """
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .svg_deserialization import SvgDeserializer
+    from .svg_display_list import SvgDisplayList, SvgShape
+    from .svg_png_converter import SvgPngConverter
+    from .svg_profiler import SvgProfiler
+
+# The module of every exported class
+_EXPORTS = {
+    'SvgDeserializer': 'svg_deserialization',
+    'SvgDisplayList': 'svg_display_list',
+    'SvgShape': 'svg_display_list',
+    'SvgPngConverter': 'svg_png_converter',
+    'SvgProfiler': 'svg_profiler',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str):
+    """
+    Imports an exported class from its module on its first use and keeps it in the package.
+    """
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    value = getattr(importlib.import_module(f'.{module_name}', __name__), name)
+    globals()[name] = value
+    return value
 
-from .svg_deserialization import SvgDeserializer
-from .svg_png_converter import SvgPngConverter
 
-__all__ = ['SvgDeserializer', 'SvgPngConverter']
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_EXPORTS))
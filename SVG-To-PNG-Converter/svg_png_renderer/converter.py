@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import Iterable
 from .deserialization import DeserializedObject
 
 
@@ -10,21 +11,21 @@ class Converter(ABC):
     deserialized objects into a specified format and save them to a file.
 
     Attributes:
-        deserialized_objects (list[DeserializedObject]): A list of deserialized objects
-        that represent the file to be converted.
+        deserialized_objects (Iterable[DeserializedObject]): A list or a lazy iterator of
+        deserialized objects that represent the file to be converted.
         output_file_path (str): The path to the file where the converted output will be saved.
     """
     def __init__(
             self,
-            deserialized_objects: list[DeserializedObject],
+            deserialized_objects: Iterable[DeserializedObject],
             output_file_path: str
     ):
         """
         Initializes the Converter with deserialized objects and an output file path.
 
         Params:
-            deserialized_objects (list[DeserializedObject]): A list of deserialized objects
-            that represent the file to be converted.
+            deserialized_objects (Iterable[DeserializedObject]): A list or a lazy iterator of
+            deserialized objects that represent the file to be converted.
             output_file_path (str): The path to the file where the converted output will be saved.
         """
         self.deserialized_objects = deserialized_objects
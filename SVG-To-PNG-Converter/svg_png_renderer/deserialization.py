@@ -8,6 +8,8 @@ class DeserializedObject(ABC):
     This class is intended to be subclassed with implementations specific to a
     file format being deserialized.
     """
+    __slots__ = ()
+
     @abstractmethod
     def __str__(self):
         """
@@ -0,0 +1,92 @@
+import struct
+import zlib
+from typing import BinaryIO
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# The bytes per pixel and the PNG color type of the supported modes
+MODES = {'RGBA': (4, 6), 'RGB': (3, 2), 'L': (1, 0)}
+
+
+class PngStreamWriter:
+    """
+    A PNG encoder that receives the image as successive bands of rows, so the whole image
+    never has to be held in memory. The rows are not filtered and the compressed data is
+    written as soon as zlib produces it.
+
+    Attributes:
+        output (BinaryIO): The binary file object the PNG image is written to.
+        width (int): The width of the image.
+        height (int): The height of the image.
+        mode (str): The Pillow mode of the rows, RGBA, RGB or L.
+    """
+    def __init__(
+            self,
+            output: BinaryIO,
+            width: int,
+            height: int,
+            mode: str = 'RGBA',
+            compress_level: int = 6,
+            compress_strategy: int = zlib.Z_DEFAULT_STRATEGY
+    ):
+        """
+        Initializes the PngStreamWriter and writes the header of the image.
+
+        Params:
+            output (BinaryIO): The binary file object the PNG image is written to.
+            width (int): The width of the image.
+            height (int): The height of the image.
+            mode (str): The Pillow mode of the rows, RGBA, RGB or L.
+            compress_level (int): The zlib compression level, from 0 to 9.
+            compress_strategy (int): The zlib strategy, such as zlib.Z_RLE.
+        """
+        self.output = output
+        self.width = width
+        self.height = height
+        self.mode = mode
+
+        bytes_per_pixel, color_type = MODES[mode]
+        self.__stride = width * bytes_per_pixel
+        self.__rows_written = 0
+        self.__compressor = zlib.compressobj(
+            compress_level, zlib.DEFLATED, zlib.MAX_WBITS, zlib.DEF_MEM_LEVEL, compress_strategy
+        )
+
+        output.write(PNG_SIGNATURE)
+        self.__write_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, color_type, 0, 0, 0))
+
+    def write_rows(self, data: bytes):
+        """
+        Writes the next rows of the image.
+
+        Params:
+            data (bytes): The raw pixels of whole rows, as returned by `Image.tobytes`.
+        """
+        stride = self.__stride
+        row_count = len(data) // stride
+        if row_count * stride != len(data):
+            raise ValueError('The data does not contain whole rows')
+        if self.__rows_written + row_count > self.height:
+            raise ValueError('More rows than the height of the image were written')
+
+        # Every row starts with its filter type, 0 for no filter
+        view = memoryview(data)
+        filtered = b''.join(b'\x00' + view[i * stride:(i + 1) * stride] for i in range(row_count))
+        compressed = self.__compressor.compress(filtered)
+        if compressed:
+            self.__write_chunk(b'IDAT', compressed)
+        self.__rows_written += row_count
+
+    def close(self):
+        """
+        Writes the end of the image. Every row must have been written.
+        """
+        if self.__rows_written != self.height:
+            raise ValueError(f'{self.__rows_written} of the {self.height} rows were written')
+        self.__write_chunk(b'IDAT', self.__compressor.flush())
+        self.__write_chunk(b'IEND', b'')
+
+    def __write_chunk(self, chunk_type: bytes, data: bytes):
+        self.output.write(struct.pack('>I', len(data)))
+        self.output.write(chunk_type)
+        self.output.write(data)
+        self.output.write(struct.pack('>I', zlib.crc32(data, zlib.crc32(chunk_type)) & 0xffffffff))
@@ -0,0 +1,233 @@
+import contextlib
+import glob
+import os
+import time
+from typing import TYPE_CHECKING, Iterable, NamedTuple, Optional
+
+if TYPE_CHECKING:
+    from .svg_deserialization import SvgDeserializedObject
+    from .svg_png_converter import SvgPngConverter
+    from .svg_render_cache import SvgRenderCache
+
+# The render cache of each worker process, created on its first job
+_worker_cache: Optional['SvgRenderCache'] = None
+# The converter of each worker process, reused by all its jobs
+_worker_converter: Optional['SvgPngConverter'] = None
+
+
+def _render_in_worker(
+        svg_deserialized_objects: Iterable['SvgDeserializedObject'],
+        output_dim: tuple[int, int]
+) -> Optional[bytes]:
+    """
+    Renders an image with the converter of the worker process, which is created on the first
+    render, so the canvases of the worker are pooled whether the files are cached or not.
+    """
+    global _worker_converter
+    if _worker_converter is None:
+        # Imported here since a worker whose files are all cached never renders
+        from .svg_canvas_pool import default_canvas_pool
+        from .svg_png_converter import SvgPngConverter
+        _worker_converter = SvgPngConverter(canvas_pool=default_canvas_pool)
+    return _worker_converter.render(svg_deserialized_objects, output_dim)
+
+
+class BatchJob(NamedTuple):
+    """
+    A single conversion of a batch.
+
+    Attributes:
+        input_path (str): The path to the svg file to be converted.
+        output_path (str): The path where the png file will be saved.
+        error (Optional[str]): The reason why the job cannot be converted, or None.
+    """
+    input_path: str
+    output_path: str
+    error: Optional[str] = None
+
+
+class BatchResult(NamedTuple):
+    """
+    The summary of a batch conversion.
+
+    Attributes:
+        converted (int): The number of files converted successfully.
+        failures (list[tuple[str, str]]): The input path and the error of every failed conversion.
+        elapsed (float): The wall time of the whole batch, in seconds.
+    """
+    converted: int
+    failures: list[tuple[str, str]]
+    elapsed: float
+
+    @property
+    def files_per_second(self) -> float:
+        """
+        Returns the throughput of the batch, failed conversions included.
+        """
+        total = self.converted + len(self.failures)
+        return total / self.elapsed if self.elapsed > 0 else 0.0
+
+
+class SvgBatchConverter:
+    """
+    A class that converts many svg files into png files using a pool of worker processes.
+
+    Every worker process imports the package once and is reused for many files,
+    so the interpreter start and the Pillow import are paid once per worker
+    instead of once per file.
+
+    Attributes:
+        output_dim (tuple[int, int]): The dimensions of the output images.
+        max_workers (Optional[int]): The number of worker processes, or None to use one per CPU.
+        cache_dir (Optional[str]): The directory of a SvgRenderCache shared by the workers,
+        or None to render every file.
+    """
+    def __init__(
+            self,
+            output_dim: tuple[int, int] = (500, 500),
+            max_workers: Optional[int] = None,
+            cache_dir: Optional[str] = None
+    ):
+        """
+        Initializes the SvgBatchConverter with the output dimensions and the number of worker processes.
+
+        Params:
+            output_dim (tuple[int, int]): The dimensions of the output images.
+            max_workers (Optional[int]): The number of worker processes, or None to use one per CPU.
+            cache_dir (Optional[str]): The directory of a SvgRenderCache shared by the workers,
+            or None to render every file.
+        """
+        self.output_dim = output_dim
+        self.max_workers = max_workers
+        self.cache_dir = cache_dir
+
+    @staticmethod
+    def collect_jobs(inputs: Iterable[str], output_dir: str) -> list[BatchJob]:
+        """
+        Expands the inputs into conversion jobs. Every input can be a svg file, a glob pattern
+        or a directory, which is searched recursively for svg files. The files found in a
+        directory keep their relative path inside the output directory. Two files with the same
+        output path, such as a/x.svg and b/x.svg, would overwrite each other, so the second one
+        is kept as a job with an error and reported as a failure.
+
+        Params:
+            inputs (Iterable[str]): The files, glob patterns and directories to be converted.
+            output_dir (str): The directory where the png files will be saved.
+
+        Returns:
+            list[BatchJob]: The conversion jobs, without duplicated input files.
+        """
+        jobs: list[BatchJob] = []
+        seen: set[str] = set()
+        # The input path of every output path, normalized so the same file is found whatever its spelling
+        outputs: dict[str, str] = {}
+
+        def add_job(input_path: str, relative_path: str):
+            absolute_path = os.path.abspath(input_path)
+            if absolute_path in seen:
+                return
+            seen.add(absolute_path)
+            output_path = os.path.join(output_dir, os.path.splitext(relative_path)[0] + '.png')
+            output_key = os.path.normcase(os.path.abspath(output_path))
+            if output_key in outputs:
+                error = f'{output_path} is already the output of {outputs[output_key]}'
+                jobs.append(BatchJob(input_path, output_path, error))
+                return
+            outputs[output_key] = input_path
+            jobs.append(BatchJob(input_path, output_path))
+
+        for entry in inputs:
+            if os.path.isdir(entry):
+                pattern = os.path.join(glob.escape(entry), '**', '*.svg')
+                for input_path in sorted(glob.glob(pattern, recursive=True)):
+                    add_job(input_path, os.path.relpath(input_path, entry))
+            elif os.path.isfile(entry):
+                add_job(entry, os.path.basename(entry))
+            else:
+                matches = sorted(glob.glob(entry, recursive=True))
+                if not matches:
+                    # Kept as a job so the missing file is reported as a failure
+                    add_job(entry, os.path.basename(entry))
+                for input_path in matches:
+                    add_job(input_path, os.path.basename(input_path))
+        return jobs
+
+    def convert(self, jobs: list[BatchJob]) -> BatchResult:
+        """
+        Converts the jobs in the worker processes.
+
+        Params:
+            jobs (list[BatchJob]): The conversion jobs, whose errors are reported as failures.
+
+        Returns:
+            BatchResult: The summary of the batch.
+        """
+        # Imported here since the process pool loads multiprocessing, which the validation does not need
+        from concurrent.futures import ProcessPoolExecutor
+
+        start = time.perf_counter()
+        converted = 0
+        failures = [(job.input_path, job.error) for job in jobs if job.error is not None]
+        jobs = [job for job in jobs if job.error is None]
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            # Large chunks keep the workers busy with many files per round trip
+            workers = self.max_workers or os.cpu_count() or 1
+            chunksize = max(1, min(64, len(jobs) // (workers * 4)))
+            results = executor.map(
+                SvgBatchConverter._convert_job,
+                jobs,
+                [self.output_dim] * len(jobs),
+                [self.cache_dir] * len(jobs),
+                chunksize=chunksize
+            )
+            for job, error in zip(jobs, results):
+                if error is None:
+                    converted += 1
+                else:
+                    failures.append((job.input_path, error))
+
+        return BatchResult(converted, failures, time.perf_counter() - start)
+
+    @staticmethod
+    def _convert_job(job: BatchJob, output_dim: tuple[int, int], cache_dir: Optional[str]) -> Optional[str]:
+        """
+        Converts a single file. It runs inside a worker process.
+
+        Params:
+            job (BatchJob): The conversion job.
+            output_dim (tuple[int, int]): The dimensions of the output image.
+            cache_dir (Optional[str]): The directory of the render cache, or None to render the file.
+
+        Returns:
+            Optional[str]: None if the conversion succeeded, otherwise the error message.
+        """
+        try:
+            output_directory = os.path.dirname(job.output_path)
+            if output_directory:
+                os.makedirs(output_directory, exist_ok=True)
+
+            # The per file messages of the converter would only interleave between workers
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                if cache_dir is not None:
+                    global _worker_cache
+                    if _worker_cache is None:
+                        # Imported here since the cache hits are answered without loading Pillow and NumPy
+                        from .svg_render_cache import SvgRenderCache
+                        _worker_cache = SvgRenderCache(cache_dir)
+                    png_bytes = _worker_cache.render(job.input_path, output_dim, _render_in_worker)
+                    with open(job.output_path, 'wb') as file:
+                        file.write(png_bytes)
+                    return None
+
+                # Imported here since only the workers render, the jobs are collected without parsing
+                from .svg_deserialization import SvgDeserializer
+                deserializer = SvgDeserializer(job.input_path)
+                png_bytes = _render_in_worker(deserializer.iter_deserialize(), output_dim)
+            if png_bytes is None:
+                return 'Could not encode the image'
+            with open(job.output_path, 'wb') as file:
+                file.write(png_bytes)
+        except Exception as e:
+            return str(e)
+        return None
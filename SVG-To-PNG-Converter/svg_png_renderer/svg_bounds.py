@@ -0,0 +1,258 @@
+import math
+from typing import Iterable, Optional
+from .svg_display_list import SvgShape
+from .svg_path import SvgSubpath
+from .svg_points import SvgPoints
+from .svg_transform import SvgInstance
+
+# The (left, top, right, bottom) box of a shape, in pixels
+Bounds = tuple[float, float, float, float]
+
+
+class SvgBounds:
+    """
+    A class that provides static methods for computing and combining the bounding boxes of shapes.
+    """
+    @staticmethod
+    def of_shape(shape: SvgShape) -> Optional[Bounds]:
+        """
+        Computes the box that contains every pixel a shape can touch, strokes included.
+        The box of a curve contains its control points, so it is never smaller than the curve.
+
+        Params:
+            shape (SvgShape): The shape, already mapped onto the pixels of the image.
+
+        Returns:
+            Optional[Bounds]: The bounding box, or None if the shape has no coordinates.
+        """
+        bounds = SvgBounds.of_geometry(shape.geometry)
+        if bounds is None:
+            return None
+        # Pillow centers the wide lines on the geometry and may round each side by a pixel
+        padding = math.ceil(max(shape.stroke_width, 0) / 2) + 1
+        return bounds[0] - padding, bounds[1] - padding, bounds[2] + padding, bounds[3] + padding
+
+    @staticmethod
+    def of_geometry(geometry) -> Optional[Bounds]:
+        """
+        Computes the bounding box of a geometry with the layout described by `SvgTransform.apply_geometry`.
+
+        Params:
+            geometry: The geometry of a shape.
+
+        Returns:
+            Optional[Bounds]: The bounding box, or None if the geometry has no coordinates.
+        """
+        if SvgPoints.is_points(geometry):
+            if len(geometry) == 0:
+                return None
+            minimum = geometry.min(axis=0)
+            maximum = geometry.max(axis=0)
+            return float(minimum[0]), float(minimum[1]), float(maximum[0]), float(maximum[1])
+        if isinstance(geometry, SvgSubpath):
+            return SvgBounds.of_geometry(geometry.points)
+        if isinstance(geometry, SvgInstance):
+            return geometry.transformed_bounds()
+        if not geometry:
+            return None
+        if isinstance(geometry[0], tuple) or SvgPoints.is_points(geometry[0]):
+            return SvgBounds.union_all(SvgBounds.of_geometry(part) for part in geometry)
+
+        xs = geometry[0::2]
+        ys = geometry[1::2]
+        return min(xs), min(ys), max(xs), max(ys)
+
+    @staticmethod
+    def union_all(all_bounds: Iterable[Optional[Bounds]]) -> Optional[Bounds]:
+        """
+        Returns the smallest box that contains all the boxes, ignoring the missing ones.
+        """
+        result = None
+        for bounds in all_bounds:
+            result = SvgBounds.union(result, bounds)
+        return result
+
+    @staticmethod
+    def union(first: Optional[Bounds], second: Optional[Bounds]) -> Optional[Bounds]:
+        """
+        Returns the smallest box that contains both boxes.
+        """
+        if first is None:
+            return second
+        if second is None:
+            return first
+        return (
+            min(first[0], second[0]),
+            min(first[1], second[1]),
+            max(first[2], second[2]),
+            max(first[3], second[3])
+        )
+
+    @staticmethod
+    def intersects(first: Bounds, second: Bounds) -> bool:
+        """
+        Returns True if the boxes overlap.
+        """
+        return first[0] <= second[2] and second[0] <= first[2] and first[1] <= second[3] and second[1] <= first[3]
+
+
+class SvgGridIndex:
+    """
+    A uniform grid spatial index of the bounding boxes of shapes.
+
+    Every shape is stored in the cells its box overlaps, so finding the shapes that may touch a
+    region only looks at the cells of that region. The shapes are identified by their position
+    in the drawing order, which the queries return in order.
+
+    Attributes:
+        cell_size (int): The width and height of the cells, in pixels.
+        cells (dict[tuple[int, int], list[int]]): The shapes stored in each (column, row) cell.
+    """
+    def __init__(self, cell_size: int = 256):
+        """
+        Initializes an empty SvgGridIndex.
+
+        Params:
+            cell_size (int): The width and height of the cells, in pixels.
+        """
+        self.cell_size = cell_size
+        self.cells: dict[tuple[int, int], list[int]] = {}
+
+    def cell_range(self, bounds: Bounds) -> tuple[range, range]:
+        """
+        Returns the columns and the rows of the cells overlapped by a box.
+        """
+        size = self.cell_size
+        columns = range(math.floor(bounds[0] / size), math.floor(bounds[2] / size) + 1)
+        rows = range(math.floor(bounds[1] / size), math.floor(bounds[3] / size) + 1)
+        return columns, rows
+
+    def insert(self, shape_index: int, bounds: Bounds, clip: Optional[Bounds] = None):
+        """
+        Stores a shape in the cells overlapped by its box.
+
+        Params:
+            shape_index (int): The position of the shape in the drawing order.
+            bounds (Bounds): The bounding box of the shape.
+            clip (Optional[Bounds]): If given, the box is first clipped to it, so the huge shapes
+            do not fill cells that are never queried.
+        """
+        if clip is not None:
+            if not SvgBounds.intersects(bounds, clip):
+                return
+            bounds = (max(bounds[0], clip[0]), max(bounds[1], clip[1]), min(bounds[2], clip[2]), min(bounds[3], clip[3]))
+
+        columns, rows = self.cell_range(bounds)
+        cells = self.cells
+        for row in rows:
+            for column in columns:
+                cell = cells.get((column, row))
+                if cell is None:
+                    cells[(column, row)] = [shape_index]
+                else:
+                    cell.append(shape_index)
+
+    def cell(self, column: int, row: int) -> list[int]:
+        """
+        Returns the shapes stored in a cell, in drawing order.
+        """
+        return self.cells.get((column, row), [])
+
+    def query(self, bounds: Bounds) -> list[int]:
+        """
+        Returns the shapes whose cells overlap a box, in drawing order. The boxes of the shapes
+        themselves are not tested, so a few of them may lie outside the box.
+
+        Params:
+            bounds (Bounds): The region to be queried.
+
+        Returns:
+            list[int]: The positions of the shapes in the drawing order.
+        """
+        columns, rows = self.cell_range(bounds)
+        found: set[int] = set()
+        for row in rows:
+            for column in columns:
+                found.update(self.cells.get((column, row), ()))
+        return sorted(found)
+
+
+class SvgShapeIndex:
+    """
+    A spatial index of the shapes of a document, in user units, which finds the shapes that
+    may overlap a region without testing every shape.
+
+    The boxes do not include the strokes, since their width in pixels depends on the transform
+    of the render, so the regions must be widened by `max_stroke_width` when they are queried.
+
+    Attributes:
+        bounds (list[Optional[Bounds]]): The bounding box of the geometry of every shape.
+        max_stroke_width (float): The widest stroke of the shapes, in user units.
+        extent (Optional[Bounds]): The bounding box of all the shapes.
+        grid (SvgGridIndex): The grid of the shapes with a bounding box.
+        unbounded (list[int]): The shapes without coordinates, such as viewports, which every query returns.
+    """
+    # The number of cells along the longest side of the document
+    GRID_RESOLUTION = 64
+
+    def __init__(self, shapes: Iterable[SvgShape]):
+        """
+        Computes the bounding boxes of the shapes and stores them in a grid sized from the
+        extent of the document.
+
+        Params:
+            shapes (Iterable[SvgShape]): The shapes of the document in drawing order.
+        """
+        self.bounds: list[Optional[Bounds]] = []
+        self.max_stroke_width = 0.0
+        self.unbounded: list[int] = []
+        for index, shape in enumerate(shapes):
+            bounds = None if shape.kind == 'svg' else SvgBounds.of_geometry(shape.geometry)
+            self.bounds.append(bounds)
+            if bounds is None:
+                self.unbounded.append(index)
+            else:
+                self.max_stroke_width = max(self.max_stroke_width, shape.stroke_width)
+
+        extent = SvgBounds.union_all(self.bounds)
+        self.extent = extent
+        cell_size = 1.0
+        if extent is not None:
+            cell_size = max(extent[2] - extent[0], extent[3] - extent[1]) / SvgShapeIndex.GRID_RESOLUTION or 1.0
+        self.grid = SvgGridIndex(cell_size)
+        for index, bounds in enumerate(self.bounds):
+            if bounds is not None:
+                self.grid.insert(index, bounds)
+
+    def query(self, region: Bounds) -> list[int]:
+        """
+        Returns the shapes whose bounding box overlaps a region, together with the shapes
+        without a bounding box, in drawing order.
+
+        Params:
+            region (Bounds): The region of the user space, already widened by the strokes.
+
+        Returns:
+            list[int]: The positions of the shapes in the drawing order.
+        """
+        found = []
+        extent = self.extent
+        if extent is not None and SvgBounds.intersects(region, extent):
+            # Only the cells inside the document are visited, however large the region is
+            clipped = (max(region[0], extent[0]), max(region[1], extent[1]), min(region[2], extent[2]), min(region[3], extent[3]))
+            bounds = self.bounds
+            columns, rows = self.grid.cell_range(clipped)
+            if len(columns) * len(rows) > len(bounds):
+                # Visiting the cells of a large region costs more than testing every shape
+                found = [
+                    index for index, shape_bounds in enumerate(bounds)
+                    if shape_bounds is not None and SvgBounds.intersects(shape_bounds, region)
+                ]
+            else:
+                found = [
+                    index for index in self.grid.query(clipped)
+                    if SvgBounds.intersects(bounds[index], region)
+                ]
+        if self.unbounded:
+            found = sorted(found + self.unbounded)
+        return found
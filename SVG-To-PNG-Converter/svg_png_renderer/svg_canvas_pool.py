@@ -0,0 +1,125 @@
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+from PIL import Image, ImageDraw
+
+
+class CanvasPoolStats(NamedTuple):
+    """
+    The counters of a SvgCanvasPool.
+
+    Attributes:
+        allocations (int): The number of canvases that had to be allocated.
+        reuses (int): The number of canvases that were cleared and reused.
+        idle (int): The number of canvases waiting in the pool.
+        idle_pixels (int): The number of pixels of the canvases waiting in the pool.
+    """
+    allocations: int
+    reuses: int
+    idle: int
+    idle_pixels: int
+
+
+class SvgCanvasPool:
+    """
+    A pool of the white RGBA canvases of the conversions, keyed by their size, which can be
+    shared by threads.
+
+    A released canvas is kept with its ImageDraw and is cleared in place when it is acquired
+    again, which fills the existing pixel buffer instead of allocating a new one, so the workers
+    that convert many images of the same sizes stop allocating large buffers for every image.
+    The least recently released canvases are freed first once the idle canvases hold more than
+    `max_pixels` pixels.
+
+    Attributes:
+        max_pixels (int): The maximum number of pixels of all the idle canvases.
+    """
+    def __init__(self, max_pixels: int = 16 * 2 ** 20):
+        """
+        Initializes an empty SvgCanvasPool.
+
+        Params:
+            max_pixels (int): The maximum number of pixels of all the idle canvases.
+        """
+        self.max_pixels = max_pixels
+        self.__idle: OrderedDict[tuple[int, int], list[tuple[Image.Image, ImageDraw.ImageDraw]]] = OrderedDict()
+        self.__idle_pixels = 0
+        self.__lock = threading.Lock()
+        self.__allocations = 0
+        self.__reuses = 0
+
+    def acquire(self, size: tuple[int, int]) -> tuple[Image.Image, ImageDraw.ImageDraw]:
+        """
+        Returns a white RGBA canvas of a size and its drawing interface, reusing an idle one if possible.
+
+        Params:
+            size (tuple[int, int]): The width and height of the canvas.
+
+        Returns:
+            tuple[Image.Image, ImageDraw.ImageDraw]: The white canvas and its drawing interface.
+        """
+        size = (size[0], size[1])
+        with self.__lock:
+            canvases = self.__idle.get(size)
+            canvas = None
+            if canvases:
+                canvas = canvases.pop()
+                self.__idle_pixels -= size[0] * size[1]
+                if not canvases:
+                    del self.__idle[size]
+                self.__reuses += 1
+            else:
+                self.__allocations += 1
+
+        if canvas is None:
+            image = Image.new('RGBA', size, 'WHITE')
+            return image, ImageDraw.Draw(image)
+        image, draw = canvas
+        image.paste((255, 255, 255, 255), (0, 0, size[0], size[1]))
+        return image, draw
+
+    def release(self, image: Image.Image, draw: ImageDraw.ImageDraw = None):
+        """
+        Gives a canvas back to the pool. The canvas must not be used afterwards.
+        The canvases larger than the whole pool are not kept.
+
+        Params:
+            image (Image.Image): The RGBA canvas.
+            draw (ImageDraw.ImageDraw): Its drawing interface, which is created again if it is not given.
+        """
+        pixels = image.width * image.height
+        if image.mode != 'RGBA' or pixels > self.max_pixels:
+            return
+        if draw is None:
+            draw = ImageDraw.Draw(image)
+        with self.__lock:
+            self.__idle.setdefault(image.size, []).append((image, draw))
+            self.__idle.move_to_end(image.size)
+            self.__idle_pixels += pixels
+            while self.__idle_pixels > self.max_pixels:
+                size, canvases = next(iter(self.__idle.items()))
+                canvases.pop(0)
+                self.__idle_pixels -= size[0] * size[1]
+                if not canvases:
+                    del self.__idle[size]
+
+    def stats(self) -> CanvasPoolStats:
+        """
+        Returns the counters of the pool.
+        """
+        with self.__lock:
+            idle = sum(len(canvases) for canvases in self.__idle.values())
+            return CanvasPoolStats(self.__allocations, self.__reuses, idle, self.__idle_pixels)
+
+    def clear(self):
+        """
+        Frees every idle canvas and resets the counters.
+        """
+        with self.__lock:
+            self.__idle.clear()
+            self.__idle_pixels = 0
+            self.__allocations = self.__reuses = 0
+
+
+# The pool shared by the reusable converters of a process
+default_canvas_pool = SvgCanvasPool()
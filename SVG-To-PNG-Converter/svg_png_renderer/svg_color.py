@@ -0,0 +1,180 @@
+import colorsys
+import re
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+Color = tuple[int, int, int, int]
+
+# The rgb(), rgba(), hsl() and hsla() functional notations, whose arguments are separated
+# by commas, or by whitespace and a slash before the alpha value
+FUNCTION_PATTERN = re.compile(r'^(rgba?|hsla?)\(([^)]*)\)$')
+ARGUMENT_SEPARATOR = re.compile(r'\s*[,/]\s*|\s+')
+MISSING = object()
+
+
+class ColorCacheStats(NamedTuple):
+    """
+    The counters of a SvgColorResolver.
+
+    Attributes:
+        hits (int): The number of colors resolved from the cache.
+        misses (int): The number of colors that had to be parsed.
+        invalid (int): The number of misses whose color could not be parsed. An invalid color
+        is only counted when it is parsed for the first time, not when it is found in the cache.
+        size (int): The number of colors in the cache.
+    """
+    hits: int
+    misses: int
+    invalid: int
+    size: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class SvgColorResolver:
+    """
+    A memoizing resolver of SVG paint values into RGBA colors, which can be shared by threads.
+
+    The documents usually reuse a handful of colors across all their elements, so the RGBA
+    color of every (color, opacity) pair is kept in a bounded cache that evicts the least
+    recently used pairs first. Besides the color names and the hexadecimal notations known by
+    Pillow, it understands none, transparent, currentColor and the rgb(), rgba(), hsl() and hsla()
+    functional notations. The colors that cannot be parsed resolve to None, like none, and are
+    only counted.
+
+    Attributes:
+        max_size (int): The maximum number of colors kept in the cache, 0 to disable it.
+    """
+    def __init__(self, max_size: int = 1024):
+        """
+        Initializes an empty SvgColorResolver.
+
+        Params:
+            max_size (int): The maximum number of colors kept in the cache, 0 to disable it.
+        """
+        self.max_size = max_size
+        self.__cache: OrderedDict[tuple[str, float], Optional[Color]] = OrderedDict()
+        self.__lock = threading.Lock()
+        self.__hits = 0
+        self.__misses = 0
+        self.__invalid = 0
+
+    def resolve(self, color: str, opacity: float = 1.0, current_color: Optional[str] = None) -> Optional[Color]:
+        """
+        Resolves a paint value and its opacity into a RGBA color.
+
+        Params:
+            color (str): The value of a fill or stroke attribute.
+            opacity (float): The value of the matching opacity attribute, clamped between 0 and 1.
+            current_color (Optional[str]): The value of the color attribute, used by currentColor.
+
+        Returns:
+            Optional[Color]: The RGBA color, or None if nothing has to be painted.
+        """
+        if color == 'currentColor':
+            color = current_color or 'black'
+        key = (color, opacity)
+        cache = self.__cache
+        # The lookups do not take the lock, since every operation of the dictionary is atomic
+        resolved = cache.get(key, MISSING)
+        if resolved is not MISSING:
+            self.__hits += 1
+            try:
+                cache.move_to_end(key)
+            except KeyError:
+                pass
+            return resolved
+
+        self.__misses += 1
+        resolved = self.__parse(color, opacity)
+        with self.__lock:
+            if self.max_size > 0:
+                self.__cache[key] = resolved
+                if len(self.__cache) > self.max_size:
+                    self.__cache.popitem(last=False)
+        return resolved
+
+    def stats(self) -> ColorCacheStats:
+        """
+        Returns the counters of the resolver.
+        """
+        return ColorCacheStats(self.__hits, self.__misses, self.__invalid, len(self.__cache))
+
+    def clear(self):
+        """
+        Removes every color from the cache and resets the counters.
+        """
+        with self.__lock:
+            self.__cache.clear()
+            self.__hits = self.__misses = self.__invalid = 0
+
+    def __parse(self, color: str, opacity: float) -> Optional[Color]:
+        """
+        Parses a paint value into a RGBA color, or None for none and the invalid values.
+        """
+        text = color.strip().lower()
+        if text == 'none':
+            return None
+        try:
+            if text == 'transparent':
+                red, green, blue, alpha = 0, 0, 0, 0.0
+            else:
+                match = FUNCTION_PATTERN.match(text)
+                if match is not None:
+                    red, green, blue, alpha = SvgColorResolver.__parse_function(match.group(1), match.group(2))
+                else:
+                    # Imported here since only the named and hex colors need Pillow, once per cached color
+                    from PIL import ImageColor
+                    rgb = ImageColor.getrgb(text)
+                    red, green, blue = rgb[:3]
+                    alpha = rgb[3] / 255 if len(rgb) == 4 else 1.0
+        except ValueError:
+            self.__invalid += 1
+            return None
+
+        opacity = min(max(opacity, 0.0), 1.0)
+        return red, green, blue, int(opacity * alpha * 255)
+
+    @staticmethod
+    def __parse_function(name: str, arguments: str) -> tuple[int, int, int, float]:
+        """
+        Parses the arguments of a functional notation into the red, green and blue components
+        and the alpha fraction. Raises a ValueError if they are not valid.
+        """
+        parts = [part for part in ARGUMENT_SEPARATOR.split(arguments.strip()) if part]
+        if len(parts) not in (3, 4):
+            raise ValueError(f'Expected 3 or 4 arguments in {name}()')
+
+        alpha = 1.0
+        if len(parts) == 4:
+            alpha = min(max(SvgColorResolver.__parse_fraction(parts[3]), 0.0), 1.0)
+
+        if name.startswith('rgb'):
+            components = []
+            for part in parts[:3]:
+                value = float(part[:-1]) * 2.55 if part.endswith('%') else float(part)
+                components.append(round(min(max(value, 0.0), 255.0)))
+            return components[0], components[1], components[2], alpha
+
+        hue = float(parts[0][:-3] if parts[0].endswith('deg') else parts[0]) / 360 % 1.0
+        saturation = min(max(SvgColorResolver.__parse_fraction(parts[1]), 0.0), 1.0)
+        lightness = min(max(SvgColorResolver.__parse_fraction(parts[2]), 0.0), 1.0)
+        red, green, blue = colorsys.hls_to_rgb(hue, lightness, saturation)
+        return round(red * 255), round(green * 255), round(blue * 255), alpha
+
+    @staticmethod
+    def __parse_fraction(value: str) -> float:
+        """
+        Parses a number or a percentage into a fraction.
+        """
+        if value.endswith('%'):
+            return float(value[:-1]) / 100
+        return float(value)
+
+
+# The resolver shared by the compilation of every document
+default_resolver = SvgColorResolver()
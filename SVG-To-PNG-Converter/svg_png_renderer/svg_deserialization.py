@@ -1,7 +1,31 @@
+import io
 import os
+import re
+from collections import Counter
+from types import MappingProxyType
+from typing import TYPE_CHECKING, BinaryIO, Iterator, Mapping, Optional, Union
 import xml.etree.ElementTree as ET
 from .deserialization import Deserializer, DeserializedObject
 
+if TYPE_CHECKING:
+    # The profiler reports the compiled shapes, so it is only imported for the annotations
+    from .svg_profiler import SvgProfiler
+
+# The presentation attributes that the elements inherit from their ancestors
+INHERITED_PROPERTIES = frozenset((
+    'color', 'fill', 'fill-opacity', 'fill-rule', 'stroke', 'stroke-width', 'stroke-opacity',
+    'stroke-linecap', 'stroke-linejoin', 'stroke-miterlimit', 'stroke-dasharray', 'stroke-dashoffset',
+    'visibility', 'font-family', 'font-size', 'font-style', 'font-weight'
+))
+# The computed style of the elements without any inherited presentation attribute
+EMPTY_STYLE: Mapping[str, str] = MappingProxyType({})
+# A reference to an element by its id, in a href or xlink:href attribute
+REFERENCE_PATTERN = re.compile(rb'href\s*=\s*["\']\s*#([^"\'\s]+)')
+# The size of the chunks a document is scanned for references in, and the bytes at the end of
+# a chunk that are scanned again with the next one, since a reference can span both
+REFERENCE_CHUNK_SIZE = 2 ** 20
+REFERENCE_MARGIN = 4096
+
 
 class Attribute:
     """
@@ -11,6 +35,8 @@ class Attribute:
         name (str): The name of the attribute.
         value (str): The value of the attribute.
     """
+    __slots__ = ('name', 'value')
+
     def __init__(self, name: str, value: str):
         """
         Initializes the Attribute with the name and value.
@@ -33,109 +59,426 @@ class SvgDeserializedObject(DeserializedObject):
     """
     A class that represents a deserialized SVG object.
 
+    The attributes are stored in a name to value dictionary, so adding or looking up
+    an attribute is O(1) and no `Attribute` object is allocated unless the
+    `attributes` list is explicitly requested.
+
+    The presentation attributes that the element does not set are looked up in the computed
+    style of its parent, which is shared by all its siblings instead of being copied.
+
     Attributes:
         tag_name (str): The tag name of the SVG element.
         attributes (list[Attribute]): A list of attributes of the SVG element.
+        inherited_style (Mapping[str, str]): The inherited presentation attributes computed for
+        the parent of the element.
+        parent (Optional[SvgDeserializedObject]): The object of the parent element, or None for the root.
     """
-    def __init__(self, tag_name: str):
+    __slots__ = ('tag_name', '_attribute_values', 'inherited_style', 'parent')
+
+    def __init__(
+            self,
+            tag_name: str,
+            attribute_values: dict[str, str] = None,
+            inherited_style: Mapping[str, str] = EMPTY_STYLE,
+            parent: Optional['SvgDeserializedObject'] = None
+    ):
         """
-        Initializes the SVG object with the tag name and the attributes will be
-        provided later using the `add_attribute` method that gets called in the
-        SVG implementation of the Deserializer.
+        Initializes the SVG object with the tag name. The attributes can be provided
+        directly as a name to value dictionary or later using the `add_attribute` method.
 
         Params:
             tag_name (str): The tag name of the SVG element.
+            attribute_values (dict[str, str]): The attribute values of the SVG element
+            keyed by their name. The dictionary is used as it is, without being copied.
+            inherited_style (Mapping[str, str]): The inherited presentation attributes computed
+            for the parent of the element. The mapping is shared, so it must not be modified.
+            parent (Optional[SvgDeserializedObject]): The object of the parent element, or None for the root.
         """
-        self.attributes: list[Attribute] = []
         self.tag_name = tag_name
+        self._attribute_values: dict[str, str] = attribute_values if attribute_values is not None else {}
+        self.inherited_style = inherited_style
+        self.parent = parent
+
+    @property
+    def attributes(self) -> list[Attribute]:
+        """
+        Returns the attributes of the SvgDeserializedObject in insertion order.
+        """
+        return [Attribute(name, value) for name, value in self._attribute_values.items()]
 
     def add_attribute(self, attribute: Attribute):
         """
-        Adds an attribute to the list of attributes of the SvgDeserializedObject.
+        Adds an attribute to the attributes of the SvgDeserializedObject.
         If an attribute with the same name already exists, it will be replaced.
 
         Params:
             attribute (Attribute): The attribute to be added.
         """
-        for i, attr in enumerate(self.attributes):
-            if attr.name == attribute.name:
-                self.attributes[i] = attribute
-                return
-        self.attributes.append(attribute)
+        self._attribute_values[attribute.name] = attribute.value
+
+    def set_attribute(self, name: str, value: str):
+        """
+        Sets the value of an attribute without allocating an `Attribute` object.
+        If an attribute with the same name already exists, it will be replaced.
+
+        Params:
+            name (str): The name of the attribute.
+            value (str): The value of the attribute.
+        """
+        self._attribute_values[name] = value
+
+    def get_attribute(self, name: str, default: str = '') -> str:
+        """
+        Returns the value of an attribute. The inherited presentation attributes are
+        returned when the element does not set them, or sets them to inherit.
+
+        Params:
+            name (str): The name of the attribute.
+            default (str): The value to be returned if the attribute does not exist.
+
+        Returns:
+            str: The value of the attribute if it exists, otherwise the default value.
+        """
+        value = self._attribute_values.get(name)
+        if value is not None and value != 'inherit':
+            return value
+        if name in INHERITED_PROPERTIES:
+            return self.inherited_style.get(name, default)
+        return default if value is None else value
+
+    def computed_style(self) -> Mapping[str, str]:
+        """
+        Returns the inherited presentation attributes of the children of the element.
+        The inherited style is returned as it is when the element does not override any
+        of its values, so the elements of a group usually share the same mapping.
+
+        Returns:
+            Mapping[str, str]: The presentation attributes inherited by the children.
+        """
+        inherited_style = self.inherited_style
+        style = None
+        for name, value in self._attribute_values.items():
+            if name not in INHERITED_PROPERTIES or value == 'inherit' or inherited_style.get(name) == value:
+                continue
+            if style is None:
+                style = dict(inherited_style)
+            style[name] = value
+        return inherited_style if style is None else style
 
     def __str__(self) -> str:
         """
         Returns the string representation of the SvgDeserializedObject.
         """
-        attributes_str = ''
-        for attribute in self.attributes:
-            attributes_str += str(attribute) + ' '
-        attributes_str = attributes_str.strip()
+        attributes_str = ' '.join(f'{name}="{value}"' for name, value in self._attribute_values.items())
         return f'<{self.tag_name} {attributes_str}/>'
 
 
+class SvgObjectStream:
+    """
+    The lazy iterator over the SvgDeserializedObjects of a document returned by
+    `SvgDeserializer.iter_deserialize`.
+
+    A use element can only reference an element that comes before it, so a compiler that
+    streams the objects cannot know which elements will be referenced. `reference_counts`
+    answers it with a quick scan of the bytes of the document, which does not build any object.
+
+    Attributes:
+        reference_counts (Optional[Counter]): The number of references to every id of the document,
+        or None if the document cannot be read twice, such as a pipe.
+    """
+    def __init__(self, objects: Iterator[SvgDeserializedObject], source: Union[str, BinaryIO, None]):
+        """
+        Initializes the SvgObjectStream.
+
+        Params:
+            objects (Iterator[SvgDeserializedObject]): The objects being deserialized.
+            source (Union[str, BinaryIO, None]): The path or the binary stream of the document,
+            at the position the document starts at, or None if it cannot be scanned.
+        """
+        self.__objects = objects
+        self.__source = source
+        self.__start: Optional[int] = None
+        if source is not None and not isinstance(source, str):
+            try:
+                self.__start = source.tell() if source.seekable() else None
+            except (OSError, AttributeError):
+                self.__start = None
+        self.__reference_counts: Optional[Counter] = None
+        self.__scanned = False
+
+    def __iter__(self) -> 'SvgObjectStream':
+        return self
+
+    def __next__(self) -> SvgDeserializedObject:
+        return next(self.__objects)
+
+    @property
+    def reference_counts(self) -> Optional[Counter]:
+        """
+        Returns the number of references to every id of the document, scanning it the first time.
+        The references of any href attribute are counted, so a count can be larger than the number
+        of use elements, but never smaller.
+        """
+        if not self.__scanned:
+            self.__scanned = True
+            self.__reference_counts = self.__scan()
+        return self.__reference_counts
+
+    def __scan(self) -> Optional[Counter]:
+        source = self.__source
+        if isinstance(source, str):
+            try:
+                with open(source, 'rb') as file:
+                    return SvgObjectStream.count_references(file)
+            except OSError:
+                return None
+        if source is None or self.__start is None:
+            return None
+
+        # The parser may already have read a part of the stream, so its position is restored
+        try:
+            position = source.tell()
+            source.seek(self.__start)
+            try:
+                return SvgObjectStream.count_references(source)
+            finally:
+                source.seek(position)
+        except OSError:
+            return None
+
+    @staticmethod
+    def count_references(file: BinaryIO) -> Counter:
+        """
+        Counts the references to every id in the rest of a binary file, chunk by chunk.
+
+        Params:
+            file (BinaryIO): The binary file, at the position the scan starts at.
+
+        Returns:
+            Counter: The number of references to every id.
+        """
+        reference_counts = Counter()
+        pending = b''
+        while True:
+            chunk = file.read(REFERENCE_CHUNK_SIZE)
+            data = pending + chunk
+            # The references that start in the margin are counted with the next chunk
+            limit = max(0, len(data) - REFERENCE_MARGIN) if chunk else len(data)
+            for match in REFERENCE_PATTERN.finditer(data):
+                if match.start() >= limit:
+                    break
+                reference_counts[match.group(1).decode('utf-8', 'replace')] += 1
+            if not chunk:
+                return reference_counts
+            pending = data[limit:]
+
+
 class SvgDeserializer(Deserializer):
     """
     A class that represents an SVG deserializer.
 
+    The svg document is usually read from a file, but it can also be read from memory
+    using the `from_bytes` and `from_stream` constructors, without any temporary file.
+
     Attributes:
-        file_path (str): The path to the svg file that needs to be deserialized.
+        file_path (Optional[str]): The path to the svg file that needs to be deserialized,
+        or None if the document is read from a stream.
+        stream (Optional[BinaryIO]): The binary stream the document is read from, or None
+        if the document is read from `file_path`.
+        profiler (Optional[SvgProfiler]): If given, the parse time and the number of elements
+        of every tag name are recorded in it.
     """
-    def __init__(self, file_path: str):
+    def __init__(
+            self,
+            file_path: Optional[str],
+            stream: Optional[BinaryIO] = None,
+            profiler: Optional['SvgProfiler'] = None
+    ):
         """
         Initializes the SvgDeserializer with the path of the svg file that needs to be deserialized.
 
         Params:
-            file_path (str): The path to the svg file that needs to be deserialized.
+            file_path (Optional[str]): The path to the svg file that needs to be deserialized,
+            or None if the document is read from a stream.
+            stream (Optional[BinaryIO]): The binary stream the document is read from, or None
+            if the document is read from `file_path`.
+            profiler (Optional[SvgProfiler]): If given, the parse time and the number of elements
+            of every tag name are recorded in it.
         """
         super().__init__(file_path)
+        self.stream = stream
+        self.profiler = profiler
+
+    @classmethod
+    def from_bytes(cls, data: bytes, profiler: Optional['SvgProfiler'] = None) -> 'SvgDeserializer':
+        """
+        Creates a SvgDeserializer that reads the svg document from memory.
+
+        Params:
+            data (bytes): The content of the svg document.
+            profiler (Optional[SvgProfiler]): If given, the deserialization is recorded in it.
+
+        Returns:
+            SvgDeserializer: The deserializer of the document.
+        """
+        return cls(None, io.BytesIO(data), profiler)
+
+    @classmethod
+    def from_stream(cls, stream: BinaryIO, profiler: Optional['SvgProfiler'] = None) -> 'SvgDeserializer':
+        """
+        Creates a SvgDeserializer that reads the svg document from a binary stream, such as
+        the body of a http request. The stream is read while the document is being
+        deserialized, so it can only be deserialized once.
+
+        Params:
+            stream (BinaryIO): The binary stream of the svg document.
+            profiler (Optional[SvgProfiler]): If given, the deserialization is recorded in it.
+
+        Returns:
+            SvgDeserializer: The deserializer of the document.
+        """
+        return cls(None, stream, profiler)
 
     def deserialize(self) -> list[SvgDeserializedObject]:
         """
         Deserializes the svg file into a list of SvgDeserializedObjects.
-        Iterates over the xml tree and creates a SvgDeserializedObject for each element.
+        The file is parsed a single time, see `iter_deserialize` for details.
 
         Returns:
             list[SvgDeserializedObject]: A list of SvgDeserializedObjects that represent the svg file.
         """
+        return list(self.iter_deserialize())
+
+    def iter_deserialize(self) -> SvgObjectStream:
+        """
+        Deserializes the svg file lazily, yielding a SvgDeserializedObject for each element
+        in document order. The file is validated and parsed in a single streaming pass and
+        every xml element is released as soon as it was consumed, so the memory used
+        does not depend on the size of the document.
+
+        The declarations of the style attributes override the presentation attributes of their
+        element, and the inherited presentation attributes are resolved with a stack of the
+        computed styles of the open elements, so each element is only visited once. Every object
+        keeps a reference to the object of its parent, which keeps the hierarchy of the document.
+
+        Since the file is streamed, a malformed document is only detected when the parser
+        reaches the malformed part, so some objects may already have been yielded.
+
+        Returns:
+            SvgObjectStream: An iterator over the SvgDeserializedObjects that represent the
+            svg file, which can also count the references to their ids.
+        """
+        source = self.stream if self.stream is not None else self.file_path
+        return SvgObjectStream(self.__iter_deserialize(source), source)
+
+    def __iter_deserialize(self, source: Union[str, BinaryIO]) -> Iterator[SvgDeserializedObject]:
         if not self.__is_valid_svg():
             raise Exception('The file is not a valid SVG file')
 
-        tree = ET.parse(self.file_path)
-        root = tree.getroot()
+        profiler = self.profiler
+        if profiler is None:
+            yield from SvgDeserializer.__iter_objects(source)
+            return
+        for svg_object in profiler.iter_phase('parse', SvgDeserializer.__iter_objects(source)):
+            profiler.count_tag(svg_object.tag_name)
+            yield svg_object
 
-        svg_deserialized_elements: list[SvgDeserializedObject] = []
-        for element in root.iter():
+    @staticmethod
+    def __iter_objects(source) -> Iterator[SvgDeserializedObject]:
+        """
+        Streams the xml elements of a file path or a binary stream into SvgDeserializedObjects.
+        """
+        parents: list[ET.Element] = []
+        parent_objects: list[Optional[SvgDeserializedObject]] = [None]
+        styles: list[Mapping[str, str]] = [EMPTY_STYLE]
+        try:
+            for event, element in ET.iterparse(source, events=('start', 'end')):
+                if event == 'start':
+                    parents.append(element)
+                    svg_object = SvgDeserializer.__deserialize_element(element, styles[-1], parent_objects[-1])
+                    parent_objects.append(svg_object)
+                    styles.append(svg_object.computed_style())
+                    yield svg_object
+                    continue
 
-            tag_name = element.tag
-            if '}' in tag_name:
-                tag_name = tag_name.split('}')[1]
+                # Every previous sibling was already removed, so the removal is O(1)
+                parents.pop()
+                parent_objects.pop()
+                styles.pop()
+                element.clear()
+                if parents:
+                    parents[-1].remove(element)
+        except ET.ParseError:
+            raise Exception('The file is not a valid SVG file')
 
-            svg_element = SvgDeserializedObject(tag_name)
-            for name, value in element.attrib.items():
-                svg_element.add_attribute(Attribute(name, value))
-            svg_deserialized_elements.append(svg_element)
+    @staticmethod
+    def __deserialize_element(
+            element: ET.Element,
+            inherited_style: Mapping[str, str],
+            parent: Optional[SvgDeserializedObject]
+    ) -> SvgDeserializedObject:
+        """
+        Creates a SvgDeserializedObject from an xml element.
+
+        Params:
+            element (ET.Element): The xml element to be deserialized.
+            inherited_style (Mapping[str, str]): The computed style of the parent element.
+            parent (Optional[SvgDeserializedObject]): The object of the parent element.
+
+        Returns:
+            SvgDeserializedObject: The object that represents the xml element.
+        """
+        tag_name = element.tag
+        if '}' in tag_name:
+            tag_name = tag_name.split('}')[1]
 
-        return svg_deserialized_elements
+        # The attrib dictionary is copied because the element gets cleared after it is consumed
+        attribute_values = dict(element.attrib)
+        style = attribute_values.get('style')
+        if style:
+            attribute_values.update(SvgDeserializer.parse_style(style))
+        return SvgDeserializedObject(tag_name, attribute_values, inherited_style, parent)
+
+    @staticmethod
+    def parse_style(style: str) -> dict[str, str]:
+        """
+        Parses the declarations of a style attribute, such as "fill: red; stroke: blue".
+        The declarations without a name or a value are ignored.
+
+        Params:
+            style (str): The value of the style attribute.
+
+        Returns:
+            dict[str, str]: The value of every declared property keyed by its name.
+        """
+        declarations = {}
+        for declaration in style.split(';'):
+            name, _, value = declaration.partition(':')
+            name = name.strip()
+            value = value.strip()
+            if value.endswith('!important'):
+                value = value[:-len('!important')].rstrip()
+            if name and value:
+                declarations[name] = value
+        return declarations
 
     def __is_valid_svg(self):
         """
-        Checks if the file is a valid SVG file.
+        Checks if the file can be a valid SVG file. The content of the file is
+        validated while it is being parsed by `iter_deserialize`.
 
         Returns:
-            bool: True if the file is a valid SVG file, False otherwise.
+            bool: True if the document is read from a stream or if the file exists and has
+            the svg extension, False otherwise.
         """
-        if not os.path.isfile(self.file_path):
+        if self.stream is not None:
+            return True
+
+        if self.file_path is None or not os.path.isfile(self.file_path):
             return False
 
         _, extension = os.path.splitext(self.file_path)
         if extension.lower() != '.svg':
             return False
 
-        try:
-            tree = ET.parse(self.file_path)
-            tree.getroot()
-        except ET.ParseError:
-            return False
-
         return True
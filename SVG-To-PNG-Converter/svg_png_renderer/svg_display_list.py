@@ -0,0 +1,680 @@
+from collections import Counter
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional, Sequence
+from .svg_color import Color
+from .svg_deserialization import SvgDeserializedObject, SvgObjectStream
+from .svg_path import SvgPathParseError, SvgPathParser
+from .svg_points import SvgPoints
+from .svg_transform import IDENTITY, SvgInstance, SvgTransform
+from .svg_utilitary import SvgUtility
+
+# The elements whose content is only drawn when it is referenced by a use element
+DEFINITION_CONTAINERS = frozenset(('defs', 'symbol'))
+XLINK_HREF = '{http://www.w3.org/1999/xlink}href'
+
+
+class SvgShape(NamedTuple):
+    """
+    An immutable, fully parsed shape that is ready to be drawn.
+
+    Attributes:
+        kind (str): The kind of the shape, which is the tag name of the SVG element it comes from.
+        geometry (tuple): The geometry of the shape in user space:
+            - svg: the view box (min_x, min_y, width, height) and the aspect ratio, see `SvgTransform.for_viewport`
+            - rect, circle, ellipse: the bounding box (left, top, right, bottom)
+            - line: the end points (x1, y1, x2, y2)
+            - polyline: its points, see `SvgPoints`
+            - path: a tuple of SvgSubpaths
+        stroke (Optional[Color]): The RGBA stroke color or None if there is no stroke.
+        fill (Optional[Color]): The RGBA fill color or None if there is no fill.
+        stroke_width (int): The width of the stroke.
+    """
+    kind: str
+    geometry: tuple
+    stroke: Optional[Color]
+    fill: Optional[Color]
+    stroke_width: int
+
+
+class SvgDisplayList:
+    """
+    A compiled form of a SVG document, made of SvgShapes.
+
+    All the attribute strings and colors are parsed a single time when the display list
+    is compiled, so the same display list can be rendered many times, at different sizes,
+    without repeating that work. The display list can also be pickled.
+
+    A spatial index of the shapes is built the first time a region is queried, so rendering
+    many crops of a large document only visits the shapes of each crop.
+
+    Attributes:
+        shapes (tuple[SvgShape, ...]): The shapes of the document in drawing order.
+        unknown_tags (Counter): The number of skipped elements for each tag name without a compiler.
+    """
+    __slots__ = ('shapes', 'unknown_tags', '_index')
+
+    def __init__(self, shapes: Iterable[SvgShape], unknown_tags: Counter = None):
+        """
+        Initializes the SvgDisplayList with the already compiled shapes.
+
+        Params:
+            shapes (Iterable[SvgShape]): The shapes of the document in drawing order.
+            unknown_tags (Counter): The number of skipped elements for each tag name without a compiler.
+        """
+        self.shapes: tuple[SvgShape, ...] = tuple(shapes)
+        self.unknown_tags: Counter = unknown_tags if unknown_tags is not None else Counter()
+        self._index = None
+
+    def __iter__(self) -> Iterator[SvgShape]:
+        return iter(self.shapes)
+
+    def __len__(self) -> int:
+        return len(self.shapes)
+
+    @property
+    def index(self) -> 'SvgShapeIndex':
+        """
+        Returns the spatial index of the shapes, which is built on the first access.
+        """
+        if self._index is None:
+            # Imported here since the bounds are computed from the SvgShapes of this module
+            from .svg_bounds import SvgShapeIndex
+            self._index = SvgShapeIndex(self.shapes)
+        return self._index
+
+    def query(self, region: tuple[float, float, float, float]) -> list[SvgShape]:
+        """
+        Returns the shapes that may overlap a region of the user space, in drawing order.
+        The shapes without coordinates, such as the viewports, are always returned.
+
+        Params:
+            region (tuple[float, float, float, float]): The (left, top, right, bottom) region,
+            which must already be widened by the strokes, see `SvgShapeIndex`.
+
+        Returns:
+            list[SvgShape]: The shapes that may overlap the region.
+        """
+        shapes = self.shapes
+        return [shapes[index] for index in self.index.query(region)]
+
+    @classmethod
+    def compile(cls, svg_deserialized_objects: Iterable[SvgDeserializedObject]) -> 'SvgDisplayList':
+        """
+        Compiles the SvgDeserializedObjects into a display list.
+
+        Params:
+            svg_deserialized_objects (Iterable[SvgDeserializedObject]): The objects that represent the SVG file.
+
+        Returns:
+            SvgDisplayList: The display list of the SVG file.
+        """
+        unknown_tags = Counter()
+        shapes = tuple(SvgCompiler.iter_compile(svg_deserialized_objects, unknown_tags))
+        return cls(shapes, unknown_tags)
+
+
+ShapeCompiler = Callable[[SvgDeserializedObject], Optional[SvgShape]]
+
+
+class _OpenElement:
+    """
+    An element whose descendants are being compiled, with the state they inherit from it.
+    """
+    __slots__ = ('svg_object', 'parent_transform', 'transform', 'hidden', 'recorded', 'recordings')
+
+    def __init__(
+            self,
+            svg_object: SvgDeserializedObject,
+            parent: Optional['_OpenElement'],
+            transform: Optional[SvgTransform],
+            reference_counts: Optional[Counter]
+    ):
+        self.svg_object = svg_object
+        self.parent_transform = parent.transform if parent is not None else None
+        self.transform = transform
+        self.hidden = svg_object.tag_name in DEFINITION_CONTAINERS or (parent is not None and parent.hidden)
+        # The shapes of the element and of its ancestors that can still be referenced. Without the
+        # reference counts, only the content of the defs and symbol elements is kept
+        recordings: tuple[list[SvgShape], ...] = parent.recordings if parent is not None else ()
+        element_id = svg_object.get_attribute('id')
+        self.recorded = bool(element_id) and (
+            self.hidden if reference_counts is None else reference_counts[element_id] > 0
+        )
+        if self.recorded:
+            recordings = recordings + ([],)
+        self.recordings = recordings
+
+
+class SvgCompiler:
+    """
+    A class that provides static methods for compiling SvgDeserializedObjects into SvgShapes.
+
+    The compiler of each tag name is looked up in a registry, so new shapes can be
+    supported by registering a compiler for their tag name with `register`.
+    """
+    @staticmethod
+    def register(tag_name: str, compiler: ShapeCompiler):
+        """
+        Registers the compiler used for the elements with the given tag name.
+        An already registered compiler for the same tag name will be replaced.
+
+        Params:
+            tag_name (str): The tag name of the SVG elements handled by the compiler.
+            compiler (ShapeCompiler): A function that receives a SvgDeserializedObject and returns
+            its SvgShape, or None if the object cannot be drawn.
+        """
+        SvgCompiler._compilers[tag_name] = compiler
+
+    @staticmethod
+    def iter_compile(
+            svg_deserialized_objects: Iterable[SvgDeserializedObject],
+            unknown_tags: Counter = None
+    ) -> Iterator[SvgShape]:
+        """
+        Lazily compiles the SvgDeserializedObjects into SvgShapes. The objects that cannot be
+        drawn are skipped.
+
+        The transform attributes are composed with a stack of the cumulative transforms of the
+        open elements, so the transform of every group is computed once for all its descendants,
+        and the geometry of every shape is compiled in the user space of the root element.
+
+        The shapes of every element with an id that is referenced are indexed by that id once the
+        element is closed. A use element is compiled into a single shape whose SvgInstance shares
+        the shapes of the element it references, which must come before it in the document. The
+        content of the defs and symbol elements is only drawn through the use elements.
+
+        The references are counted before compiling, by a scan of the objects of a list or of the
+        bytes of a `SvgDeserializer.iter_deserialize` stream, and the shapes of an element are freed
+        after its last use element, so the memory stays bounded for the documents that give an id
+        to every element. The elements of other iterators can only be referenced from the defs and
+        symbol elements.
+
+        Params:
+            svg_deserialized_objects (Iterable[SvgDeserializedObject]): The objects that represent the SVG file.
+            unknown_tags (Counter): If given, the tag names without a registered compiler are counted in it.
+
+        Returns:
+            Iterator[SvgShape]: An iterator over the compiled shapes.
+        """
+        return (shape for _, shape in SvgCompiler.iter_compile_objects(svg_deserialized_objects, unknown_tags))
+
+    @staticmethod
+    def iter_compile_objects(
+            svg_deserialized_objects: Iterable[SvgDeserializedObject],
+            unknown_tags: Counter = None
+    ) -> Iterator[tuple[SvgDeserializedObject, SvgShape]]:
+        """
+        Lazily compiles the SvgDeserializedObjects like `iter_compile`, together with the object
+        every shape comes from, so the shapes can be traced back to their elements.
+
+        Params:
+            svg_deserialized_objects (Iterable[SvgDeserializedObject]): The objects that represent the SVG file.
+            unknown_tags (Counter): If given, the tag names without a registered compiler are counted in it.
+
+        Returns:
+            Iterator[tuple[SvgDeserializedObject, SvgShape]]: An iterator over the compiled shapes and their objects.
+        """
+        compilers = SvgCompiler._compilers
+        definitions: dict[str, tuple[SvgDeserializedObject, Optional[SvgInstance]]] = {}
+        reference_counts = SvgCompiler.count_references(svg_deserialized_objects)
+        # The ancestors of the current object, the root first
+        open_elements: list[_OpenElement] = []
+        for svg_deserialized_object in svg_deserialized_objects:
+            parent = svg_deserialized_object.parent
+            while open_elements and open_elements[-1].svg_object is not parent:
+                SvgCompiler.__close(open_elements.pop(), definitions)
+            parent_element = open_elements[-1] if open_elements else None
+            transform = SvgCompiler.__compose_transform(
+                svg_deserialized_object,
+                parent_element.transform if parent_element is not None else None
+            )
+            element = _OpenElement(svg_deserialized_object, parent_element, transform, reference_counts)
+            open_elements.append(element)
+
+            tag_name = svg_deserialized_object.tag_name
+            if tag_name == 'use':
+                shape = SvgCompiler.__compile_use(svg_deserialized_object, transform, definitions, reference_counts)
+            else:
+                compiler = compilers.get(tag_name)
+                if compiler is None:
+                    if unknown_tags is not None:
+                        unknown_tags[tag_name] += 1
+                    continue
+                shape = compiler(svg_deserialized_object)
+                if shape is not None:
+                    shape = SvgCompiler.transform_shape(shape, transform)
+
+            if shape is None:
+                continue
+            if shape.kind != 'svg':
+                for recording in element.recordings:
+                    recording.append(shape)
+            if not element.hidden:
+                yield svg_deserialized_object, shape
+
+    @staticmethod
+    def count_references(svg_deserialized_objects: Iterable[SvgDeserializedObject]) -> Optional[Counter]:
+        """
+        Counts the use elements that reference every id, before the objects are compiled.
+
+        Params:
+            svg_deserialized_objects (Iterable[SvgDeserializedObject]): The objects that represent the SVG file.
+
+        Returns:
+            Optional[Counter]: The number of references to every id, which may count other references
+            than the use elements, or None if they cannot be counted without consuming the objects.
+        """
+        if isinstance(svg_deserialized_objects, SvgObjectStream):
+            reference_counts = svg_deserialized_objects.reference_counts
+            # The counts are lowered while compiling, so the counts of the stream are copied
+            return None if reference_counts is None else Counter(reference_counts)
+        if not isinstance(svg_deserialized_objects, Sequence):
+            return None
+        reference_counts = Counter()
+        for svg_object in svg_deserialized_objects:
+            if svg_object.tag_name == 'use':
+                reference = svg_object.get_attribute('href') or svg_object.get_attribute(XLINK_HREF)
+                if reference.startswith('#'):
+                    reference_counts[reference[1:]] += 1
+        return reference_counts
+
+    @staticmethod
+    def compile_object(svg_object: SvgDeserializedObject) -> Optional[SvgShape]:
+        """
+        Compiles a single SvgDeserializedObject into a SvgShape, with the transforms of its ancestors.
+
+        Params:
+            svg_object (SvgDeserializedObject): The object to be compiled.
+
+        Returns:
+            Optional[SvgShape]: The compiled shape or None if the object cannot be drawn
+            or there is no compiler registered for its tag name.
+        """
+        compiler = SvgCompiler._compilers.get(svg_object.tag_name)
+        if compiler is None:
+            return None
+        shape = compiler(svg_object)
+        if shape is None:
+            return None
+
+        ancestors = []
+        ancestor = svg_object
+        while ancestor is not None:
+            ancestors.append(ancestor)
+            ancestor = ancestor.parent
+        transform = None
+        for ancestor in reversed(ancestors):
+            transform = SvgCompiler.__compose_transform(ancestor, transform)
+        return SvgCompiler.transform_shape(shape, transform)
+
+    @staticmethod
+    def transform_shape(shape: SvgShape, transform: Optional[SvgTransform]) -> SvgShape:
+        """
+        Maps a shape from the coordinates of its element onto the user space of the root element.
+
+        The rectangles, circles and ellipses keep their kind while the transform only translates
+        and scales them, so they are still drawn by the fast axis aligned calls of Pillow. They are
+        turned into paths when the transform rotates or skews them.
+
+        Params:
+            shape (SvgShape): The shape in the coordinates of its element.
+            transform (Optional[SvgTransform]): The cumulative transform of the element, or None.
+
+        Returns:
+            SvgShape: The transformed shape.
+        """
+        if transform is None or shape.kind == 'svg':
+            return shape
+        if shape.kind not in ('rect', 'circle', 'ellipse'):
+            return transform.apply(shape)
+
+        if transform.is_axis_aligned:
+            transformed = transform.apply(shape)
+            left, top, right, bottom = transformed.geometry
+            # A negative scale swaps the sides of the box
+            return transformed._replace(geometry=(min(left, right), min(top, bottom), max(left, right), max(top, bottom)))
+
+        left, top, right, bottom = shape.geometry
+        if shape.kind == 'rect':
+            path_data = f'M {left} {top} H {right} V {bottom} H {left} Z'
+        else:
+            rx, ry = (right - left) / 2, (bottom - top) / 2
+            cy = (top + bottom) / 2
+            path_data = f'M {right} {cy} A {rx} {ry} 0 1 1 {left} {cy} A {rx} {ry} 0 1 1 {right} {cy} Z'
+        return transform.apply(shape._replace(kind='path', geometry=SvgPathParser.parse(path_data)))
+
+    @staticmethod
+    def __compose_transform(
+            svg_object: SvgDeserializedObject,
+            parent_transform: Optional[SvgTransform]
+    ) -> Optional[SvgTransform]:
+        """
+        Composes the transform attribute of an object with the cumulative transform of its parent.
+        An invalid transform attribute is reported and ignored.
+
+        Returns:
+            Optional[SvgTransform]: The cumulative transform of the object, or None for the identity.
+        """
+        value = svg_object.get_attribute('transform')
+        if not value:
+            return parent_transform
+
+        try:
+            transform = SvgTransform.parse(value)
+        except ValueError as e:
+            print(f"Could not process transform attribute: {e}")
+            return parent_transform
+        if parent_transform is not None:
+            transform = parent_transform.multiply(transform)
+        return None if transform.is_identity else transform
+
+    @staticmethod
+    def __close(
+            element: _OpenElement,
+            definitions: dict[str, tuple[SvgDeserializedObject, Optional[SvgInstance]]]
+    ):
+        """
+        Indexes the shapes of a closed element by its id, if they were recorded. The shapes are mapped
+        back from the user space into the coordinates of the element, so the instances can place them anywhere.
+        """
+        element_id = element.svg_object.get_attribute('id')
+        if not element.recorded or element_id in definitions:
+            return
+
+        # Imported here since the bounds are computed from the SvgShapes of this module
+        from .svg_bounds import SvgBounds
+        shapes = tuple(element.recordings[-1])
+        bounds = SvgBounds.union_all(SvgBounds.of_shape(shape) for shape in shapes)
+        inverse = IDENTITY if element.parent_transform is None else element.parent_transform.inverse()
+        prototype = None
+        if bounds is not None and inverse is not None:
+            prototype = SvgInstance(shapes, inverse, bounds)
+        definitions[element_id] = (element.svg_object, prototype)
+
+    @staticmethod
+    def __compile_use(
+            use_object: SvgDeserializedObject,
+            transform: Optional[SvgTransform],
+            definitions: dict[str, tuple[SvgDeserializedObject, Optional[SvgInstance]]],
+            reference_counts: Optional[Counter]
+    ) -> Optional[SvgShape]:
+        """
+        Compiles a use element into an instance of the element it references. The instance is
+        moved by the x and y attributes, and the view box of a referenced symbol is mapped onto
+        the width and height of the use element when they are given.
+
+        Params:
+            use_object (SvgDeserializedObject): The object from which the attributes will be extracted.
+            transform (Optional[SvgTransform]): The cumulative transform of the use element.
+            definitions (dict): The already compiled elements with an id.
+            reference_counts (Optional[Counter]): The references that are not compiled yet, whose
+            definition is freed after its last use element, or None if they are unknown.
+
+        Returns:
+            Optional[SvgShape]: The instance, or None if the reference cannot be resolved or draws nothing.
+        """
+        reference = use_object.get_attribute('href') or use_object.get_attribute(XLINK_HREF)
+        referenced_id = reference[1:] if reference.startswith('#') else None
+        definition = definitions.get(referenced_id) if referenced_id else None
+        if referenced_id and reference_counts is not None:
+            reference_counts[referenced_id] -= 1
+            if reference_counts[referenced_id] <= 0:
+                definitions.pop(referenced_id, None)
+        if definition is None:
+            print(f"Could not resolve the reference of a use element: {reference}")
+            return None
+        referenced_object, prototype = definition
+        if prototype is None:
+            return None
+
+        instance_transform = SvgTransform.translation(
+            SvgUtility.get_float(use_object, 'x', default=0),
+            SvgUtility.get_float(use_object, 'y', default=0)
+        )
+        if referenced_object.tag_name == 'symbol':
+            view_box = SvgCompiler.__parse_view_box(SvgUtility.get_string(referenced_object, 'viewBox', default=''))
+            width = SvgCompiler.__parse_length(SvgUtility.get_string(use_object, 'width', default=''))
+            height = SvgCompiler.__parse_length(SvgUtility.get_string(use_object, 'height', default=''))
+            if view_box is not None and width is not None and height is not None:
+                aspect_ratio = SvgCompiler.__parse_aspect_ratio(
+                    SvgUtility.get_string(referenced_object, 'preserveAspectRatio', default='')
+                )
+                viewport = SvgTransform.for_viewport(view_box, aspect_ratio, (width, height))
+                instance_transform = instance_transform.multiply(viewport)
+        if transform is not None:
+            instance_transform = transform.multiply(instance_transform)
+
+        instance = prototype._replace(transform=instance_transform.multiply(prototype.transform))
+        return SvgShape('use', instance, None, None, 0)
+
+    @staticmethod
+    def __compile_svg(svg_object: SvgDeserializedObject) -> Optional[SvgShape]:
+        """
+        Compiles the viewport of a svg element, which is the area of the user space that
+        is mapped onto the output image. It comes from the viewBox attribute or, without one,
+        from the width and height attributes.
+
+        Params:
+            svg_object (SvgDeserializedObject): The object from which the attributes will be extracted.
+
+        Returns:
+            Optional[SvgShape]: The viewport, or None if the element does not define one.
+        """
+        view_box = SvgCompiler.__parse_view_box(SvgUtility.get_string(svg_object, 'viewBox', default=''))
+        if view_box is None:
+            width = SvgCompiler.__parse_length(SvgUtility.get_string(svg_object, 'width', default=''))
+            height = SvgCompiler.__parse_length(SvgUtility.get_string(svg_object, 'height', default=''))
+            if width is None or height is None:
+                return None
+            view_box = (0.0, 0.0, width, height)
+
+        aspect_ratio = SvgCompiler.__parse_aspect_ratio(
+            SvgUtility.get_string(svg_object, 'preserveAspectRatio', default='')
+        )
+        return SvgShape('svg', (view_box, aspect_ratio), None, None, 0)
+
+    @staticmethod
+    def __parse_view_box(value: str) -> Optional[tuple[float, float, float, float]]:
+        """
+        Parses a viewBox attribute made of four numbers separated by whitespace or commas.
+        """
+        try:
+            min_x, min_y, width, height = map(float, value.replace(',', ' ').split())
+        except ValueError:
+            return None
+        if width <= 0 or height <= 0:
+            return None
+        return min_x, min_y, width, height
+
+    @staticmethod
+    def __parse_length(value: str) -> Optional[float]:
+        """
+        Parses a positive length in user units or pixels. Relative units are not supported.
+        """
+        value = value.strip()
+        if value.endswith('px'):
+            value = value[:-2]
+        try:
+            length = float(value)
+        except ValueError:
+            return None
+        return length if length > 0 else None
+
+    @staticmethod
+    def __parse_aspect_ratio(value: str) -> Optional[tuple[float, float, bool]]:
+        """
+        Parses a preserveAspectRatio attribute into the horizontal and vertical alignment
+        fractions and the slice flag, or None when the view box is stretched.
+        The default value is xMidYMid meet.
+        """
+        alignments = {'Min': 0.0, 'Mid': 0.5, 'Max': 1.0}
+        parts = value.split()
+        if parts and parts[0] == 'defer':
+            parts = parts[1:]
+        align = parts[0] if parts else 'xMidYMid'
+        slice_view_box = len(parts) > 1 and parts[1] == 'slice'
+
+        if align == 'none':
+            return None
+        if len(align) == 8 and align[0] == 'x' and align[4] == 'Y':
+            align_x = alignments.get(align[1:4])
+            align_y = alignments.get(align[5:8])
+            if align_x is not None and align_y is not None:
+                return align_x, align_y, slice_view_box
+        return 0.5, 0.5, slice_view_box
+
+    @staticmethod
+    def __compile_group(group_object: SvgDeserializedObject) -> None:
+        """
+        Compiles a group, which is not drawn itself. Its presentation attributes are
+        inherited by its children when the document is deserialized.
+
+        Params:
+            group_object (SvgDeserializedObject): The object of the group.
+        """
+        return None
+
+    @staticmethod
+    def __compile_rect(rect_object: SvgDeserializedObject) -> SvgShape:
+        """
+        Compiles a rectangle into a SvgShape whose geometry is its bounding box.
+
+        Params:
+            rect_object (SvgDeserializedObject): The object from which the attributes will be extracted.
+        """
+        x = SvgUtility.get_float(rect_object, 'x', default=0)
+        y = SvgUtility.get_float(rect_object, 'y', default=0)
+        width = SvgUtility.get_float(rect_object, 'width', default=0)
+        height = SvgUtility.get_float(rect_object, 'height', default=0)
+
+        return SvgShape(
+            'rect',
+            (x, y, x + width, y + height),
+            SvgUtility.process_color_and_opacity(rect_object, 'stroke'),
+            SvgUtility.process_color_and_opacity(rect_object, 'fill', default_color='none'),
+            SvgUtility.get_int(rect_object, 'stroke-width', default=1)
+        )
+
+    @staticmethod
+    def __compile_circle(circle_object: SvgDeserializedObject) -> SvgShape:
+        """
+        Compiles a circle into a SvgShape whose geometry is its bounding box.
+
+        Params:
+            circle_object (SvgDeserializedObject): The object from which the attributes will be extracted.
+        """
+        cx = SvgUtility.get_float(circle_object, 'cx', default=0)
+        cy = SvgUtility.get_float(circle_object, 'cy', default=0)
+        r = SvgUtility.get_float(circle_object, 'r', default=0)
+
+        return SvgShape(
+            'circle',
+            (cx - r, cy - r, cx + r, cy + r),
+            SvgUtility.process_color_and_opacity(circle_object, 'stroke'),
+            SvgUtility.process_color_and_opacity(circle_object, 'fill', default_color='none'),
+            SvgUtility.get_int(circle_object, 'stroke-width', default=1)
+        )
+
+    @staticmethod
+    def __compile_ellipse(ellipse_object: SvgDeserializedObject) -> SvgShape:
+        """
+        Compiles an ellipse into a SvgShape whose geometry is its bounding box.
+
+        Params:
+            ellipse_object (SvgDeserializedObject): The object from which the attributes will be extracted.
+        """
+        cx = SvgUtility.get_float(ellipse_object, 'cx', default=0)
+        cy = SvgUtility.get_float(ellipse_object, 'cy', default=0)
+        rx = SvgUtility.get_float(ellipse_object, 'rx', default=0)
+        ry = SvgUtility.get_float(ellipse_object, 'ry', default=0)
+
+        return SvgShape(
+            'ellipse',
+            (cx - rx, cy - ry, cx + rx, cy + ry),
+            SvgUtility.process_color_and_opacity(ellipse_object, 'stroke'),
+            SvgUtility.process_color_and_opacity(ellipse_object, 'fill', default_color='none'),
+            SvgUtility.get_int(ellipse_object, 'stroke-width', default=1)
+        )
+
+    @staticmethod
+    def __compile_line(line_object: SvgDeserializedObject) -> SvgShape:
+        """
+        Compiles a line into a SvgShape whose geometry is its two end points.
+
+        Params:
+            line_object (SvgDeserializedObject): The object from which the attributes will be extracted.
+        """
+        x1 = SvgUtility.get_float(line_object, 'x1', default=0)
+        y1 = SvgUtility.get_float(line_object, 'y1', default=0)
+        x2 = SvgUtility.get_float(line_object, 'x2', default=0)
+        y2 = SvgUtility.get_float(line_object, 'y2', default=0)
+
+        return SvgShape(
+            'line',
+            (x1, y1, x2, y2),
+            SvgUtility.process_color_and_opacity(line_object, 'stroke'),
+            None,
+            SvgUtility.get_int(line_object, 'stroke-width', default=1)
+        )
+
+    @staticmethod
+    def __compile_polyline(polyline_object: SvgDeserializedObject) -> Optional[SvgShape]:
+        """
+        Compiles a polyline into a SvgShape whose geometry is its list of points.
+
+        Params:
+            polyline_object (SvgDeserializedObject): The object from which the attributes will be extracted.
+        """
+        points = SvgUtility.get_string(polyline_object, 'points', default='')
+        polyline_points = SvgPoints.parse(points)
+        if len(polyline_points) == 0:
+            return None
+
+        return SvgShape(
+            'polyline',
+            polyline_points,
+            SvgUtility.process_color_and_opacity(polyline_object, 'stroke'),
+            None,
+            SvgUtility.get_int(polyline_object, 'stroke-width', default=1)
+        )
+
+    @staticmethod
+    def __compile_path(path_object: SvgDeserializedObject) -> Optional[SvgShape]:
+        """
+        Compiles a path into a SvgShape whose geometry is its list of subpaths.
+        Every command of the path data is supported, see `SvgPathParser`.
+
+        Params:
+            path_object (SvgDeserializedObject): The object from which the attributes will be extracted.
+        """
+        path_data = SvgUtility.get_string(path_object, 'd', default='')
+
+        try:
+            subpaths = SvgPathParser.parse(path_data)
+        except SvgPathParseError as e:
+            # The path is drawn up to the error, as required by the SVG specification
+            print(f"Could not process path attributes: {e}")
+            subpaths = e.subpaths
+
+        if not subpaths:
+            return None
+
+        return SvgShape(
+            'path',
+            subpaths,
+            SvgUtility.process_color_and_opacity(path_object, 'stroke'),
+            SvgUtility.process_color_and_opacity(path_object, 'fill', default_color='none'),
+            SvgUtility.get_int(path_object, 'stroke-width', default=1)
+        )
+
+    _compilers: dict[str, ShapeCompiler] = {
+        'svg': __compile_svg,
+        'g': __compile_group,
+        'defs': __compile_group,
+        'symbol': __compile_group,
+        'rect': __compile_rect,
+        'circle': __compile_circle,
+        'ellipse': __compile_ellipse,
+        'line': __compile_line,
+        'polyline': __compile_polyline,
+        'path': __compile_path,
+    }
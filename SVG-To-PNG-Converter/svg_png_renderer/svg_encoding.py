@@ -0,0 +1,160 @@
+import zlib
+from typing import TYPE_CHECKING, BinaryIO, NamedTuple, Union
+
+if TYPE_CHECKING:
+    # Pillow is only imported for the annotations, so the options are parsed without it
+    from PIL import Image
+
+# The Pillow format and the file extension of every supported output format
+IMAGE_FORMATS = {'png': ('PNG', '.png'), 'webp': ('WEBP', '.webp'), 'jpeg': ('JPEG', '.jpg')}
+# The zlib strategies of the PNG encoder, the filtered and rle ones suit the flat drawings.
+# The default one lets Pillow choose, which also picks the filters of the rows
+PNG_STRATEGIES = {
+    'default': -1,
+    'filtered': zlib.Z_FILTERED,
+    'huffman': zlib.Z_HUFFMAN_ONLY,
+    'rle': zlib.Z_RLE,
+    'fixed': zlib.Z_FIXED,
+}
+
+
+class SvgEncodeOptions(NamedTuple):
+    """
+    The options of the encoding of a rendered image. The defaults give the same PNG files as
+    Pillow does by default.
+
+    Attributes:
+        image_format (str): The output format, png, webp or jpeg.
+        compress_level (int): The zlib compression level of the PNG images, from 0 to 9.
+        compress_strategy (str): The zlib strategy of the PNG images, see PNG_STRATEGIES.
+        optimize (bool): Whether the PNG encoder searches for the smallest output, which is slow.
+        downgrade_rgb (bool): Whether the images without any translucent pixel are encoded
+        without their alpha channel, which saves a quarter of the raw pixels.
+        palette (bool): Whether the opaque images of at most max_colors colors are encoded with
+        a palette, exactly, which suits the flat icons.
+        max_colors (int): The largest palette, up to 256 colors.
+        quality (int): The quality of the lossy WebP and JPEG images, from 1 to 100.
+        lossless (bool): Whether the WebP images are lossless.
+    """
+    image_format: str = 'png'
+    compress_level: int = 6
+    compress_strategy: str = 'default'
+    optimize: bool = False
+    downgrade_rgb: bool = False
+    palette: bool = False
+    max_colors: int = 256
+    quality: int = 90
+    lossless: bool = False
+
+    @property
+    def extension(self) -> str:
+        return IMAGE_FORMATS[self.image_format][1]
+
+
+DEFAULT_ENCODE_OPTIONS = SvgEncodeOptions()
+
+
+class SvgImageEncoder:
+    """
+    A utility class that encodes the rendered RGBA images with SvgEncodeOptions.
+    """
+    @staticmethod
+    def validate(options: SvgEncodeOptions):
+        """
+        Raises a ValueError if the encode options are not supported, or if an option that the
+        image format ignores is not left to its default value.
+        """
+        if options.image_format not in IMAGE_FORMATS:
+            raise ValueError(f'Unknown image format: {options.image_format}')
+        if not 0 <= options.compress_level <= 9:
+            raise ValueError('The compress level must be between 0 and 9')
+        if options.compress_strategy not in PNG_STRATEGIES:
+            raise ValueError(f'Unknown compress strategy: {options.compress_strategy}')
+        if not 2 <= options.max_colors <= 256:
+            raise ValueError('The palette must have between 2 and 256 colors')
+        if not 1 <= options.quality <= 100:
+            raise ValueError('The quality must be between 1 and 100')
+
+        ignored = []
+        if options.image_format != 'png':
+            if options.compress_level != DEFAULT_ENCODE_OPTIONS.compress_level:
+                ignored.append('compress level')
+            if options.compress_strategy != DEFAULT_ENCODE_OPTIONS.compress_strategy:
+                ignored.append('compress strategy')
+            if options.optimize:
+                ignored.append('optimize')
+            if options.palette:
+                ignored.append('palette')
+        elif options.quality != DEFAULT_ENCODE_OPTIONS.quality:
+            ignored.append('quality')
+        if options.image_format != 'webp' and options.lossless:
+            ignored.append('lossless')
+        if len(ignored) == 1:
+            raise ValueError(f'The {ignored[0]} option does not apply to {options.image_format} images')
+        if ignored:
+            names = ', '.join(ignored[:-1]) + ' and ' + ignored[-1]
+            raise ValueError(f'The {names} options do not apply to {options.image_format} images')
+
+    @staticmethod
+    def prepare(image: 'Image.Image', options: SvgEncodeOptions) -> 'Image.Image':
+        """
+        Reduces the mode of a rendered image as much as the options allow without losing
+        any pixel: the opaque images lose their alpha channel and the flat ones get a palette.
+        JPEG images are always opaque, so their translucent pixels are composited onto white.
+
+        Params:
+            image (Image.Image): The rendered RGBA image, which is left unchanged.
+            options (SvgEncodeOptions): The encode options.
+
+        Returns:
+            Image.Image: The image to be encoded, which may be the given image.
+        """
+        reduces = options.downgrade_rgb or options.palette or options.image_format == 'jpeg'
+        if image.mode != 'RGBA' or not reduces:
+            return image
+        # Imported here since the options are validated without loading Pillow
+        from PIL import Image
+
+        opaque = image.getchannel('A').getextrema() == (255, 255)
+        if options.image_format == 'jpeg':
+            if opaque:
+                return image.convert('RGB')
+            background = Image.new('RGBA', image.size, 'WHITE')
+            background.alpha_composite(image)
+            return background.convert('RGB')
+        if not opaque:
+            return image
+
+        reduced = image.convert('RGB')
+        if options.palette and options.image_format == 'png':
+            colors = reduced.getcolors(options.max_colors)
+            if colors is not None:
+                # The median cut splits the colors into as many boxes as there are colors, so
+                # every box holds a single color and the palette is exact
+                reduced = reduced.quantize(len(colors), Image.Quantize.MEDIANCUT, dither=Image.Dither.NONE)
+        return reduced
+
+    @staticmethod
+    def encode(image: 'Image.Image', output: Union[str, BinaryIO], options: SvgEncodeOptions = DEFAULT_ENCODE_OPTIONS):
+        """
+        Encodes a rendered image and saves it to a file path or writes it to a binary file object.
+        Raises the exceptions of Pillow if it cannot be written.
+
+        Params:
+            image (Image.Image): The rendered RGBA image.
+            output (Union[str, BinaryIO]): The path to the output file or a binary file object.
+            options (SvgEncodeOptions): The encode options.
+        """
+        image = SvgImageEncoder.prepare(image, options)
+        if options.image_format == 'png':
+            image.save(
+                output,
+                'PNG',
+                compress_level=options.compress_level,
+                compress_type=PNG_STRATEGIES[options.compress_strategy],
+                optimize=options.optimize
+            )
+        elif options.image_format == 'webp':
+            image.save(output, 'WEBP', quality=options.quality, lossless=options.lossless)
+        else:
+            image.save(output, 'JPEG', quality=options.quality)
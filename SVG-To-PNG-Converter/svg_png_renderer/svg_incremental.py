@@ -0,0 +1,387 @@
+import io
+import math
+from collections import Counter
+from typing import BinaryIO, Iterable, Mapping, Optional, Union
+from PIL import Image
+from .svg_bounds import Bounds, SvgBounds
+from .svg_deserialization import EMPTY_STYLE, SvgDeserializedObject, SvgDeserializer
+from .svg_display_list import DEFINITION_CONTAINERS, XLINK_HREF, SvgCompiler, SvgShape
+from .svg_encoding import DEFAULT_ENCODE_OPTIONS, SvgEncodeOptions, SvgImageEncoder
+from .svg_png_converter import SUPERSAMPLED_BAND_HEIGHT, SvgPngConverter
+from .svg_sprite_cache import SvgSpriteCache
+from .svg_transform import SvgTransform
+
+# The (left, top, right, bottom) region of the output image, the right and bottom pixels excluded
+Region = tuple[int, int, int, int]
+# The attributes whose change can affect other elements than the updated one and its descendants
+STRUCTURAL_ATTRIBUTES = frozenset(('id', 'href', XLINK_HREF))
+
+
+class SvgIncrementalRenderer:
+    """
+    A long-lived renderer of a document whose elements change between frames, such as a
+    dashboard where only a bar or a gauge needle moves.
+
+    The renderer keeps the deserialized objects, the placed shape of every object with its
+    bounding box and the rendered image. An update sets attributes of an element found by its
+    id or its position in the document, recomputes the inherited styles of its descendants and
+    recompiles only them. The union of the old and the new bounding boxes of the changed shapes
+    is the dirty region, and only the shapes that intersect it are drawn again, onto that region,
+    with `SvgPngConverter.render_region`. The overlapping dirty regions are merged, so the
+    distant changes are drawn as separate small regions.
+
+    The elements that are drawn elsewhere through use elements, the definitions and the use
+    and svg elements themselves are not recompiled on their own: updating them recompiles and
+    redraws the whole document, which gives the same image as a new render.
+
+    The encoded image is kept until the next change, and `encode_patches` encodes only the
+    regions that changed since the previous patches, for the clients that patch their copy.
+
+    Attributes:
+        objects (list[SvgDeserializedObject]): The objects of the document in document order,
+        which are updated in place.
+        output_dim (tuple[int, int]): The dimensions of the output image.
+        antialiasing (int): The supersampling factor, 1 for aliased images.
+        antialiasing_filter (str): The downsampling filter, box or lanczos.
+        encode_options (SvgEncodeOptions): The format and the compression of the encoded images.
+        image (Image.Image): The rendered RGBA image, which is kept up to date by the updates.
+        unknown_tags (Counter): The number of elements that cannot be drawn, for each tag name.
+        full_renders (int): The number of times the whole image was drawn.
+        partial_renders (int): The number of dirty regions drawn.
+    """
+    def __init__(
+            self,
+            svg_deserialized_objects: Iterable[SvgDeserializedObject],
+            output_dim: tuple[int, int] = (500, 500),
+            antialiasing: int = 1,
+            antialiasing_filter: str = 'box',
+            encode_options: SvgEncodeOptions = DEFAULT_ENCODE_OPTIONS
+    ):
+        """
+        Initializes the SvgIncrementalRenderer and renders the whole document.
+
+        Params:
+            svg_deserialized_objects (Iterable[SvgDeserializedObject]): The objects that represent
+            the SVG file, in document order, such as the list returned by `SvgDeserializer.deserialize`.
+            output_dim (tuple[int, int]): The dimensions of the output image.
+            antialiasing (int): The supersampling factor, 1 for aliased images, 2 or 4 for smoother edges.
+            antialiasing_filter (str): The downsampling filter, box or lanczos.
+            encode_options (SvgEncodeOptions): The format and the compression of the encoded images.
+        """
+        SvgPngConverter.validate_antialiasing(antialiasing, antialiasing_filter)
+        SvgImageEncoder.validate(encode_options)
+        self.objects = list(svg_deserialized_objects)
+        self.output_dim = output_dim
+        self.antialiasing = antialiasing
+        self.antialiasing_filter = antialiasing_filter
+        self.encode_options = encode_options
+        self.image = Image.new('RGBA', output_dim, 'WHITE')
+        self.unknown_tags = Counter()
+        self.full_renders = 0
+        self.partial_renders = 0
+
+        self.__sprites = SvgSpriteCache()
+        self.__transform: Optional[SvgTransform] = None
+        self.__positions: dict[str, int] = {}
+        self.__referenced: set[str] = set()
+        # The shape of every object in supersampled pixels, snapped, and its bounding box
+        self.__shapes: list[Optional[SvgShape]] = []
+        self.__bounds: list[Optional[Bounds]] = []
+        self.__encoded: Optional[bytes] = None
+        self.__unpatched: list[Region] = []
+        self.__render_all()
+
+    @property
+    def full_region(self) -> Region:
+        return 0, 0, self.output_dim[0], self.output_dim[1]
+
+    def update(self, key: Union[str, int], attributes: Mapping[str, str]) -> list[Region]:
+        """
+        Sets attributes of an element and redraws the regions of the image that changed.
+
+        Params:
+            key (Union[str, int]): The id of the element or its position in `objects`.
+            attributes (Mapping[str, str]): The new attribute values. A style attribute is
+            parsed into its declarations.
+
+        Returns:
+            list[Region]: The regions of the image that were redrawn.
+        """
+        return self.update_many([(key, attributes)])
+
+    def update_many(self, updates: Iterable[tuple[Union[str, int], Mapping[str, str]]]) -> list[Region]:
+        """
+        Applies several updates, such as the changes of a frame, and redraws the regions of the
+        image that changed a single time.
+
+        Params:
+            updates (Iterable[tuple[Union[str, int], Mapping[str, str]]]): The id or the position
+            of every updated element and its new attribute values.
+
+        Returns:
+            list[Region]: The regions of the image that were redrawn.
+        """
+        objects = self.objects
+        affected: set[int] = set()
+        structural = False
+        for key, attributes in updates:
+            position = self.__position(key)
+            svg_object = objects[position]
+            for name, value in attributes.items():
+                if name == 'style':
+                    for declared_name, declared_value in SvgDeserializer.parse_style(value).items():
+                        svg_object.set_attribute(declared_name, declared_value)
+                else:
+                    svg_object.set_attribute(name, value)
+            structural = structural or not STRUCTURAL_ATTRIBUTES.isdisjoint(attributes)
+            affected.update(self.__subtree(position))
+        if not affected:
+            return []
+
+        positions = sorted(affected)
+        for position in positions:
+            svg_object = objects[position]
+            parent = svg_object.parent
+            svg_object.inherited_style = parent.computed_style() if parent is not None else EMPTY_STYLE
+
+        if structural or any(self.__is_shared(position) for position in positions):
+            self.__render_all()
+            return [self.full_region]
+
+        dirty = []
+        for position in positions:
+            old_bounds = self.__bounds[position]
+            shape = self.__place(SvgCompiler.compile_object(objects[position]))
+            self.__shapes[position] = shape
+            self.__bounds[position] = new_bounds = SvgBounds.of_shape(shape) if shape is not None else None
+            for bounds in (old_bounds, new_bounds):
+                region = self.__to_region(bounds)
+                if region is not None:
+                    dirty.append(region)
+
+        regions = SvgIncrementalRenderer.merge_regions(dirty)
+        for region in regions:
+            self.__render_region(region)
+        self.partial_renders += len(regions)
+        return regions
+
+    def encode(self) -> bytes:
+        """
+        Encodes the whole image with the encode options. The encoded image is kept until the
+        next change, so encoding an unchanged image again is free.
+
+        Returns:
+            bytes: The encoded image.
+        """
+        if self.__encoded is None:
+            output = io.BytesIO()
+            SvgImageEncoder.encode(self.image, output, self.encode_options)
+            self.__encoded = output.getvalue()
+        return self.__encoded
+
+    def encode_to(self, output: Union[str, BinaryIO]):
+        """
+        Saves the encoded image to a file path or writes it to a binary file object.
+
+        Params:
+            output (Union[str, BinaryIO]): The path to the output file or a binary file object.
+        """
+        if isinstance(output, str):
+            with open(output, 'wb') as file:
+                file.write(self.encode())
+        else:
+            output.write(self.encode())
+
+    def encode_patches(self) -> list[tuple[Region, bytes]]:
+        """
+        Encodes only the regions of the image that changed since the previous patches, which are
+        the whole image the first time. The regions do not overlap.
+
+        Returns:
+            list[tuple[Region, bytes]]: Every changed region and its encoded image.
+        """
+        regions = SvgIncrementalRenderer.merge_regions(self.__unpatched)
+        self.__unpatched = []
+        patches = []
+        for region in regions:
+            output = io.BytesIO()
+            SvgImageEncoder.encode(self.image.crop(region), output, self.encode_options)
+            patches.append((region, output.getvalue()))
+        return patches
+
+    @staticmethod
+    def merge_regions(regions: Iterable[Region]) -> list[Region]:
+        """
+        Merges the overlapping regions into their union, until no two regions overlap.
+
+        Params:
+            regions (Iterable[Region]): The regions to be merged.
+
+        Returns:
+            list[Region]: The regions that do not overlap.
+        """
+        merged: list[Region] = []
+        for region in regions:
+            overlapping = True
+            while overlapping:
+                overlapping = False
+                for i, other in enumerate(merged):
+                    if region[0] < other[2] and other[0] < region[2] and region[1] < other[3] and other[1] < region[3]:
+                        region = (
+                            min(region[0], other[0]),
+                            min(region[1], other[1]),
+                            max(region[2], other[2]),
+                            max(region[3], other[3])
+                        )
+                        merged.pop(i)
+                        overlapping = True
+                        break
+            merged.append(region)
+        return merged
+
+    def __position(self, key: Union[str, int]) -> int:
+        """
+        Returns the position of the element with an id, or checks a position.
+        """
+        if isinstance(key, str):
+            position = self.__positions.get(key)
+            if position is None:
+                raise Exception(f'No element has the id {key}')
+            return position
+        if not 0 <= key < len(self.objects):
+            raise Exception(f'No element at the position {key}')
+        return key
+
+    def __subtree(self, position: int) -> list[int]:
+        """
+        Returns the position of an element and of its descendants, which follow it in document order.
+        """
+        objects = self.objects
+        members = {id(objects[position])}
+        subtree = [position]
+        for next_position in range(position + 1, len(objects)):
+            svg_object = objects[next_position]
+            if id(svg_object.parent) not in members:
+                break
+            members.add(id(svg_object))
+            subtree.append(next_position)
+        return subtree
+
+    def __is_shared(self, position: int) -> bool:
+        """
+        Returns True if the change of an object can change other shapes than its own, or cannot be
+        compiled on its own: the viewports, the use elements, and the elements drawn through them.
+        """
+        svg_object = self.objects[position]
+        if svg_object.tag_name in ('svg', 'use'):
+            return True
+        ancestor = svg_object
+        while ancestor is not None:
+            if ancestor.tag_name in DEFINITION_CONTAINERS or ancestor.get_attribute('id') in self.__referenced:
+                return True
+            ancestor = ancestor.parent
+        return False
+
+    def __render_all(self):
+        """
+        Compiles every object, finds the ids and the referenced elements, and draws the whole image.
+        """
+        objects = self.objects
+        object_positions = {id(svg_object): position for position, svg_object in enumerate(objects)}
+        self.__positions = {}
+        self.__referenced = set()
+        for position, svg_object in enumerate(objects):
+            element_id = svg_object.get_attribute('id')
+            if element_id and element_id not in self.__positions:
+                self.__positions[element_id] = position
+            if svg_object.tag_name == 'use':
+                reference = svg_object.get_attribute('href') or svg_object.get_attribute(XLINK_HREF)
+                if reference.startswith('#') and len(reference) > 1:
+                    self.__referenced.add(reference[1:])
+
+        self.unknown_tags = Counter()
+        compiled: list[Optional[SvgShape]] = [None] * len(objects)
+        for svg_object, shape in SvgCompiler.iter_compile_objects(objects, self.unknown_tags):
+            compiled[object_positions[id(svg_object)]] = shape
+
+        # Only the viewport of the root element maps the document onto the image, see `SvgPngConverter.place_shapes`
+        transform = SvgTransform.scaling(self.antialiasing)
+        viewport = next((shape for shape in compiled if shape is not None and shape.kind == 'svg'), None)
+        if viewport is not None:
+            view_box, aspect_ratio = viewport.geometry
+            transform = transform.multiply(SvgTransform.for_viewport(view_box, aspect_ratio, self.output_dim))
+        self.__transform = None if transform.is_identity else transform
+
+        self.__shapes = [self.__place(shape) for shape in compiled]
+        self.__bounds = [SvgBounds.of_shape(shape) if shape is not None else None for shape in self.__shapes]
+        SvgPngConverter.report_unknown_tags(self.unknown_tags)
+        self.__render_region(self.full_region)
+        self.full_renders += 1
+
+    def __place(self, shape: Optional[SvgShape]) -> Optional[SvgShape]:
+        """
+        Maps a compiled shape onto the supersampled pixels of the image and snaps it,
+        or returns None if it cannot be drawn.
+        """
+        if shape is None or shape.kind == 'svg' or shape.kind not in SvgPngConverter._drawers:
+            return None
+        if self.__transform is not None:
+            shape = self.__transform.apply(shape)
+        return SvgPngConverter.snap_to_pixels(shape)
+
+    def __to_region(self, bounds: Optional[Bounds]) -> Optional[Region]:
+        """
+        Maps the bounding box of a shape onto the output pixels whose color it can change,
+        widened by the pixels the downsampling filter reads around them.
+        """
+        if bounds is None:
+            return None
+        antialiasing = self.antialiasing
+        spread = SvgPngConverter.antialiasing_margin(antialiasing, self.antialiasing_filter) // antialiasing
+        width, height = self.output_dim
+        left = max(0, math.floor(bounds[0] / antialiasing) - spread)
+        top = max(0, math.floor(bounds[1] / antialiasing) - spread)
+        right = min(width, math.floor(bounds[2] / antialiasing) + 1 + spread)
+        bottom = min(height, math.floor(bounds[3] / antialiasing) + 1 + spread)
+        if left >= right or top >= bottom:
+            return None
+        return left, top, right, bottom
+
+    def __render_region(self, region: Region):
+        """
+        Draws the shapes that intersect a region onto it, one band of rows at a time,
+        so the supersampled region never has to be held in memory at once.
+        """
+        antialiasing = self.antialiasing
+        margin = SvgPngConverter.antialiasing_margin(antialiasing, self.antialiasing_filter)
+        band_height = max(1, SUPERSAMPLED_BAND_HEIGHT // antialiasing)
+        left, top, right, bottom = region
+        shapes = self.__shapes
+        bounds = self.__bounds
+        for band_top in range(top, bottom, band_height):
+            band_bottom = min(bottom, band_top + band_height)
+            query = (
+                left * antialiasing - margin,
+                band_top * antialiasing - margin,
+                right * antialiasing - 1 + margin,
+                band_bottom * antialiasing - 1 + margin
+            )
+            band_shapes = [
+                shape for shape, shape_bounds in zip(shapes, bounds)
+                if shape_bounds is not None and SvgBounds.intersects(shape_bounds, query)
+            ]
+            band = SvgPngConverter.render_region(
+                band_shapes,
+                (left, band_top, right - left, band_bottom - band_top),
+                self.output_dim,
+                antialiasing,
+                self.antialiasing_filter,
+                self.__sprites
+            )
+            self.image.paste(band, (left, band_top))
+
+        self.__encoded = None
+        if region == self.full_region:
+            self.__unpatched = [region]
+        else:
+            self.__unpatched.append(region)
@@ -0,0 +1,376 @@
+import math
+import re
+from typing import Iterator, NamedTuple, Optional
+from .svg_points import Points, SvgPoints, np
+
+# The maximum distance, in pixels, between a flattened curve and the real curve
+FLATTENING_TOLERANCE = 0.2
+
+COMMAND_PATTERN = re.compile(r'[\s,]*([MmZzLlHhVvCcSsQqTtAa])')
+NUMBER_PATTERN = re.compile(r'[\s,]*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)')
+FLAG_PATTERN = re.compile(r'[\s,]*([01])')
+END_PATTERN = re.compile(r'[\s,]*$')
+
+# The number of arguments of each command
+ARGUMENT_COUNTS = {'M': 2, 'Z': 0, 'L': 2, 'H': 1, 'V': 1, 'C': 6, 'S': 4, 'Q': 4, 'T': 2, 'A': 7}
+
+
+class SvgSubpath(NamedTuple):
+    """
+    A subpath of a path, made of straight lines and cubic Bezier curves.
+
+    Quadratic curves and arcs are converted into cubic curves when the path is parsed, since
+    cubic curves stay exact under any affine transform. The curves are only flattened into
+    lines when the subpath is drawn, in pixels, so the number of segments follows the output
+    resolution.
+
+    Attributes:
+        points (Points): The start point followed by the points of every segment: one point for a
+        line and the two control points and the end point for a curve.
+        verbs (str): The segments of the subpath, 'L' for a line and 'C' for a cubic curve.
+        closed (bool): True if the subpath was closed with the Z command.
+    """
+    points: Points
+    verbs: str
+    closed: bool
+
+    def flatten(self, tolerance: float = FLATTENING_TOLERANCE) -> Points:
+        """
+        Flattens the subpath into a polyline. Each curve is split into the smallest number of
+        lines that keeps the polyline within the tolerance of the curve, which is derived from
+        the bound on the second derivative of the curve.
+
+        Params:
+            tolerance (float): The maximum distance between the polyline and the curves.
+
+        Returns:
+            Points: The points of the polyline.
+        """
+        if 'C' not in self.verbs:
+            return self.points
+
+        points = self.points
+        if SvgPoints.is_points(points):
+            return self.__flatten_with_numpy(tolerance)
+
+        flattened = [points[0]]
+        index = 1
+        for verb in self.verbs:
+            if verb == 'L':
+                flattened.append(points[index])
+                index += 1
+                continue
+            p0, p1, p2, p3 = points[index - 1], points[index], points[index + 1], points[index + 2]
+            index += 3
+            count = SvgSubpath.__segment_count(p0, p1, p2, p3, tolerance)
+            for i in range(1, count + 1):
+                t = i / count
+                u = 1 - t
+                w0, w1, w2, w3 = u * u * u, 3 * u * u * t, 3 * u * t * t, t * t * t
+                flattened.append((
+                    w0 * p0[0] + w1 * p1[0] + w2 * p2[0] + w3 * p3[0],
+                    w0 * p0[1] + w1 * p1[1] + w2 * p2[1] + w3 * p3[1]
+                ))
+        return tuple(flattened)
+
+    def __flatten_with_numpy(self, tolerance: float) -> Points:
+        """
+        Flattens the subpath evaluating every curve at all of its parameters in one array operation.
+        """
+        points = self.points
+        parts = [points[:1]]
+        index = 1
+        for verb in self.verbs:
+            if verb == 'L':
+                parts.append(points[index:index + 1])
+                index += 1
+                continue
+            control = points[index - 1:index + 3]
+            index += 3
+            count = SvgSubpath.__segment_count(control[0], control[1], control[2], control[3], tolerance)
+            t = np.linspace(1.0 / count, 1.0, count)[:, None]
+            u = 1 - t
+            parts.append(
+                u * u * u * control[0] + 3 * u * u * t * control[1] + 3 * u * t * t * control[2] + t * t * t * control[3]
+            )
+        flattened = np.concatenate(parts)
+        flattened.flags.writeable = False
+        return flattened
+
+    @staticmethod
+    def __segment_count(p0, p1, p2, p3, tolerance: float) -> int:
+        """
+        Returns the number of lines needed to flatten a cubic curve. Splitting a curve into n
+        lines deviates at most M / (8 * n^2) from it, where M = 6 * max(|p0 - 2p1 + p2|, |p1 - 2p2 + p3|)
+        bounds its second derivative.
+        """
+        dx1, dy1 = p0[0] - 2 * p1[0] + p2[0], p0[1] - 2 * p1[1] + p2[1]
+        dx2, dy2 = p1[0] - 2 * p2[0] + p3[0], p1[1] - 2 * p2[1] + p3[1]
+        bound = 6 * math.sqrt(max(dx1 * dx1 + dy1 * dy1, dx2 * dx2 + dy2 * dy2))
+        return max(1, min(4096, math.ceil(math.sqrt(bound / (8 * tolerance)))))
+
+
+class SvgPathParseError(Exception):
+    """
+    Raised when the path data contains an error. The subpaths parsed before the error are kept.
+    """
+    def __init__(self, message: str, subpaths: tuple[SvgSubpath, ...]):
+        super().__init__(message)
+        self.subpaths = subpaths
+
+
+class SvgPathParser:
+    """
+    A class that parses the path data of the d attribute into SvgSubpaths.
+
+    All the commands are supported, in their absolute and relative forms and with implicit
+    repetitions, and the data is read in a single pass over the string.
+    """
+    @staticmethod
+    def parse(path_data: str) -> tuple[SvgSubpath, ...]:
+        """
+        Parses the path data into subpaths. As required by the SVG specification, the path is
+        rendered up to the first error, so the subpaths before it are returned with the error.
+
+        Params:
+            path_data (str): The value of the d attribute.
+
+        Returns:
+            tuple[SvgSubpath, ...]: The subpaths that have at least one segment.
+
+        Raises:
+            SvgPathParseError: If the path data contains an error.
+        """
+        builder = _SubpathBuilder()
+        try:
+            for command, arguments in SvgPathParser.tokenize(path_data):
+                builder.apply(command, arguments)
+        except ValueError as e:
+            raise SvgPathParseError(str(e), builder.finish())
+        return builder.finish()
+
+    @staticmethod
+    def tokenize(path_data: str) -> Iterator[tuple[str, tuple[float, ...]]]:
+        """
+        Lazily splits the path data into commands with their arguments. Implicit repetitions are
+        returned as separate commands, and the pairs after a moveto become linetos.
+
+        Params:
+            path_data (str): The value of the d attribute.
+
+        Returns:
+            Iterator[tuple[str, tuple[float, ...]]]: The commands and their arguments.
+
+        Raises:
+            ValueError: If the path data contains an error.
+        """
+        position = 0
+        length = len(path_data)
+        command = None
+        while True:
+            match = COMMAND_PATTERN.match(path_data, position)
+            if match is not None:
+                command = match.group(1)
+                position = match.end()
+            elif END_PATTERN.match(path_data, position) is not None:
+                return
+            elif command is None or command in 'Zz':
+                raise ValueError(f'Expected a command at position {position}')
+
+            argument_count = ARGUMENT_COUNTS[command.upper()]
+            if argument_count == 0:
+                yield command, ()
+                continue
+
+            arguments = []
+            for i in range(argument_count):
+                # The large arc and sweep flags can be written without any separator
+                pattern = FLAG_PATTERN if command in 'Aa' and i in (3, 4) else NUMBER_PATTERN
+                number = pattern.match(path_data, position)
+                if number is None:
+                    raise ValueError(f'Expected a number at position {min(position, length)}')
+                arguments.append(float(number.group(1)))
+                position = number.end()
+            yield command, tuple(arguments)
+
+            # The coordinates that follow a moveto are implicit linetos
+            if command == 'M':
+                command = 'L'
+            elif command == 'm':
+                command = 'l'
+
+
+class _SubpathBuilder:
+    """
+    Applies the path commands and collects the resulting subpaths.
+    """
+    def __init__(self):
+        self.subpaths: list[SvgSubpath] = []
+        self.points: list[tuple[float, float]] = []
+        self.verbs: list[str] = []
+        self.current = (0.0, 0.0)
+        self.start = (0.0, 0.0)
+        # The control point reflected by the smooth curve commands and the command that set it
+        self.last_control: Optional[tuple[float, float]] = None
+        self.last_command = ''
+
+    def apply(self, command: str, arguments: tuple[float, ...]):
+        upper = command.upper()
+        relative = command != upper
+        x0, y0 = self.current
+
+        def point(x: float, y: float) -> tuple[float, float]:
+            return (x0 + x, y0 + y) if relative else (x, y)
+
+        last_control, self.last_control = self.last_control, None
+        last_command, self.last_command = self.last_command, upper
+
+        if upper == 'M':
+            self.__end_subpath(False)
+            self.current = self.start = point(*arguments)
+        elif upper == 'Z':
+            self.__end_subpath(True)
+            self.current = self.start
+        elif upper == 'L':
+            self.__line_to(point(*arguments))
+        elif upper == 'H':
+            self.__line_to((x0 + arguments[0] if relative else arguments[0], y0))
+        elif upper == 'V':
+            self.__line_to((x0, y0 + arguments[0] if relative else arguments[0]))
+        elif upper in 'CS':
+            if upper == 'C':
+                control1 = point(arguments[0], arguments[1])
+                control2, end = point(arguments[2], arguments[3]), point(arguments[4], arguments[5])
+            else:
+                control1 = self.__reflect(last_control if last_command in 'CS' else None)
+                control2, end = point(arguments[0], arguments[1]), point(arguments[2], arguments[3])
+            self.__curve_to(control1, control2, end)
+            self.last_control = control2
+        elif upper in 'QT':
+            if upper == 'Q':
+                control, end = point(arguments[0], arguments[1]), point(arguments[2], arguments[3])
+            else:
+                control, end = self.__reflect(last_control if last_command in 'QT' else None), point(*arguments)
+            # A quadratic curve is exactly the cubic curve with these control points
+            self.__curve_to(
+                (x0 + 2 / 3 * (control[0] - x0), y0 + 2 / 3 * (control[1] - y0)),
+                (end[0] + 2 / 3 * (control[0] - end[0]), end[1] + 2 / 3 * (control[1] - end[1])),
+                end
+            )
+            self.last_control = control
+        elif upper == 'A':
+            rx, ry, rotation, large_arc, sweep = arguments[:5]
+            self.__arc_to(rx, ry, rotation, bool(large_arc), bool(sweep), point(arguments[5], arguments[6]))
+
+    def finish(self) -> tuple[SvgSubpath, ...]:
+        self.__end_subpath(False)
+        return tuple(self.subpaths)
+
+    def __reflect(self, control: Optional[tuple[float, float]]) -> tuple[float, float]:
+        x0, y0 = self.current
+        if control is None:
+            return x0, y0
+        return 2 * x0 - control[0], 2 * y0 - control[1]
+
+    def __begin_segment(self):
+        if not self.points:
+            self.points.append(self.current)
+
+    def __line_to(self, end: tuple[float, float]):
+        self.__begin_segment()
+        self.points.append(end)
+        self.verbs.append('L')
+        self.current = end
+
+    def __curve_to(self, control1: tuple[float, float], control2: tuple[float, float], end: tuple[float, float]):
+        self.__begin_segment()
+        self.points.extend((control1, control2, end))
+        self.verbs.append('C')
+        self.current = end
+
+    def __arc_to(
+            self,
+            rx: float,
+            ry: float,
+            rotation: float,
+            large_arc: bool,
+            sweep: bool,
+            end: tuple[float, float]
+    ):
+        """
+        Converts an elliptical arc into cubic curves of at most 90 degrees each, following the
+        endpoint to center conversion of the SVG specification.
+        """
+        x1, y1 = self.current
+        x2, y2 = end
+        if (x1, y1) == (x2, y2):
+            return
+        rx, ry = abs(rx), abs(ry)
+        if rx == 0 or ry == 0:
+            self.__line_to(end)
+            return
+
+        phi = math.radians(rotation % 360)
+        cos_phi, sin_phi = math.cos(phi), math.sin(phi)
+        dx, dy = (x1 - x2) / 2, (y1 - y2) / 2
+        x1p = cos_phi * dx + sin_phi * dy
+        y1p = -sin_phi * dx + cos_phi * dy
+
+        # The radii are scaled up when they are too small to join the two points
+        radii_scale = (x1p * x1p) / (rx * rx) + (y1p * y1p) / (ry * ry)
+        if radii_scale > 1:
+            rx *= math.sqrt(radii_scale)
+            ry *= math.sqrt(radii_scale)
+
+        numerator = rx * rx * ry * ry - rx * rx * y1p * y1p - ry * ry * x1p * x1p
+        denominator = rx * rx * y1p * y1p + ry * ry * x1p * x1p
+        coefficient = math.sqrt(max(0.0, numerator / denominator))
+        if large_arc == sweep:
+            coefficient = -coefficient
+        cxp = coefficient * rx * y1p / ry
+        cyp = -coefficient * ry * x1p / rx
+        cx = cos_phi * cxp - sin_phi * cyp + (x1 + x2) / 2
+        cy = sin_phi * cxp + cos_phi * cyp + (y1 + y2) / 2
+
+        def angle(ux: float, uy: float, vx: float, vy: float) -> float:
+            return math.atan2(ux * vy - uy * vx, ux * vx + uy * vy)
+
+        theta = angle(1, 0, (x1p - cxp) / rx, (y1p - cyp) / ry)
+        delta = angle((x1p - cxp) / rx, (y1p - cyp) / ry, (-x1p - cxp) / rx, (-y1p - cyp) / ry)
+        if not sweep and delta > 0:
+            delta -= 2 * math.pi
+        elif sweep and delta < 0:
+            delta += 2 * math.pi
+
+        def ellipse_point(t: float) -> tuple[float, float]:
+            x, y = rx * math.cos(t), ry * math.sin(t)
+            return cos_phi * x - sin_phi * y + cx, sin_phi * x + cos_phi * y + cy
+
+        def ellipse_derivative(t: float) -> tuple[float, float]:
+            x, y = -rx * math.sin(t), ry * math.cos(t)
+            return cos_phi * x - sin_phi * y, sin_phi * x + cos_phi * y
+
+        segment_count = max(1, math.ceil(abs(delta) / (math.pi / 2) - 1e-9))
+        step = delta / segment_count
+        handle = 4 / 3 * math.tan(step / 4)
+        for i in range(segment_count):
+            t1 = theta + i * step
+            t2 = t1 + step
+            start_point, end_point = ellipse_point(t1), ellipse_point(t2)
+            derivative1, derivative2 = ellipse_derivative(t1), ellipse_derivative(t2)
+            if i == segment_count - 1:
+                end_point = end
+            self.__curve_to(
+                (start_point[0] + handle * derivative1[0], start_point[1] + handle * derivative1[1]),
+                (end_point[0] - handle * derivative2[0], end_point[1] - handle * derivative2[1]),
+                end_point
+            )
+
+    def __end_subpath(self, closed: bool):
+        if self.verbs:
+            if closed and self.points[-1] != self.points[0]:
+                self.points.append(self.points[0])
+                self.verbs.append('L')
+            self.subpaths.append(SvgSubpath(SvgPoints.from_pairs(self.points), ''.join(self.verbs), closed))
+        self.points = []
+        self.verbs = []
@@ -1,7 +1,36 @@
+import io
+import math
+import os
+import time
+from collections import Counter
+from typing import BinaryIO, Callable, Iterable, Iterator, Optional, Union
 from .converter import Converter
+from .svg_bounds import SvgBounds, SvgGridIndex
+from .svg_canvas_pool import SvgCanvasPool
 from .svg_deserialization import SvgDeserializedObject
-from .svg_utilitary import SvgUtility
-from PIL import Image, ImageDraw, ImageColor
+from .svg_encoding import DEFAULT_ENCODE_OPTIONS, SvgEncodeOptions, SvgImageEncoder
+from .svg_display_list import ShapeCompiler, SvgCompiler, SvgDisplayList, SvgShape
+from .svg_path import SvgSubpath
+from .svg_points import SvgPoints
+from .svg_profiler import SvgProfiler
+from .svg_sprite_cache import SvgSprite, SvgSpriteCache
+from .svg_transform import IDENTITY, SvgInstance, SvgTransform, ViewBox
+from PIL import Image, ImageDraw
+
+ShapeDrawer = Callable[[ImageDraw.ImageDraw, SvgShape], None]
+
+# The preserveAspectRatio of the documents that do not define a viewport, xMidYMid meet
+DEFAULT_ASPECT_RATIO = (0.5, 0.5, False)
+# The filters that downsample the supersampled images, and the number of output pixels
+# around each output pixel that they read
+ANTIALIASING_FILTERS = {'box': 0, 'lanczos': 3}
+# The height of the bands the supersampled images are drawn in, in supersampled pixels
+SUPERSAMPLED_BAND_HEIGHT = 256
+# The pixels drawn around a region and cropped away. Pillow truncates the negative coordinates of
+# the spans towards zero, so a shape that ends just before the edge of a canvas paints its first
+# column or row, which must not be kept. The padding is even, like the origin of the regions, so
+# the halves that Python rounds to even are rounded the same way as on the whole image
+REGION_PADDING = 8
 
 
 class SvgPngConverter(Converter):
@@ -9,257 +38,833 @@ class SvgPngConverter(Converter):
     A class that converts deserialized SVG objects into PNG images.
     It makes use of the Pillow library to draw the SVG objects onto an image.
 
+    The drawer of each kind of shape is looked up in a registry, so support for
+    new SVG elements can be added with `register_shape`.
+
+    A converter can be reused for many documents with `render`, which clears its canvas in
+    place instead of allocating a new one, and its canvases can come from a SvgCanvasPool
+    shared by the converters of a worker, so the sizes that come back are not allocated again.
+
     Attributes:
-        deserialized_objects (list[SvgDeserializedObject]): A list of SvgDeserializedObjects
-        that represent the SVG file to be converted.
+        deserialized_objects (Iterable[SvgDeserializedObject]): A list of SvgDeserializedObjects,
+        a lazy iterator such as `SvgDeserializer.iter_deserialize()` or a compiled SvgDisplayList
+        that represent the SVG file to be converted. An iterator is consumed by `convert`.
         output_dim (tuple[int, int]): The dimensions of the output image.
         output_file_path (str): The path to the file where the converted output will be saved.
+        crop (Optional[ViewBox]): The (min_x, min_y, width, height) region of the user space to be
+        rendered, or None to render the view box of the document.
+        antialiasing (int): The supersampling factor, 1 for aliased images, 2 or 4 for smoother
+        edges. The image is drawn larger one band at a time and downsampled with the
+        antialiasing filter, so the memory stays close to the size of the output image.
+        antialiasing_filter (str): The downsampling filter, box or lanczos.
+        profiler (Optional[SvgProfiler]): The profiler the conversion is recorded in, or None.
+        encode_options (SvgEncodeOptions): The format and the compression of the output image.
+        canvas_pool (Optional[SvgCanvasPool]): The pool the canvases come from, or None to allocate them.
+        verbose (bool): True to print a message when `convert` saved the image. The images of
+        `render` are returned without any message.
+        image (Image.Image): The canvas the SVG objects are drawn onto, which is the output image
+        once they are converted.
     """
     def __init__(
             self,
-            svg_deserialized_objects: list[SvgDeserializedObject],
+            svg_deserialized_objects: Optional[Iterable[SvgDeserializedObject]] = None,
             output_dim: tuple[int, int]=(500, 500),
-            output_file_path: str = 'output.png'
+            output_file_path: str = 'output.png',
+            crop: Optional[ViewBox] = None,
+            antialiasing: int = 1,
+            antialiasing_filter: str = 'box',
+            profiler: Optional[SvgProfiler] = None,
+            encode_options: SvgEncodeOptions = DEFAULT_ENCODE_OPTIONS,
+            canvas_pool: Optional[SvgCanvasPool] = None,
+            verbose: bool = True
     ):
         """
-        Initializes the SvgPngConverter with  SvgDeserializedObjects, output dimensions and an output file path.
+        Initializes the SvgPngConverter with  SvgDeserializedObjects, output dimensions, an output file path,
+        an optional region of the document to be cropped and the antialiasing quality.
 
         Params:
-            svg_deserialized_objects (list[SvgDeserializedObject]): A list of SvgDeserializedObjects
-            that represent the SVG file to be converted.
+            svg_deserialized_objects (Optional[Iterable[SvgDeserializedObject]]): A list of SvgDeserializedObjects,
+            a lazy iterator of them or a compiled SvgDisplayList that represent the SVG file to be converted,
+            or None for a converter that only renders the documents given to `render`, whose canvas
+            is acquired by the first render.
             output_dim (tuple[int, int]): The dimensions of the output image.
             output_file_path (str): The path to the file where the converted output will be saved.
+            crop (Optional[ViewBox]): The (min_x, min_y, width, height) region of the user space to be
+            rendered, or None to render the view box of the document.
+            antialiasing (int): The supersampling factor, 1 for aliased images, 2 or 4 for smoother edges.
+            antialiasing_filter (str): The downsampling filter, box or lanczos.
+            profiler (Optional[SvgProfiler]): If given, the time of the compilation, of the drawing of
+            every shape and of the encoding, and the size of the image, are recorded in it.
+            encode_options (SvgEncodeOptions): The format and the compression of the output image,
+            a PNG image with the default compression of Pillow by default.
+            canvas_pool (Optional[SvgCanvasPool]): The pool the canvases are acquired from and released
+            to, such as `default_canvas_pool`, or None to allocate every canvas.
+            verbose (bool): True to print a message when `convert` saved the image.
         """
+        SvgPngConverter.validate_antialiasing(antialiasing, antialiasing_filter)
+        SvgImageEncoder.validate(encode_options)
+        acquires_canvas = svg_deserialized_objects is not None
+        if svg_deserialized_objects is None:
+            svg_deserialized_objects = ()
         super().__init__(svg_deserialized_objects, output_file_path)
-        self.deserialized_objects: list[SvgDeserializedObject] = svg_deserialized_objects
+        self.deserialized_objects: Iterable[SvgDeserializedObject] = svg_deserialized_objects
         self.output_dim = output_dim
-        self.image = Image.new("RGBA", self.output_dim, "WHITE")
-        self.draw = ImageDraw.Draw(self.image)
+        self.crop = crop
+        self.antialiasing = antialiasing
+        self.antialiasing_filter = antialiasing_filter
+        self.profiler = profiler
+        self.encode_options = encode_options
+        self.canvas_pool = canvas_pool
+        self.verbose = verbose
+        self.image: Optional[Image.Image] = None
+        self.draw: Optional[ImageDraw.ImageDraw] = None
+        # Whether the canvas was drawn onto since it was cleared
+        self.__painted = False
+        if acquires_canvas:
+            self.__acquire_canvas()
+
+    def render(
+            self,
+            svg_deserialized_objects: Iterable[SvgDeserializedObject],
+            output_dim: Optional[tuple[int, int]] = None
+    ) -> Optional[bytes]:
+        """
+        Converts other deserialized SVG objects into an image with the same converter and returns it.
+        The canvas is cleared in place when the size does not change, otherwise it is exchanged for
+        a canvas of the new size, so `image` only holds the last image until the next render.
+        Nothing is printed when the image is encoded, whatever `verbose` is, so the converters of
+        the worker threads do not need to redirect the output of the process.
+
+        Params:
+            svg_deserialized_objects (Iterable[SvgDeserializedObject]): A list of SvgDeserializedObjects,
+            a lazy iterator of them or a compiled SvgDisplayList that represent the SVG file to be converted.
+            output_dim (Optional[tuple[int, int]]): The dimensions of the output image, or None to keep them.
+
+        Returns:
+            Optional[bytes]: The encoded image, or None if it could not be encoded.
+        """
+        self.deserialized_objects = svg_deserialized_objects
+        if output_dim is not None and tuple(output_dim) != tuple(self.output_dim):
+            self.release()
+            self.output_dim = output_dim
+        if self.image is None:
+            self.__acquire_canvas()
+        elif self.__painted:
+            self.image.paste((255, 255, 255, 255), (0, 0, self.image.width, self.image.height))
+            self.__painted = False
+        output = io.BytesIO()
+        if not self.__convert_to(output, False):
+            return None
+        return output.getvalue()
+
+    def release(self):
+        """
+        Gives the canvas back to the canvas pool, if there is one. The image must not be used
+        afterwards, and the next render acquires a new canvas.
+        """
+        if self.image is None:
+            return
+        if self.canvas_pool is not None:
+            self.canvas_pool.release(self.image, self.draw)
+        self.image = None
+        self.draw = None
+
+    def __acquire_canvas(self):
+        if self.canvas_pool is not None:
+            self.image, self.draw = self.canvas_pool.acquire(self.output_dim)
+        else:
+            self.image = Image.new("RGBA", self.output_dim, "WHITE")
+            self.draw = ImageDraw.Draw(self.image)
+        self.__painted = False
+
+    @staticmethod
+    def register_shape(tag_name: str, compiler: ShapeCompiler, drawer: ShapeDrawer = None):
+        """
+        Registers the support for a new SVG element, or replaces the support for an existing one.
+
+        Params:
+            tag_name (str): The tag name of the SVG element, which is also the kind of the shapes
+            returned by its compiler.
+            compiler (ShapeCompiler): A function that receives a SvgDeserializedObject and returns
+            its SvgShape, or None if the object cannot be drawn.
+            drawer (ShapeDrawer): A function that receives the ImageDraw of the image and a SvgShape
+            of this kind and draws it. It can be omitted when the compiler returns shapes of a kind
+            that can already be drawn.
+        """
+        SvgCompiler.register(tag_name, compiler)
+        if drawer is not None:
+            SvgPngConverter._drawers[tag_name] = drawer
+
+    @classmethod
+    def convert_sizes(
+            cls,
+            svg_deserialized_objects: Iterable[SvgDeserializedObject],
+            output_dims: Iterable[tuple[int, int]]
+    ) -> dict[tuple[int, int], Optional[bytes]]:
+        """
+        Converts the same deserialized SVG objects into PNG images of several sizes.
+        The objects are compiled a single time and every size is drawn natively.
+
+        Params:
+            svg_deserialized_objects (Iterable[SvgDeserializedObject]): A list of SvgDeserializedObjects,
+            a lazy iterator of them or a compiled SvgDisplayList that represent the SVG file to be converted.
+            output_dims (Iterable[tuple[int, int]]): The dimensions of the output images.
+
+        Returns:
+            dict[tuple[int, int], Optional[bytes]]: The PNG image of each size, or None if it could not be encoded.
+        """
+        if isinstance(svg_deserialized_objects, SvgDisplayList):
+            display_list = svg_deserialized_objects
+        else:
+            display_list = SvgDisplayList.compile(svg_deserialized_objects)
+        return {output_dim: cls(display_list, output_dim).convert_to_bytes() for output_dim in output_dims}
+
+    @staticmethod
+    def place_shapes(
+            svg_deserialized_objects: Iterable[SvgDeserializedObject],
+            output_dim: tuple[int, int],
+            unknown_tags: Counter,
+            crop: Optional[ViewBox] = None,
+            antialiasing: int = 1
+    ) -> Iterator[tuple[ShapeDrawer, SvgShape]]:
+        """
+        Lazily compiles the objects, unless they are an already compiled SvgDisplayList, and maps
+        every shape from the user space onto the pixels of the output image.
+
+        The viewBox, or the width and height, of the root svg element is mapped onto the output
+        dimensions with a single transform, so the geometry is drawn natively at any resolution.
+        The shapes that lie entirely outside of the image are skipped. For a display list,
+        only the shapes found by its spatial index in the visible region are even looked at.
+
+        Params:
+            svg_deserialized_objects (Iterable[SvgDeserializedObject]): A list of SvgDeserializedObjects,
+            a lazy iterator of them or a compiled SvgDisplayList that represent the SVG file.
+            output_dim (tuple[int, int]): The dimensions of the output image.
+            unknown_tags (Counter): The counter of the elements that cannot be drawn, for each tag name.
+            crop (Optional[ViewBox]): The (min_x, min_y, width, height) region of the user space
+            to be rendered instead of the view box of the document, with its preserveAspectRatio.
+            antialiasing (int): The supersampling factor, the shapes are placed onto an image
+            that many times larger than the output dimensions.
+
+        Returns:
+            Iterator[tuple[ShapeDrawer, SvgShape]]: The drawer of every shape and the shape in pixels.
+        """
+        if isinstance(svg_deserialized_objects, SvgDisplayList):
+            unknown_tags.update(svg_deserialized_objects.unknown_tags)
+            shapes = SvgPngConverter.__query_visible(svg_deserialized_objects, output_dim, crop)
+        else:
+            shapes = SvgCompiler.iter_compile(svg_deserialized_objects, unknown_tags)
+
+        drawers = SvgPngConverter._drawers
+        canvas = (0, 0, output_dim[0] * antialiasing - 1, output_dim[1] * antialiasing - 1)
+        supersampling = SvgTransform.scaling(antialiasing)
+        transform: Optional[SvgTransform] = None if antialiasing == 1 else supersampling
+        if crop is not None:
+            transform = supersampling.multiply(SvgTransform.for_viewport(crop, DEFAULT_ASPECT_RATIO, output_dim))
+        viewport_resolved = False
+        for shape in shapes:
+            if shape.kind == 'svg':
+                # Only the viewport of the root element maps the document onto the image
+                if not viewport_resolved:
+                    view_box, aspect_ratio = shape.geometry
+                    viewport = SvgTransform.for_viewport(crop or view_box, aspect_ratio, output_dim)
+                    transform = supersampling.multiply(viewport)
+                    if transform.is_identity:
+                        transform = None
+                    viewport_resolved = True
+                continue
+
+            drawer = drawers.get(shape.kind)
+            if drawer is None:
+                unknown_tags[shape.kind] += 1
+                continue
+            if transform is not None:
+                shape = transform.apply(shape)
+            bounds = SvgBounds.of_shape(shape)
+            if bounds is None or not SvgBounds.intersects(bounds, canvas):
+                continue
+            yield drawer, shape
+
+    @staticmethod
+    def __query_visible(
+            display_list: SvgDisplayList,
+            output_dim: tuple[int, int],
+            crop: Optional[ViewBox]
+    ) -> list[SvgShape]:
+        """
+        Finds the shapes of a display list that may be visible, with its spatial index. The image
+        is mapped back into the user space with the transform of the root viewport, and widened
+        by the widest stroke and the rounding of the pixels.
+        """
+        viewport = next((shape for shape in display_list if shape.kind == 'svg'), None)
+        view_box, aspect_ratio = viewport.geometry if viewport is not None else (None, DEFAULT_ASPECT_RATIO)
+        view_box = crop or view_box
+        transform = IDENTITY if view_box is None else SvgTransform.for_viewport(view_box, aspect_ratio, output_dim)
+
+        index = display_list.index
+        scale = min(transform.a, transform.d)
+        margin = (index.max_stroke_width * transform.stroke_scale / 2 + 3) / scale
+        left, top = (-transform.e) / transform.a, (-transform.f) / transform.d
+        right = (output_dim[0] - transform.e) / transform.a
+        bottom = (output_dim[1] - transform.f) / transform.d
+        return display_list.query((left - margin, top - margin, right + margin, bottom + margin))
+
+    @staticmethod
+    def paint(
+            image: Image.Image,
+            draw: ImageDraw.ImageDraw,
+            drawer: ShapeDrawer,
+            shape: SvgShape,
+            sprites: Optional[SvgSpriteCache] = None
+    ):
+        """
+        Paints a shape onto an RGBA image, blending its translucent colors with the pixels below.
+
+        Pillow replaces the pixels it draws instead of blending them, so the opaque colors are
+        drawn directly while a translucent fill or stroke is drawn onto a transparent layer that
+        only covers the bounding box of the shape, which is then composited onto the image.
+        The fill and the stroke are painted one after the other, like SVG does, so a translucent
+        stroke is blended over the fill.
+
+        The instances of use elements that are only translated and scaled are rasterized once
+        into a sprite of the cache, which is then composited for every instance.
+
+        Params:
+            image (Image.Image): The RGBA image.
+            draw (ImageDraw.ImageDraw): The drawing interface of the image.
+            drawer (ShapeDrawer): The drawer of the kind of the shape.
+            shape (SvgShape): The shape, in the pixels of the image.
+            sprites (Optional[SvgSpriteCache]): The sprites of the instances, or None to draw
+            every instance shape by shape.
+        """
+        if isinstance(shape.geometry, SvgInstance):
+            SvgPngConverter.__paint_instance(image, draw, shape.geometry, sprites)
+            return
+
+        fill, stroke = shape.fill, shape.stroke
+        if fill is None and stroke is None:
+            return
+        if (fill is None or fill[3] == 255) and (stroke is None or stroke[3] == 255):
+            drawer(draw, shape)
+            return
+
+        if fill is not None and stroke is not None:
+            passes = (shape._replace(stroke=None), shape._replace(fill=None))
+        else:
+            passes = (shape,)
+        for painted in passes:
+            color = painted.fill if painted.fill is not None else painted.stroke
+            if color[3] == 255:
+                drawer(draw, painted)
+            elif color[3] > 0:
+                SvgPngConverter.__composite(image, drawer, painted)
+
+    @staticmethod
+    def __paint_instance(
+            image: Image.Image,
+            draw: ImageDraw.ImageDraw,
+            instance: SvgInstance,
+            sprites: Optional[SvgSpriteCache]
+    ):
+        """
+        Paints the shapes of an instance. The sprite of an instance is rasterized with the fraction
+        of a pixel of its translation, from geometry snapped like the drawers snap it, so moving it by
+        the whole pixels gives the pixels of drawing the shapes in place.
+        """
+        transform = instance.transform
+        drawers = SvgPngConverter._drawers
+        if sprites is None or not transform.is_axis_aligned:
+            for shape in instance.shapes:
+                shape = SvgCompiler.transform_shape(shape, transform)
+                SvgPngConverter.paint(image, draw, drawers[shape.kind], shape, sprites)
+            return
+
+        x, y = math.floor(transform.e), math.floor(transform.f)
+        offset = transform._replace(e=transform.e - x, f=transform.f - y)
+        sprite = sprites.get(instance.shapes, offset)
+        if sprite is None:
+            sprite = SvgPngConverter.__rasterize_sprite(instance.shapes, offset, sprites)
+            if sprite is None:
+                # The instance is too large to be worth a sprite
+                for shape in instance.shapes:
+                    shape = SvgCompiler.transform_shape(shape, transform)
+                    SvgPngConverter.paint(image, draw, drawers[shape.kind], shape, sprites)
+                return
+            sprites.put(instance.shapes, offset, sprite)
+
+        # Only the part of the sprite inside the image is composited
+        left, top = x + sprite.left, y + sprite.top
+        source = (
+            max(0, -left),
+            max(0, -top),
+            min(sprite.image.width, image.width - left),
+            min(sprite.image.height, image.height - top)
+        )
+        if source[0] < source[2] and source[1] < source[3]:
+            image.alpha_composite(sprite.image, (left + source[0], top + source[1]), source)
+
+    @staticmethod
+    def __rasterize_sprite(
+            shapes: tuple[SvgShape, ...],
+            transform: SvgTransform,
+            sprites: SvgSpriteCache
+    ) -> Optional[SvgSprite]:
+        """
+        Draws the transformed shapes of a referenced element onto a transparent image the size of
+        their bounding box, or returns None if the image would be larger than the sprite cache.
+        """
+        placed = [SvgPngConverter.snap_to_pixels(SvgCompiler.transform_shape(shape, transform)) for shape in shapes]
+        bounds = SvgBounds.union_all(SvgBounds.of_shape(shape) for shape in placed)
+        if bounds is None:
+            return SvgSprite(Image.new('RGBA', (1, 1), (0, 0, 0, 0)), 0, 0)
+        left, top = math.floor(bounds[0]), math.floor(bounds[1])
+        width, height = math.floor(bounds[2]) + 1 - left, math.floor(bounds[3]) + 1 - top
+        if width * height > sprites.max_pixels:
+            return None
+
+        layer = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(layer)
+        translation = SvgTransform.translation(-left, -top)
+        drawers = SvgPngConverter._drawers
+        for shape in placed:
+            shape = translation.apply(shape)
+            SvgPngConverter.paint(layer, draw, drawers[shape.kind], shape, sprites)
+        return SvgSprite(layer, left, top)
+
+    @staticmethod
+    def __composite(image: Image.Image, drawer: ShapeDrawer, shape: SvgShape):
+        """
+        Draws a shape onto a transparent layer the size of its bounding box and composites the
+        layer onto the image, so the cost follows the area of the shape instead of the image.
+        """
+        bounds = SvgBounds.of_shape(shape)
+        if bounds is None:
+            return
+        left, top = max(0, math.floor(bounds[0])), max(0, math.floor(bounds[1]))
+        right, bottom = min(image.width, math.floor(bounds[2]) + 1), min(image.height, math.floor(bounds[3]) + 1)
+        if left >= right or top >= bottom:
+            return
+
+        layer = Image.new('RGBA', (right - left, bottom - top), (0, 0, 0, 0))
+        # The geometry is snapped before it is moved, so the layer gets the pixels of the image
+        shape = SvgTransform.translation(-left, -top).apply(SvgPngConverter.snap_to_pixels(shape))
+        drawer(ImageDraw.Draw(layer), shape)
+        image.alpha_composite(layer, (left, top))
+
+    @staticmethod
+    def snap_to_pixels(shape: SvgShape) -> SvgShape:
+        """
+        Flattens the curves of a shape and snaps its geometry onto the pixels, as the drawers do.
+        Moving the snapped geometry by whole pixels then draws the same pixels at another place,
+        which lets the shapes be drawn onto tiles or layers that do not start at the origin.
+        The instances are left as they are, since their sprites are snapped when they are drawn.
 
-    def convert(self):
+        Params:
+            shape (SvgShape): The shape, in pixels.
+
+        Returns:
+            SvgShape: The shape with integer coordinates.
+        """
+        return shape._replace(geometry=SvgPngConverter.__snap_geometry(shape.geometry))
+
+    @staticmethod
+    def __snap_geometry(geometry):
+        if SvgPoints.is_points(geometry):
+            return SvgPoints.snap(geometry)
+        if isinstance(geometry, SvgInstance):
+            return geometry
+        if isinstance(geometry, SvgSubpath):
+            points = SvgPoints.snap(geometry.flatten())
+            return SvgSubpath(points, 'L' * (len(points) - 1), geometry.closed)
+        if not geometry:
+            return geometry
+        if isinstance(geometry[0], tuple) or SvgPoints.is_points(geometry[0]):
+            return tuple(SvgPngConverter.__snap_geometry(part) for part in geometry)
+        return tuple(float(math.floor(value)) for value in geometry)
+
+    @staticmethod
+    def report_unknown_tags(unknown_tags: Counter):
+        """
+        Reports the elements that could not be drawn, once for each tag name.
+
+        Params:
+            unknown_tags (Counter): The number of elements that could not be drawn, for each tag name.
+        """
+        if unknown_tags:
+            skipped = ', '.join(f'{tag_name} ({count})' for tag_name, count in unknown_tags.most_common())
+            print(f'Skipped unknown tag names: {skipped}')
+
+    def convert(self) -> bool:
         """
         Converts the deserialized SVG objects into a PNG image and saves it to the specified output file path.
+
+        Returns:
+            bool: True if the image was saved, False otherwise.
         """
-        for svg_deserialized_object in self.deserialized_objects:
-            if svg_deserialized_object.tag_name == 'svg':
-                print('Drawing svg...')
-            elif svg_deserialized_object.tag_name == 'rect':
-                self.__draw_rect(svg_deserialized_object)
-            elif svg_deserialized_object.tag_name == 'circle':
-                self.__draw_circle(svg_deserialized_object)
-            elif svg_deserialized_object.tag_name == 'ellipse':
-                self.__draw_ellipse(svg_deserialized_object)
-            elif svg_deserialized_object.tag_name == 'line':
-                self.__draw_line(svg_deserialized_object)
-            elif svg_deserialized_object.tag_name == 'polyline':
-                self.__draw_polyline(svg_deserialized_object)
-            elif svg_deserialized_object.tag_name == 'path':
-                self.__draw_path(svg_deserialized_object)
-            else:
-                print(f'Unknown tag name: {svg_deserialized_object.tag_name}')
+        return self.convert_to(self.output_file_path)
+
+    def convert_to_bytes(self) -> Optional[bytes]:
+        """
+        Converts the deserialized SVG objects into a PNG image and returns it, without writing any file.
+
+        Returns:
+            Optional[bytes]: The PNG image, or None if it could not be encoded.
+        """
+        output = io.BytesIO()
+        if not self.convert_to(output):
+            return None
+        return output.getvalue()
+
+    def convert_to(self, output: Union[str, BinaryIO]) -> bool:
+        """
+        Converts the deserialized SVG objects into a PNG image, or the image format of the encode
+        options, and saves it to a file path or writes it to a binary file object, such as the body
+        of a http response.
+        The objects are compiled into SvgShapes on the fly, unless an already compiled
+        SvgDisplayList was given, see `place_shapes`. The elements that cannot be drawn are
+        reported once, at the end. With a profiler, the compile, draw and encode phases are timed,
+        and every shape is timed unless the image is supersampled, since those are drawn by bands.
+
+        Params:
+            output (Union[str, BinaryIO]): The path to the output file or a binary file object.
+
+        Returns:
+            bool: True if the image was saved, False otherwise.
+        """
+        return self.__convert_to(output, self.verbose)
+
+    def __convert_to(self, output: Union[str, BinaryIO], verbose: bool) -> bool:
+        if self.image is None:
+            self.__acquire_canvas()
+        self.__painted = True
+        unknown_tags = Counter()
+        shapes = SvgPngConverter.place_shapes(
+            self.deserialized_objects,
+            self.output_dim,
+            unknown_tags,
+            self.crop,
+            self.antialiasing
+        )
+        profiler = self.profiler
+        if profiler is None:
+            self.__draw(shapes)
+        else:
+            with profiler.phase('draw'):
+                self.__draw(profiler.iter_phase('compile', shapes))
+        SvgPngConverter.report_unknown_tags(unknown_tags)
+
+        if profiler is None:
+            return self.__save(output, verbose)
+        with profiler.phase('encode'):
+            # A file path is overwritten, while a file object is appended to
+            start = 0 if isinstance(output, str) else SvgPngConverter.__output_size(output)
+            saved = self.__save(output, verbose)
+        end = SvgPngConverter.__output_size(output)
+        if saved and start is not None and end is not None:
+            profiler.record_bytes(end - start)
+        return saved
+
+    def __draw(self, shapes: Iterable[tuple[ShapeDrawer, SvgShape]]):
+        """
+        Paints the placed shapes onto the image, timing every shape when there is a profiler.
+        """
+        if self.antialiasing != 1:
+            self.__draw_supersampled(shape for _, shape in shapes)
+            return
+        sprites = SvgSpriteCache()
+        profiler = self.profiler
+        if profiler is None:
+            for drawer, shape in shapes:
+                SvgPngConverter.paint(self.image, self.draw, drawer, shape, sprites)
+            return
+        for drawer, shape in shapes:
+            start = time.perf_counter()
+            SvgPngConverter.paint(self.image, self.draw, drawer, shape, sprites)
+            profiler.record_draw(shape, time.perf_counter() - start)
+
+    def __save(self, output: Union[str, BinaryIO], verbose: bool) -> bool:
         try:
-            self.image.save(self.output_file_path)
-            print('Image saved successfully')
+            SvgImageEncoder.encode(self.image, output, self.encode_options)
+            if verbose:
+                print('Image saved successfully')
+            return True
         except Exception as e:
             print(f'Could not save the image: {e}')
+            return False
 
-    def __draw_rect(self, rect_object: SvgDeserializedObject):
+    @staticmethod
+    def __output_size(output: Union[str, BinaryIO]) -> Optional[int]:
+        """
+        Returns the size of an output file, or the position of a binary file object, or None
+        if it cannot be known, such as for a pipe.
+        """
+        try:
+            if isinstance(output, str):
+                return os.path.getsize(output)
+            return output.tell()
+        except (OSError, AttributeError):
+            return None
+
+    def __draw_supersampled(self, shapes: Iterable[SvgShape]):
+        """
+        Draws the supersampled shapes one band at a time, downsampling every band into the image.
+        The shapes are binned into the bands with a grid index, so each band only draws its own.
+        """
+        antialiasing = self.antialiasing
+        width, height = self.output_dim
+        band_height = max(1, SUPERSAMPLED_BAND_HEIGHT // antialiasing)
+        margin = SvgPngConverter.antialiasing_margin(antialiasing, self.antialiasing_filter)
+
+        index = SvgGridIndex(band_height * antialiasing)
+        sprites = SvgSpriteCache()
+        snapped: list[SvgShape] = []
+        for shape in shapes:
+            shape = SvgPngConverter.snap_to_pixels(shape)
+            bounds = SvgBounds.of_shape(shape)
+            if bounds is not None:
+                index.insert(len(snapped), bounds)
+                snapped.append(shape)
+
+        for top in range(0, height, band_height):
+            rows = min(band_height, height - top)
+            region = (0, top * antialiasing - margin, width * antialiasing, (top + rows) * antialiasing + margin)
+            band_shapes = [snapped[i] for i in index.query(region)]
+            band = SvgPngConverter.render_region(
+                band_shapes,
+                (0, top, width, rows),
+                self.output_dim,
+                antialiasing,
+                self.antialiasing_filter,
+                sprites
+            )
+            self.image.paste(band, (0, top))
+
+    @staticmethod
+    def validate_antialiasing(antialiasing: int, antialiasing_filter: str):
+        """
+        Raises an exception if the antialiasing factor or filter are not supported.
+        """
+        if not isinstance(antialiasing, int) or antialiasing < 1:
+            raise Exception('The antialiasing must be a positive integer, such as 1, 2 or 4')
+        if antialiasing_filter not in ANTIALIASING_FILTERS:
+            raise Exception(f'Unknown antialiasing filter: {antialiasing_filter}')
+
+    @staticmethod
+    def antialiasing_margin(antialiasing: int, antialiasing_filter: str) -> int:
+        """
+        Returns the number of supersampled pixels around a region that its downsampling reads.
+        """
+        if antialiasing == 1:
+            return 0
+        return ANTIALIASING_FILTERS[antialiasing_filter] * antialiasing
+
+    @staticmethod
+    def render_region(
+            shapes: Iterable[SvgShape],
+            region: tuple[int, int, int, int],
+            output_dim: tuple[int, int],
+            antialiasing: int = 1,
+            antialiasing_filter: str = 'box',
+            sprites: Optional[SvgSpriteCache] = None
+    ) -> Image.Image:
         """
-        Draws a rectangle on the image using the attributes of the SvgDeserializedObject.
+        Draws the shapes onto a region of the output image, such as a tile or a band, which gives
+        the same pixels as drawing the whole image. The region is drawn with a padding that is
+        cropped away, except along the edges of the image, whose canvas starts there too.
+        With antialiasing, the region is drawn supersampled, together with the margin read by
+        the filter, and downsampled, which gives the same pixels as downsampling the whole image.
 
         Params:
-            rect_object (SvgDeserializedObject): The object from which the attributes will be extracted
-            in order to draw the rectangle.
-        """
-        x = SvgUtility.get_float(rect_object, 'x', default=0)
-        y = SvgUtility.get_float(rect_object, 'y', default=0)
-        width = SvgUtility.get_float(rect_object, 'width', default=0)
-        height = SvgUtility.get_float(rect_object, 'height', default=0)
-        stroke_width = SvgUtility.get_int(rect_object, 'stroke-width', default=1)
-
-        stroke = SvgUtility.process_color_and_opacity(rect_object, 'stroke')
-        fill = SvgUtility.process_color_and_opacity(
-            rect_object,
-            'fill',
-            default_color='none'
+            shapes (Iterable[SvgShape]): The shapes snapped onto the supersampled pixels of the whole
+            image, see `snap_to_pixels`, in drawing order.
+            region (tuple[int, int, int, int]): The left, top, width and height of the region in output pixels.
+            output_dim (tuple[int, int]): The dimensions of the output image.
+            antialiasing (int): The supersampling factor of the shapes.
+            antialiasing_filter (str): The downsampling filter, box or lanczos.
+            sprites (Optional[SvgSpriteCache]): The sprites of the instances, which can be shared by
+            the regions of the same image. A new cache is used if it is not given.
+
+        Returns:
+            Image.Image: The RGBA image of the region.
+        """
+        left, top, width, height = region
+        margin = SvgPngConverter.antialiasing_margin(antialiasing, antialiasing_filter) + REGION_PADDING
+        x0 = max(0, (left * antialiasing - margin) // 2 * 2)
+        y0 = max(0, (top * antialiasing - margin) // 2 * 2)
+        x1 = min(output_dim[0] * antialiasing, (left + width) * antialiasing + margin)
+        y1 = min(output_dim[1] * antialiasing, (top + height) * antialiasing + margin)
+
+        image = Image.new('RGBA', (x1 - x0, y1 - y0), 'WHITE')
+        draw = ImageDraw.Draw(image)
+        translation = SvgTransform.translation(-x0, -y0)
+        drawers = SvgPngConverter._drawers
+        if sprites is None:
+            sprites = SvgSpriteCache()
+        for shape in shapes:
+            if x0 or y0:
+                shape = translation.apply(shape)
+            SvgPngConverter.paint(image, draw, drawers[shape.kind], shape, sprites)
+
+        box = (
+            left * antialiasing - x0,
+            top * antialiasing - y0,
+            (left + width) * antialiasing - x0,
+            (top + height) * antialiasing - y0
         )
+        if antialiasing_filter == 'lanczos' and antialiasing != 1:
+            return image.resize((width, height), Image.Resampling.LANCZOS, box=box)
+        image = image.crop(box)
+        return image if antialiasing == 1 else image.reduce(antialiasing)
 
-        bottom_right_x = x + width
-        bottom_right_y = y + height
+    @staticmethod
+    def __draw_rect(draw: ImageDraw.ImageDraw, rect: SvgShape):
+        """
+        Draws a rectangle on the image.
 
+        Params:
+            draw (ImageDraw.ImageDraw): The drawing interface of the image.
+            rect (SvgShape): The compiled rectangle, whose geometry is its bounding box.
+        """
         try:
-            self.draw.rectangle(
-                (x, y, bottom_right_x, bottom_right_y),
-                outline=stroke,
-                fill=fill,
-                width=stroke_width
+            draw.rectangle(
+                SvgPoints.to_pixels(rect.geometry),
+                outline=rect.stroke,
+                fill=rect.fill,
+                width=rect.stroke_width
             )
         except Exception as e:
             print(f"Could not draw the rectangle: {e}")
 
-    def __draw_circle(self, circle_object: SvgDeserializedObject):
+    @staticmethod
+    def __draw_circle(draw: ImageDraw.ImageDraw, circle: SvgShape):
         """
-        Draws a circle on the image using the attributes of the SvgDeserializedObject.
+        Draws a circle on the image.
 
         Params:
-            circle_object (SvgDeserializedObject): The object from which the attributes will be extracted
-            in order to draw the circle.
-        """
-        cx = SvgUtility.get_float(circle_object, 'cx', default=0)
-        cy = SvgUtility.get_float(circle_object, 'cy', default=0)
-        r = SvgUtility.get_float(circle_object, 'r', default=0)
-        stroke_width = SvgUtility.get_int(circle_object, 'stroke-width', default=1)
-
-        stroke = SvgUtility.process_color_and_opacity(circle_object, 'stroke')
-        fill = SvgUtility.process_color_and_opacity(
-            circle_object,
-            'fill',
-            default_color='none'
-        )
-
-        left = cx - r
-        top = cy - r
-        right = cx + r
-        bottom = cy + r
-
+            draw (ImageDraw.ImageDraw): The drawing interface of the image.
+            circle (SvgShape): The compiled circle, whose geometry is its bounding box.
+        """
         try:
-            self.draw.ellipse(
-                [left, top, right, bottom],
-                outline=stroke,
-                fill=fill,
-                width=stroke_width
+            draw.ellipse(
+                SvgPoints.to_pixels(circle.geometry),
+                outline=circle.stroke,
+                fill=circle.fill,
+                width=circle.stroke_width
             )
         except Exception as e:
             print(f"Could not draw the circle: {e}")
 
-    def __draw_ellipse(self, ellipse_object: SvgDeserializedObject):
+    @staticmethod
+    def __draw_ellipse(draw: ImageDraw.ImageDraw, ellipse: SvgShape):
         """
-        Draws an ellipse on the image using the attributes of the SvgDeserializedObject.
+        Draws an ellipse on the image.
 
         Params:
-            ellipse_object (SvgDeserializedObject): The object from which the attributes will be extracted
-            in order to draw the ellipse.
-        """
-        cx = SvgUtility.get_float(ellipse_object, 'cx', default=0)
-        cy = SvgUtility.get_float(ellipse_object, 'cy', default=0)
-        rx = SvgUtility.get_float(ellipse_object, 'rx', default=0)
-        ry = SvgUtility.get_float(ellipse_object, 'ry', default=0)
-        stroke_width = SvgUtility.get_int(ellipse_object, 'stroke-width', default=1)
-
-        stroke = SvgUtility.process_color_and_opacity(ellipse_object, 'stroke')
-        fill = SvgUtility.process_color_and_opacity(
-            ellipse_object,
-            'fill',
-            default_color='none'
-        )
-
-        left = cx - rx
-        top = cy - ry
-        right = cx + rx
-        bottom = cy + ry
-
+            draw (ImageDraw.ImageDraw): The drawing interface of the image.
+            ellipse (SvgShape): The compiled ellipse, whose geometry is its bounding box.
+        """
         try:
-            self.draw.ellipse(
-                [left, top, right, bottom],
-                outline=stroke,
-                fill=fill,
-                width=stroke_width
+            draw.ellipse(
+                SvgPoints.to_pixels(ellipse.geometry),
+                outline=ellipse.stroke,
+                fill=ellipse.fill,
+                width=ellipse.stroke_width
             )
         except Exception as e:
             print(f"Could not draw the ellipse: {e}")
 
-    def __draw_line(self, line_object: SvgDeserializedObject):
+    @staticmethod
+    def __draw_line(draw: ImageDraw.ImageDraw, line: SvgShape):
         """
-        Draws a line on the image using the attributes of the SvgDeserializedObject.
+        Draws a line on the image.
 
         Params:
-            line_object (SvgDeserializedObject): The object from which the attributes will be extracted
-            in order to draw the line.
+            draw (ImageDraw.ImageDraw): The drawing interface of the image.
+            line (SvgShape): The compiled line, whose geometry is its two end points.
         """
-        x1 = SvgUtility.get_float(line_object, 'x1', default=0)
-        y1 = SvgUtility.get_float(line_object, 'y1', default=0)
-        x2 = SvgUtility.get_float(line_object, 'x2', default=0)
-        y2 = SvgUtility.get_float(line_object, 'y2', default=0)
-        stroke_width = SvgUtility.get_int(line_object, 'stroke-width', default=1)
-        stroke = SvgUtility.process_color_and_opacity(line_object, 'stroke')
-
+        # Pillow would draw the lines without a color in white
+        if line.stroke is None:
+            return
         try:
-            self.draw.line(
-                [x1, y1, x2, y2],
-                fill=stroke,
-                width=stroke_width
+            draw.line(
+                SvgPoints.to_pixels(line.geometry),
+                fill=line.stroke,
+                width=line.stroke_width
             )
         except Exception as e:
             print(f"Could not draw the line: {e}")
 
-    def __draw_polyline(self, polyline_object: SvgDeserializedObject):
+    @staticmethod
+    def __draw_polyline(draw: ImageDraw.ImageDraw, polyline: SvgShape):
         """
-        Draws a polyline on the image using the attributes of the SvgDeserializedObject.
+        Draws a polyline on the image.
 
         Params:
-            polyline_object (SvgDeserializedObject): The object from which the attributes will be extracted
-            in order to draw the polyline.
+            draw (ImageDraw.ImageDraw): The drawing interface of the image.
+            polyline (SvgShape): The compiled polyline, whose geometry is its list of points.
         """
-        points = SvgUtility.get_string(polyline_object, 'points', default='')
-        stroke_width = SvgUtility.get_int(polyline_object, 'stroke-width', default=1)
-        stroke = SvgUtility.process_color_and_opacity(polyline_object, 'stroke')
-
+        if polyline.stroke is None:
+            return
         try:
-            polyline_points = []
-            for point in points.split():
-                x, y = map(float, point.split(','))
-                polyline_points.append((x, y))
-
-            if polyline_points:
-                self.draw.line(
-                    polyline_points,
-                    fill=stroke,
-                    width=stroke_width,
-                    joint='curve'
-                )
+            draw.line(
+                SvgPoints.to_pixels(polyline.geometry),
+                fill=polyline.stroke,
+                width=polyline.stroke_width,
+                joint='curve'
+            )
         except Exception as e:
             print(f"Could not draw the polyline: {e}")
 
-    def __draw_path(self, path_object: SvgDeserializedObject):
+    @staticmethod
+    def __draw_path(draw: ImageDraw.ImageDraw, path: SvgShape):
         """
-        Draws a path on the image using the attributes of the SvgDeserializedObject.
+        Draws a path on the image. Every subpath is flattened in pixels, so the curves get as many
+        segments as the output resolution requires. A closed subpath is drawn as a polygon in a
+        single call, an open one as a filled polygon and a line.
 
         Params:
-            path_object (SvgDeserializedObject): The object from which the attributes will be extracted
-            in order to draw the path.
-
-        Support:
-            Currently only supports the M and L commands as the other commands
-            cannot be drawn using the Pillow library.
-        """
-        path_data = SvgUtility.get_string(path_object, 'd', default='')
-        stroke_width = SvgUtility.get_int(path_object, 'stroke-width', default=1)
-        stroke = SvgUtility.process_color_and_opacity(path_object, 'stroke')
-
-        current_x, current_y = 0, 0
-
-        split_data = path_data.split()
-        command_segments = []
-        for i in range(len(split_data)):
-            if split_data[i] == 'M':
-                command_segments.append(('M', split_data[i + 1], split_data[i + 2]))
-            elif split_data[i] == 'L':
-                command_segments.append(('L', split_data[i + 1], split_data[i + 2]))
+            draw (ImageDraw.ImageDraw): The drawing interface of the image.
+            path (SvgShape): The compiled path, whose geometry is its list of subpaths.
+        """
         try:
-            for segment in command_segments:
-                if segment[0] == 'M':
-                    current_x = float(segment[1])
-                    current_y = float(segment[2])
-                elif segment[0] == 'L':
-                    end_x = float(segment[1])
-                    end_y = float(segment[2])
-                    self.draw.line(
-                        (current_x, current_y, end_x, end_y),
-                        fill=stroke,
-                        width=stroke_width
-                    )
-                    current_x, current_y = end_x, end_y
-        except ValueError as ve:
-            print(f"Could not process path attributes: {ve}")
+            for subpath in path.geometry:
+                points = SvgPoints.to_pixels(subpath.flatten())
+                if subpath.closed:
+                    draw.polygon(points, fill=path.fill, outline=path.stroke, width=path.stroke_width)
+                    continue
+                if path.fill is not None:
+                    draw.polygon(points, fill=path.fill)
+                if path.stroke is None:
+                    continue
+                draw.line(
+                    points,
+                    fill=path.stroke,
+                    width=path.stroke_width
+                )
         except Exception as e:
             print(f"Could not draw the path: {e}")
+
+    @staticmethod
+    def __draw_use(draw: ImageDraw.ImageDraw, use: SvgShape):
+        """
+        Draws the shapes of an instance on the image, one by one. The instances painted by
+        `paint` are blended and rasterized into reusable sprites instead.
+
+        Params:
+            draw (ImageDraw.ImageDraw): The drawing interface of the image.
+            use (SvgShape): The compiled instance, whose geometry is a SvgInstance.
+        """
+        instance = use.geometry
+        for shape in instance.shapes:
+            shape = SvgCompiler.transform_shape(shape, instance.transform)
+            SvgPngConverter._drawers[shape.kind](draw, shape)
+
+    _drawers: dict[str, ShapeDrawer] = {
+        'rect': __draw_rect,
+        'circle': __draw_circle,
+        'ellipse': __draw_ellipse,
+        'line': __draw_line,
+        'polyline': __draw_polyline,
+        'path': __draw_path,
+        'use': __draw_use,
+    }
@@ -0,0 +1,135 @@
+import math
+import re
+import warnings
+from typing import Sequence, Union
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# A list of points is a read-only (N, 2) float array when NumPy is installed,
+# otherwise a tuple of (x, y) tuples
+Points = Union['np.ndarray', tuple[tuple[float, float], ...]]
+
+NUMBER_PATTERN = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+
+
+class SvgPoints:
+    """
+    A class that provides static methods for parsing and transforming lists of points.
+
+    When NumPy is installed the points are parsed by NumPy and transformed with array
+    operations, so long polylines and paths do not cost a Python loop per vertex.
+    Otherwise the same operations are done with plain tuples.
+    """
+    @staticmethod
+    def parse(text: str) -> Points:
+        """
+        Parses a list of coordinates separated by whitespace and/or commas, such as the points
+        attribute of a polyline. A trailing coordinate without its pair is ignored.
+
+        Params:
+            text (str): The coordinates to be parsed.
+
+        Returns:
+            Points: The parsed points.
+        """
+        if np is not None:
+            coordinates = SvgPoints.__parse_with_numpy(text)
+        else:
+            coordinates = [float(number) for number in NUMBER_PATTERN.findall(text)]
+        return SvgPoints.from_coordinates(coordinates)
+
+    @staticmethod
+    def from_coordinates(coordinates: Sequence[float]) -> Points:
+        """
+        Builds a list of points from a flat sequence of coordinates (x1, y1, x2, y2, ...).
+
+        Params:
+            coordinates (Sequence[float]): The coordinates of the points.
+
+        Returns:
+            Points: The points.
+        """
+        count = len(coordinates) // 2
+        if np is not None:
+            points = np.asarray(coordinates, dtype=np.float64)[:count * 2].reshape(count, 2)
+            points.flags.writeable = False
+            return points
+        return tuple((float(coordinates[2 * i]), float(coordinates[2 * i + 1])) for i in range(count))
+
+    @staticmethod
+    def from_pairs(pairs: Sequence[tuple[float, float]]) -> Points:
+        """
+        Builds a list of points from a sequence of (x, y) pairs.
+        """
+        if np is not None:
+            points = np.array(pairs, dtype=np.float64).reshape(len(pairs), 2)
+            points.flags.writeable = False
+            return points
+        return tuple((float(x), float(y)) for x, y in pairs)
+
+    @staticmethod
+    def is_points(geometry) -> bool:
+        """
+        Returns True if the geometry is a NumPy array of points.
+        """
+        return np is not None and isinstance(geometry, np.ndarray)
+
+    @staticmethod
+    def transform(points: Points, a: float, b: float, c: float, d: float, e: float, f: float) -> Points:
+        """
+        Applies the affine transform (a, b, c, d, e, f) to every point.
+        """
+        if SvgPoints.is_points(points):
+            transformed = points @ np.array(((a, b), (c, d))) + (e, f)
+            transformed.flags.writeable = False
+            return transformed
+        return tuple((a * x + c * y + e, b * x + d * y + f) for x, y in points)
+
+    @staticmethod
+    def to_pillow(points: Points) -> list:
+        """
+        Converts the points into the flat list of coordinates drawn by Pillow in a single call.
+        """
+        if SvgPoints.is_points(points):
+            return points.ravel().tolist()
+        return list(points)
+
+    @staticmethod
+    def snap(points: Points) -> Points:
+        """
+        Moves the points onto the top left corner of the pixels that contain them.
+        """
+        if SvgPoints.is_points(points):
+            snapped = np.floor(points)
+            snapped.flags.writeable = False
+            return snapped
+        return tuple((float(math.floor(x)), float(math.floor(y))) for x, y in points)
+
+    @staticmethod
+    def to_pixels(points: Union[Points, Sequence[float]]) -> list[int]:
+        """
+        Converts the points, or a flat sequence of coordinates, into the flat list of the pixels
+        that contain them. Pillow truncates the coordinates itself, which rounds the negative ones
+        up, so snapping them down first draws the same pixels wherever the origin of the image is.
+        """
+        if SvgPoints.is_points(points):
+            return np.floor(points).astype(np.int64).ravel().tolist()
+        if points and isinstance(points[0], tuple):
+            return [math.floor(value) for point in points for value in point]
+        return [math.floor(value) for value in points]
+
+    @staticmethod
+    def __parse_with_numpy(text: str) -> 'np.ndarray':
+        """
+        Parses the coordinates with the C parser of NumPy, which is only possible when all of them
+        are separated. Compact forms such as "10-5" fall back to the regular expression.
+        """
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', DeprecationWarning)
+            try:
+                return np.fromstring(text.replace(',', ' '), sep=' ')
+            except (DeprecationWarning, ValueError):
+                return np.array(NUMBER_PATTERN.findall(text), dtype=np.float64)
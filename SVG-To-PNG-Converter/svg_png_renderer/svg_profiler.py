@@ -0,0 +1,195 @@
+import heapq
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterable, Iterator, NamedTuple, Optional, TypeVar
+from .svg_bounds import SvgBounds
+from .svg_display_list import SvgShape
+
+T = TypeVar('T')
+
+
+class SlowShape(NamedTuple):
+    """
+    A shape that took long to be painted.
+
+    Attributes:
+        seconds (float): The time spent painting the shape.
+        index (int): The position of the shape in the drawing order of the painted shapes.
+        kind (str): The kind of the shape.
+        bounds (Optional[tuple[float, float, float, float]]): The bounding box of the shape, in pixels.
+    """
+    seconds: float
+    index: int
+    kind: str
+    bounds: Optional[tuple[float, float, float, float]]
+
+
+class ProfileStats(NamedTuple):
+    """
+    The measurements of a SvgProfiler.
+
+    The time of every phase excludes the time of the phases nested in it, so the deserialization
+    that is streamed while the shapes are compiled and drawn is only counted once.
+
+    Attributes:
+        phase_seconds (dict[str, float]): The wall time of every phase, such as parse, compile, draw and encode.
+        tag_counts (dict[str, int]): The number of deserialized elements of every tag name.
+        draw_counts (dict[str, int]): The number of painted shapes of every kind.
+        draw_seconds (dict[str, float]): The cumulative time spent painting the shapes of every kind.
+        slowest (list[SlowShape]): The shapes that took the longest to be painted, slowest first.
+        bytes_written (int): The size of the encoded image.
+    """
+    phase_seconds: dict[str, float]
+    tag_counts: dict[str, int]
+    draw_counts: dict[str, int]
+    draw_seconds: dict[str, float]
+    slowest: list[SlowShape]
+    bytes_written: int
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(self.phase_seconds.values())
+
+    def format(self) -> str:
+        """
+        Returns a human readable report of the measurements.
+        """
+        lines = [f'Total: {self.total_seconds * 1000:.1f} ms, {self.bytes_written} bytes written']
+        for phase, seconds in self.phase_seconds.items():
+            lines.append(f'  {phase:<12} {seconds * 1000:10.2f} ms')
+        if self.tag_counts:
+            lines.append('Elements: ' + ', '.join(f'{tag} ({count})' for tag, count in self.tag_counts.items()))
+        if self.draw_seconds:
+            lines.append('Painted shapes:')
+            for kind, seconds in sorted(self.draw_seconds.items(), key=lambda item: -item[1]):
+                lines.append(f'  {kind:<12} {self.draw_counts[kind]:8} {seconds * 1000:10.2f} ms')
+        if self.slowest:
+            lines.append('Slowest shapes:')
+            for shape in self.slowest:
+                bounds = '' if shape.bounds is None else ' at ' + ', '.join(f'{value:.0f}' for value in shape.bounds)
+                lines.append(f'  #{shape.index:<7} {shape.kind:<12} {shape.seconds * 1000:10.3f} ms{bounds}')
+        return '\n'.join(lines)
+
+
+class SvgProfiler:
+    """
+    An opt-in recorder of where the time of a conversion goes, which can be given to
+    SvgDeserializer and SvgPngConverter. They only look at it when one was given, so the
+    conversions without a profiler do not pay for the measurements.
+
+    Attributes:
+        slowest_count (int): The number of slowest shapes that are kept.
+    """
+    def __init__(self, slowest_count: int = 10):
+        """
+        Initializes an empty SvgProfiler.
+
+        Params:
+            slowest_count (int): The number of slowest shapes that are kept.
+        """
+        self.slowest_count = slowest_count
+        self.__phase_seconds: dict[str, float] = {}
+        self.__tag_counts = Counter()
+        self.__draw_counts = Counter()
+        self.__draw_seconds: dict[str, float] = {}
+        # The slowest shapes as a min heap of (seconds, index, shape)
+        self.__slowest: list[tuple[float, int, SvgShape]] = []
+        self.__draw_index = 0
+        self.__bytes_written = 0
+        # The open phases, innermost last, with their start time and the time of their nested phases
+        self.__open_phases: list[list] = []
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Measures the wall time of the code run inside the context, excluding the nested phases.
+
+        Params:
+            name (str): The name of the phase.
+        """
+        self.__enter(name)
+        try:
+            yield
+        finally:
+            self.__exit()
+
+    def iter_phase(self, name: str, iterable: Iterable[T]) -> Iterator[T]:
+        """
+        Measures the time spent producing the items of a lazy iterator, such as the objects
+        streamed by the deserializer, without the time spent by its consumer.
+
+        Params:
+            name (str): The name of the phase.
+            iterable (Iterable[T]): The iterator to be measured.
+
+        Returns:
+            Iterator[T]: The items of the iterator.
+        """
+        iterator = iter(iterable)
+        while True:
+            self.__enter(name)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self.__exit()
+            yield item
+
+    def count_tag(self, tag_name: str):
+        """
+        Counts a deserialized element.
+        """
+        self.__tag_counts[tag_name] += 1
+
+    def record_draw(self, shape: SvgShape, seconds: float):
+        """
+        Records the time spent painting a shape.
+
+        Params:
+            shape (SvgShape): The painted shape, in pixels.
+            seconds (float): The time spent painting it.
+        """
+        kind = shape.kind
+        self.__draw_counts[kind] += 1
+        self.__draw_seconds[kind] = self.__draw_seconds.get(kind, 0.0) + seconds
+        entry = (seconds, self.__draw_index, shape)
+        self.__draw_index += 1
+        if len(self.__slowest) < self.slowest_count:
+            heapq.heappush(self.__slowest, entry)
+        elif self.__slowest and seconds > self.__slowest[0][0]:
+            heapq.heapreplace(self.__slowest, entry)
+
+    def record_bytes(self, byte_count: int):
+        """
+        Records the size of the written output.
+        """
+        self.__bytes_written += byte_count
+
+    def stats(self) -> ProfileStats:
+        """
+        Returns the measurements recorded so far.
+        """
+        slowest = [
+            SlowShape(seconds, index, shape.kind, SvgBounds.of_shape(shape))
+            for seconds, index, shape in sorted(self.__slowest, key=lambda entry: (-entry[0], entry[1]))
+        ]
+        return ProfileStats(
+            dict(self.__phase_seconds),
+            dict(self.__tag_counts.most_common()),
+            dict(self.__draw_counts),
+            dict(self.__draw_seconds),
+            slowest,
+            self.__bytes_written
+        )
+
+    def __enter(self, name: str):
+        self.__open_phases.append([name, time.perf_counter(), 0.0])
+
+    def __exit(self):
+        name, start, nested = self.__open_phases.pop()
+        elapsed = time.perf_counter() - start
+        self.__phase_seconds[name] = self.__phase_seconds.get(name, 0.0) + elapsed - nested
+        if self.__open_phases:
+            self.__open_phases[-1][2] += elapsed
@@ -0,0 +1,302 @@
+import hashlib
+import os
+import tempfile
+from collections import OrderedDict
+from typing import Callable, Iterable, NamedTuple, Optional, Union
+from .svg_deserialization import SvgDeserializedObject, SvgDeserializer
+from .svg_version import RENDERER_VERSION
+
+# Renders deserialized SVG objects into an image of the given dimensions, like `SvgPngConverter.render`
+Renderer = Callable[[Iterable[SvgDeserializedObject], tuple[int, int]], Optional[bytes]]
+
+
+class CacheStats(NamedTuple):
+    """
+    The counters of a SvgRenderCache, for the current process.
+
+    Attributes:
+        memory_hits (int): The number of lookups answered from memory.
+        disk_hits (int): The number of lookups answered from the cache directory.
+        misses (int): The number of lookups that required a render.
+        evictions (int): The number of entries evicted from memory or from the cache directory.
+    """
+    memory_hits: int
+    disk_hits: int
+    misses: int
+    evictions: int
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class SvgRenderCache:
+    """
+    A content addressed cache of rendered PNG images.
+
+    The entries are keyed on a hash of the SVG bytes, the output dimensions and the renderer
+    version, so a cache hit returns the PNG bytes without deserializing the SVG or drawing it.
+    The entries are kept in memory and, if a directory is given, on disk. Both levels are
+    bounded in size and evict the least recently used entries first.
+
+    The disk level can be shared by many processes: the entries are written to a temporary
+    file and atomically renamed, and an entry that disappears because of a concurrent eviction
+    is treated as a miss.
+
+    Attributes:
+        directory (Optional[str]): The directory of the disk level, or None for a memory only cache.
+        max_memory_bytes (int): The maximum size of the entries kept in memory.
+        max_disk_bytes (int): The maximum size of the entries kept in the directory.
+    """
+    def __init__(
+            self,
+            directory: Optional[str] = None,
+            max_memory_bytes: int = 32 * 2 ** 20,
+            max_disk_bytes: int = 512 * 2 ** 20
+    ):
+        """
+        Initializes the SvgRenderCache with its directory and size limits.
+
+        Params:
+            directory (Optional[str]): The directory of the disk level, or None for a memory only cache.
+            max_memory_bytes (int): The maximum size of the entries kept in memory.
+            max_disk_bytes (int): The maximum size of the entries kept in the directory.
+        """
+        self.directory = directory
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+
+        self.__memory: OrderedDict[str, bytes] = OrderedDict()
+        self.__memory_bytes = 0
+        # The size of the directory is only known approximately, since other processes
+        # write to it as well, and it is measured again before evicting
+        self.__disk_bytes: Optional[int] = None
+
+        self.__memory_hits = 0
+        self.__disk_hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    @property
+    def stats(self) -> CacheStats:
+        """
+        Returns the counters of the cache for the current process.
+        """
+        return CacheStats(self.__memory_hits, self.__disk_hits, self.__misses, self.__evictions)
+
+    @staticmethod
+    def make_key(svg_bytes: bytes, output_dim: tuple[int, int]) -> str:
+        """
+        Computes the cache key of a render.
+
+        Params:
+            svg_bytes (bytes): The content of the SVG file.
+            output_dim (tuple[int, int]): The dimensions of the output image.
+
+        Returns:
+            str: The hexadecimal key of the render.
+        """
+        digest = hashlib.sha256(svg_bytes)
+        digest.update(f'|{output_dim[0]}x{output_dim[1]}|{RENDERER_VERSION}'.encode())
+        return digest.hexdigest()
+
+    def render(
+            self,
+            svg_source: Union[str, bytes],
+            output_dim: tuple[int, int] = (500, 500),
+            renderer: Optional[Renderer] = None
+    ) -> bytes:
+        """
+        Returns the PNG bytes of the SVG document, rendering it only if it is not cached.
+
+        Params:
+            svg_source (Union[str, bytes]): The path to the svg file or the content of the svg document.
+            output_dim (tuple[int, int]): The dimensions of the output image.
+            renderer (Optional[Renderer]): Renders the misses, such as the `render` method of a
+            converter that is reused with a canvas pool, or None to create a SvgPngConverter per miss.
+
+        Returns:
+            bytes: The PNG image.
+        """
+        if isinstance(svg_source, bytes):
+            svg_bytes = svg_source
+        else:
+            with open(svg_source, 'rb') as file:
+                svg_bytes = file.read()
+        key = SvgRenderCache.make_key(svg_bytes, output_dim)
+
+        png_bytes = self.get(key)
+        if png_bytes is not None:
+            return png_bytes
+
+        # The bytes were already read for the key, so the file is not read a second time
+        deserializer = SvgDeserializer.from_bytes(svg_bytes)
+        if renderer is None:
+            # Imported here since the cache hits return the PNG bytes without loading Pillow and NumPy
+            from .svg_png_converter import SvgPngConverter
+            png_bytes = SvgPngConverter(deserializer.iter_deserialize(), output_dim).convert_to_bytes()
+        else:
+            png_bytes = renderer(deserializer.iter_deserialize(), output_dim)
+        if png_bytes is None:
+            raise Exception('Could not render the SVG file')
+
+        self.put(key, png_bytes)
+        return png_bytes
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Looks up an entry, first in memory and then in the cache directory.
+
+        Params:
+            key (str): The key of the entry, see `make_key`.
+
+        Returns:
+            Optional[bytes]: The PNG bytes of the entry or None if it is not cached.
+        """
+        png_bytes = self.__memory.get(key)
+        if png_bytes is not None:
+            self.__memory.move_to_end(key)
+            self.__memory_hits += 1
+            return png_bytes
+
+        if self.directory is not None:
+            entry_path = self.__entry_path(key)
+            try:
+                with open(entry_path, 'rb') as file:
+                    png_bytes = file.read()
+                # The modification time is the recency used by the eviction of the disk level
+                os.utime(entry_path)
+            except FileNotFoundError:
+                png_bytes = None
+            if png_bytes is not None:
+                self.__disk_hits += 1
+                self.__put_in_memory(key, png_bytes)
+                return png_bytes
+
+        self.__misses += 1
+        return None
+
+    def put(self, key: str, png_bytes: bytes):
+        """
+        Adds an entry to the cache, evicting the least recently used entries if needed.
+
+        Params:
+            key (str): The key of the entry, see `make_key`.
+            png_bytes (bytes): The PNG image.
+        """
+        self.__put_in_memory(key, png_bytes)
+        if self.directory is None:
+            return
+
+        entry_path = self.__entry_path(key)
+        os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+        file_descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(entry_path), suffix='.tmp')
+        try:
+            with os.fdopen(file_descriptor, 'wb') as file:
+                file.write(png_bytes)
+            os.replace(temporary_path, entry_path)
+        except OSError:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+            raise
+
+        if self.__disk_bytes is None:
+            self.__disk_bytes = self.__measure_disk()
+        else:
+            self.__disk_bytes += len(png_bytes)
+        if self.__disk_bytes > self.max_disk_bytes:
+            self.__evict_disk()
+
+    def clear(self):
+        """
+        Removes every entry from memory and from the cache directory.
+        """
+        self.__memory.clear()
+        self.__memory_bytes = 0
+        for _, path, _ in self.__disk_entries():
+            self.__remove(path)
+        self.__disk_bytes = 0 if self.directory is not None else None
+
+    def __put_in_memory(self, key: str, png_bytes: bytes):
+        """
+        Adds an entry to the memory level, evicting the least recently used entries if needed.
+        """
+        if len(png_bytes) > self.max_memory_bytes:
+            return
+
+        previous = self.__memory.pop(key, None)
+        if previous is not None:
+            self.__memory_bytes -= len(previous)
+        self.__memory[key] = png_bytes
+        self.__memory_bytes += len(png_bytes)
+
+        while self.__memory_bytes > self.max_memory_bytes:
+            _, evicted = self.__memory.popitem(last=False)
+            self.__memory_bytes -= len(evicted)
+            self.__evictions += 1
+
+    def __entry_path(self, key: str) -> str:
+        """
+        Returns the path of an entry. The entries are sharded by the first two characters
+        of their key so no directory gets too large.
+        """
+        return os.path.join(self.directory, key[:2], key + '.png')
+
+    def __disk_entries(self) -> list[tuple[float, str, int]]:
+        """
+        Returns the modification time, path and size of every entry in the cache directory.
+        """
+        if self.directory is None:
+            return []
+
+        entries = []
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if not entry.name.endswith('.png'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, entry.path, stat.st_size))
+        return entries
+
+    def __measure_disk(self) -> int:
+        return sum(size for _, _, size in self.__disk_entries())
+
+    def __evict_disk(self):
+        """
+        Removes the least recently used entries of the cache directory until it is below
+        90% of its limit, so the directory is not scanned again on every put.
+        """
+        entries = sorted(self.__disk_entries())
+        total = sum(size for _, _, size in entries)
+        target = self.max_disk_bytes * 0.9
+        for _, path, size in entries:
+            if total <= target:
+                break
+            if self.__remove(path):
+                self.__evictions += 1
+            total -= size
+        self.__disk_bytes = total
+
+    @staticmethod
+    def __remove(path: str) -> bool:
+        """
+        Removes an entry that may already have been removed by another process.
+        """
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
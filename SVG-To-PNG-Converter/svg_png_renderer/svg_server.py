@@ -0,0 +1,379 @@
+"""
+A small asyncio http server that converts svg documents into png images.
+
+    POST /render?width=500&height=500   with the svg document as body, answers with the png image
+    GET  /metrics                       answers with the latency percentiles and the queue depth as json
+
+Run it with: python -m svg_png_renderer.svg_server --port 8080 --workers 4
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+from .svg_canvas_pool import default_canvas_pool
+from .svg_deserialization import SvgDeserializer
+from .svg_png_converter import SvgPngConverter
+
+REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+    503: 'Service Unavailable',
+    504: 'Gateway Timeout',
+}
+
+
+# The reusable converter of each worker thread, whose canvases come from the pool of the process
+_worker_state = threading.local()
+
+
+def silence_worker():
+    """
+    Discards the messages of the converters of a worker process. It runs once, when the process starts,
+    since replacing `sys.stdout` for every request would race with the other worker threads.
+    """
+    sys.stdout = open(os.devnull, 'w')
+
+
+def render_svg(svg_bytes: bytes, output_dim: tuple[int, int]) -> bytes:
+    """
+    Converts a svg document into a png image. It runs inside the worker pool, with a converter
+    that is reused by the requests of the same worker. The converter does not print anything
+    for the images it encodes, only for the shapes it cannot draw.
+
+    Params:
+        svg_bytes (bytes): The content of the svg document.
+        output_dim (tuple[int, int]): The dimensions of the output image.
+
+    Returns:
+        bytes: The png image.
+    """
+    converter = getattr(_worker_state, 'converter', None)
+    if converter is None:
+        converter = _worker_state.converter = SvgPngConverter(canvas_pool=default_canvas_pool)
+    deserializer = SvgDeserializer.from_bytes(svg_bytes)
+    png_bytes = converter.render(deserializer.iter_deserialize(), output_dim)
+    if png_bytes is None:
+        raise Exception('Could not encode the image')
+    return png_bytes
+
+
+class HttpError(Exception):
+    """
+    An error that is answered with the given http status.
+    """
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class SvgRenderServer:
+    """
+    An asyncio http server that renders svg documents in a bounded worker pool.
+
+    The number of requests waiting for or running in the pool is limited by `queue_limit`;
+    the requests above it are answered with 503 right away instead of piling up. A request
+    that does not finish in `timeout` seconds is answered with 504. With a process pool the
+    render keeps running in its worker until it finishes, but its result is discarded.
+
+    Attributes:
+        host (str): The interface the server listens on.
+        port (int): The port the server listens on.
+        workers (int): The number of workers of the pool.
+        queue_limit (int): The maximum number of requests waiting for or running in the pool.
+        timeout (float): The maximum duration of a render, in seconds.
+        max_body_bytes (int): The maximum size of an svg document.
+        use_threads (bool): True to render in threads instead of processes.
+    """
+    def __init__(
+            self,
+            host: str = '127.0.0.1',
+            port: int = 8080,
+            workers: Optional[int] = None,
+            queue_limit: int = 64,
+            timeout: float = 10.0,
+            max_body_bytes: int = 16 * 2 ** 20,
+            use_threads: bool = False
+    ):
+        """
+        Initializes the SvgRenderServer, without starting it.
+
+        Params:
+            host (str): The interface the server listens on.
+            port (int): The port the server listens on.
+            workers (Optional[int]): The number of workers of the pool, or None to use one per CPU.
+            queue_limit (int): The maximum number of requests waiting for or running in the pool.
+            timeout (float): The maximum duration of a render, in seconds.
+            max_body_bytes (int): The maximum size of an svg document.
+            use_threads (bool): True to render in threads instead of processes.
+        """
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_limit = queue_limit
+        self.timeout = timeout
+        self.max_body_bytes = max_body_bytes
+        self.use_threads = use_threads
+
+        self.__executor: Optional[Executor] = None
+        self.__server: Optional[asyncio.Server] = None
+        self.__queue_depth = 0
+        self.__latencies: deque[float] = deque(maxlen=4096)
+        self.__status_counts: dict[int, int] = {}
+
+    async def start(self):
+        """
+        Starts the worker pool and begins listening.
+        """
+        if self.use_threads:
+            self.__executor = ThreadPoolExecutor(max_workers=self.workers)
+        else:
+            # The workers are started by the first request, so forked workers would inherit its
+            # socket and keep the connection open after the response
+            self.__executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=silence_worker
+            )
+        self.__server = await asyncio.start_server(self.__handle_connection, self.host, self.port)
+        self.port = self.__server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        """
+        Starts the server and serves the requests until it is cancelled.
+        """
+        await self.start()
+        try:
+            await self.__server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self):
+        """
+        Stops listening and shuts the worker pool down.
+        """
+        if self.__server is not None:
+            self.__server.close()
+            await self.__server.wait_closed()
+            self.__server = None
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=False, cancel_futures=True)
+            self.__executor = None
+
+    def metrics(self) -> dict:
+        """
+        Returns the metrics of the server: the queue depth, the number of answers for each
+        status and the percentiles of the latency of the most recent renders, in milliseconds.
+        """
+        latencies = sorted(self.__latencies)
+
+        def percentile(fraction: float) -> Optional[float]:
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * fraction))] * 1e3, 3)
+
+        return {
+            'queue_depth': self.__queue_depth,
+            'queue_limit': self.queue_limit,
+            'workers': self.workers,
+            'responses': {str(status): count for status, count in sorted(self.__status_counts.items())},
+            'latency_ms': {
+                'p50': percentile(0.50),
+                'p90': percentile(0.90),
+                'p99': percentile(0.99),
+                'max': percentile(1.0),
+                'samples': len(latencies),
+            },
+        }
+
+    async def __handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Serves the requests of a connection until the client closes it or asks to close it.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                keep_alive = await self.__handle_request(request_line, reader, writer)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def __handle_request(
+            self,
+            request_line: bytes,
+            reader: asyncio.StreamReader,
+            writer: asyncio.StreamWriter
+    ) -> bool:
+        """
+        Reads a request and writes its response.
+
+        Returns:
+            bool: True if the connection can be used for another request.
+        """
+        headers: dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        keep_alive = headers.get('connection', '').lower() != 'close'
+        try:
+            method, target, _ = request_line.decode('latin-1').split(' ', 2)
+        except ValueError:
+            await self.__respond(writer, 400, b'Malformed request line', 'text/plain', False)
+            return False
+
+        url = urlsplit(target)
+        try:
+            if url.path == '/metrics':
+                if method != 'GET':
+                    raise HttpError(405, 'Use GET for /metrics')
+                body = json.dumps(self.metrics()).encode()
+                await self.__respond(writer, 200, body, 'application/json', keep_alive)
+            elif url.path == '/render':
+                if method != 'POST':
+                    raise HttpError(405, 'Use POST for /render')
+                svg_bytes = await self.__read_body(headers, reader)
+                png_bytes = await self.__render(svg_bytes, self.__parse_size(url.query))
+                await self.__respond(writer, 200, png_bytes, 'image/png', keep_alive)
+            else:
+                raise HttpError(404, f'Unknown path: {url.path}')
+        except HttpError as e:
+            # The body of a rejected request may not have been read, so the connection is closed
+            await self.__respond(writer, e.status, str(e).encode(), 'text/plain', False)
+            return False
+        return keep_alive
+
+    async def __read_body(self, headers: dict[str, str], reader: asyncio.StreamReader) -> bytes:
+        try:
+            length = int(headers.get('content-length', ''))
+        except ValueError:
+            raise HttpError(400, 'A Content-Length header is required')
+        if length > self.max_body_bytes:
+            raise HttpError(413, f'The svg document is larger than {self.max_body_bytes} bytes')
+        return await reader.readexactly(length)
+
+    @staticmethod
+    def __parse_size(query: str) -> tuple[int, int]:
+        parameters = parse_qs(query)
+        try:
+            width = int(parameters.get('width', ['500'])[0])
+            height = int(parameters.get('height', [str(width)])[0])
+        except ValueError:
+            raise HttpError(400, 'The width and height must be integers')
+        if not (0 < width <= 16384 and 0 < height <= 16384):
+            raise HttpError(400, 'The width and height must be between 1 and 16384')
+        return width, height
+
+    async def __render(self, svg_bytes: bytes, output_dim: tuple[int, int]) -> bytes:
+        """
+        Renders the svg document in the worker pool, applying the queue limit and the timeout.
+        A render that timed out keeps its place in the queue until its worker is free again,
+        since a process worker cannot be interrupted.
+        """
+        if self.__queue_depth >= self.queue_limit:
+            raise HttpError(503, 'The server is busy, retry later')
+
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            render = self.__executor.submit(render_svg, svg_bytes, output_dim)
+        except Exception as e:
+            raise HttpError(503, f'The worker pool is not available: {e}')
+        self.__queue_depth += 1
+        render.add_done_callback(lambda _: self.__finish_render(loop))
+        try:
+            # Cancelling the wrapper on a timeout only cancels the renders that did not start yet
+            return await asyncio.wait_for(asyncio.wrap_future(render), self.timeout)
+        except asyncio.TimeoutError:
+            raise HttpError(504, f'The render took longer than {self.timeout} s')
+        except Exception as e:
+            raise HttpError(400, f'Could not render the svg document: {e}')
+        finally:
+            self.__latencies.append(time.perf_counter() - start)
+
+    def __finish_render(self, loop: asyncio.AbstractEventLoop):
+        """
+        Frees the place of a finished or cancelled render in the queue. It is called by the
+        thread of the pool, so the queue depth is only changed in the thread of the loop.
+        """
+        def free_place():
+            self.__queue_depth -= 1
+
+        # The loop is closed once the server stopped, and its queue no longer matters
+        with contextlib.suppress(RuntimeError):
+            loop.call_soon_threadsafe(free_place)
+
+    async def __respond(
+            self,
+            writer: asyncio.StreamWriter,
+            status: int,
+            body: bytes,
+            content_type: str,
+            keep_alive: bool
+    ):
+        """
+        Writes a response, streaming large bodies in chunks so the buffer of the writer stays small.
+        """
+        self.__status_counts[status] = self.__status_counts.get(status, 0) + 1
+        head = (
+            f'HTTP/1.1 {status} {REASONS[status]}\r\n'
+            f'Content-Type: {content_type}\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            f'Connection: {"keep-alive" if keep_alive else "close"}\r\n'
+            '\r\n'
+        )
+        writer.write(head.encode('latin-1'))
+        view = memoryview(body)
+        for offset in range(0, len(body), 64 * 1024):
+            writer.write(view[offset:offset + 64 * 1024])
+            await writer.drain()
+        await writer.drain()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serves svg to png conversions over http.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--workers', type=int, default=None, help='the size of the worker pool')
+    parser.add_argument('--queue-limit', type=int, default=64,
+                        help='the maximum number of requests waiting for or running in the pool')
+    parser.add_argument('--timeout', type=float, default=10.0, help='the maximum duration of a render')
+    parser.add_argument('--threads', action='store_true', help='render in threads instead of processes')
+    arguments = parser.parse_args()
+
+    server = SvgRenderServer(
+        arguments.host,
+        arguments.port,
+        arguments.workers,
+        arguments.queue_limit,
+        arguments.timeout,
+        use_threads=arguments.threads
+    )
+    print(f'Serving on http://{arguments.host}:{arguments.port}')
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(server.serve_forever())
+
+
+if __name__ == '__main__':
+    main()
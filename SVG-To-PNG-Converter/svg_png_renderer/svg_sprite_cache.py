@@ -0,0 +1,87 @@
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+from PIL import Image
+from .svg_display_list import SvgShape
+from .svg_transform import SvgTransform
+
+
+class SvgSprite(NamedTuple):
+    """
+    The shapes of a referenced element rasterized onto a transparent image.
+
+    Attributes:
+        image (Image.Image): The RGBA image of the shapes.
+        left (int): The column of the image pixels where the sprite starts, before the instance is moved.
+        top (int): The row of the image pixels where the sprite starts, before the instance is moved.
+    """
+    image: Image.Image
+    left: int
+    top: int
+
+
+class SvgSpriteCache:
+    """
+    A cache of the rasterized instances of the elements referenced by use elements, for one render.
+
+    The sprites are keyed on the shared shapes of the referenced element and on the transform of
+    the instance without its whole pixel translation, so every instance that is only moved by
+    whole pixels reuses the same sprite. The cache keeps a reference to the shapes, so their
+    identity is not reused while a sprite is cached. The least recently used sprites are evicted
+    first once the sprites hold more than `max_pixels` pixels.
+
+    Attributes:
+        max_pixels (int): The maximum number of pixels of all the cached sprites.
+        hits (int): The number of instances pasted from a cached sprite.
+        misses (int): The number of sprites that had to be rasterized.
+    """
+    def __init__(self, max_pixels: int = 16 * 2 ** 20):
+        """
+        Initializes an empty SvgSpriteCache.
+
+        Params:
+            max_pixels (int): The maximum number of pixels of all the cached sprites.
+        """
+        self.max_pixels = max_pixels
+        self.hits = 0
+        self.misses = 0
+        self.__sprites: OrderedDict[tuple[int, SvgTransform], tuple[tuple[SvgShape, ...], SvgSprite]] = OrderedDict()
+        self.__pixels = 0
+
+    def get(self, shapes: tuple[SvgShape, ...], transform: SvgTransform) -> Optional[SvgSprite]:
+        """
+        Returns the sprite of the shapes of a referenced element under a transform.
+
+        Params:
+            shapes (tuple[SvgShape, ...]): The shapes of the referenced element.
+            transform (SvgTransform): The transform of the instance, whose translation is less than a pixel.
+
+        Returns:
+            Optional[SvgSprite]: The cached sprite, or None if it has to be rasterized.
+        """
+        key = (id(shapes), transform)
+        entry = self.__sprites.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.__sprites.move_to_end(key)
+        return entry[1]
+
+    def put(self, shapes: tuple[SvgShape, ...], transform: SvgTransform, sprite: SvgSprite):
+        """
+        Caches the sprite of the shapes of a referenced element under a transform.
+        The sprites larger than the whole cache are not cached.
+
+        Params:
+            shapes (tuple[SvgShape, ...]): The shapes of the referenced element.
+            transform (SvgTransform): The transform of the instance, whose translation is less than a pixel.
+            sprite (SvgSprite): The rasterized shapes.
+        """
+        pixels = sprite.image.width * sprite.image.height
+        if pixels > self.max_pixels:
+            return
+        self.__sprites[(id(shapes), transform)] = (shapes, sprite)
+        self.__pixels += pixels
+        while self.__pixels > self.max_pixels:
+            _, (_, evicted) = self.__sprites.popitem(last=False)
+            self.__pixels -= evicted.image.width * evicted.image.height
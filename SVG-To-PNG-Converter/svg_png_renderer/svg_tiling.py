@@ -0,0 +1,280 @@
+import io
+import os
+from collections import Counter
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from typing import BinaryIO, Iterable, Iterator, Optional, Union
+from PIL import Image
+from .converter import Converter
+from .png_writer import PngStreamWriter
+from .svg_bounds import SvgBounds, SvgGridIndex
+from .svg_deserialization import SvgDeserializedObject
+from .svg_display_list import SvgShape
+from .svg_encoding import DEFAULT_ENCODE_OPTIONS, PNG_STRATEGIES, SvgEncodeOptions, SvgImageEncoder
+from .svg_png_converter import SvgPngConverter
+from .svg_transform import ViewBox
+
+
+def render_tile(
+        shapes: list[SvgShape],
+        region: tuple[int, int, int, int],
+        output_dim: tuple[int, int],
+        antialiasing: int,
+        antialiasing_filter: str
+) -> bytes:
+    """
+    Draws the shapes that overlap a tile onto a tile sized image. It runs inside the worker pool.
+
+    Params:
+        shapes (list[SvgShape]): The shapes snapped onto the pixels of the whole image, in drawing order.
+        region (tuple[int, int, int, int]): The left, top, width and height of the tile in the whole image.
+        output_dim (tuple[int, int]): The dimensions of the whole image.
+        antialiasing (int): The supersampling factor of the shapes.
+        antialiasing_filter (str): The downsampling filter, box or lanczos.
+
+    Returns:
+        bytes: The raw RGBA pixels of the tile.
+    """
+    return SvgPngConverter.render_region(shapes, region, output_dim, antialiasing, antialiasing_filter).tobytes()
+
+
+class SvgTiledPngConverter(Converter):
+    """
+    A class that converts deserialized SVG objects into PNG images by splitting the image into
+    tiles that are rasterized in parallel by a pool of worker processes.
+
+    The bounding box of every shape is computed once and the shapes are binned into the tiles
+    they overlap with a grid index, so each tile only draws its own shapes. The tiles are
+    rendered one band of rows at a time and every band is streamed into the PNG encoder,
+    so the peak memory is about one band of tiles, whatever the size of the image.
+
+    The geometry is snapped onto the pixels before it is moved into the tiles, like the drawers
+    of SvgPngConverter snap it, and every tile is drawn with a padding that is cropped away, so
+    the tiles draw the same pixels as the serial path. The round joints of wide polylines are
+    the exception: Pillow computes them with floating point math on the coordinates of the tile,
+    which can still move an isolated pixel of a joint with a supersampling factor of 4.
+
+    The drawers registered with `SvgPngConverter.register_shape` must be registered in the
+    worker processes too, which happens by itself when the processes are forked.
+
+    Attributes:
+        deserialized_objects (Iterable[SvgDeserializedObject]): A list of SvgDeserializedObjects,
+        a lazy iterator of them or a compiled SvgDisplayList that represent the SVG file to be converted.
+        output_dim (tuple[int, int]): The dimensions of the output image.
+        output_file_path (str): The path to the file where the converted output will be saved.
+        tile_size (int): The width and height of the tiles, which bounds the peak memory.
+        max_workers (Optional[int]): The number of worker processes, None to use one per CPU
+        or 1 to render the tiles in the current process.
+        crop (Optional[ViewBox]): The (min_x, min_y, width, height) region of the user space to be
+        rendered, or None to render the view box of the document.
+        antialiasing (int): The supersampling factor, 1 for aliased images, 2 or 4 for smoother
+        edges. Every tile is supersampled and downsampled on its own.
+        antialiasing_filter (str): The downsampling filter, box or lanczos.
+        encode_options (SvgEncodeOptions): The compression of the output image, which is always a
+        PNG image without a palette, since the colors are only known once every tile is drawn.
+        The optimize option is ignored.
+    """
+    def __init__(
+            self,
+            svg_deserialized_objects: Iterable[SvgDeserializedObject],
+            output_dim: tuple[int, int] = (500, 500),
+            output_file_path: str = 'output.png',
+            tile_size: int = 1024,
+            max_workers: Optional[int] = None,
+            crop: Optional[ViewBox] = None,
+            antialiasing: int = 1,
+            antialiasing_filter: str = 'box',
+            encode_options: SvgEncodeOptions = DEFAULT_ENCODE_OPTIONS
+    ):
+        """
+        Initializes the SvgTiledPngConverter with SvgDeserializedObjects, output dimensions, an output
+        file path, the tile size, the number of worker processes, an optional region of the document
+        and the antialiasing quality.
+
+        Params:
+            svg_deserialized_objects (Iterable[SvgDeserializedObject]): A list of SvgDeserializedObjects,
+            a lazy iterator of them or a compiled SvgDisplayList that represent the SVG file to be converted.
+            output_dim (tuple[int, int]): The dimensions of the output image.
+            output_file_path (str): The path to the file where the converted output will be saved.
+            tile_size (int): The width and height of the tiles, which bounds the peak memory.
+            max_workers (Optional[int]): The number of worker processes, None to use one per CPU
+            or 1 to render the tiles in the current process.
+            crop (Optional[ViewBox]): The (min_x, min_y, width, height) region of the user space to be
+            rendered, or None to render the view box of the document.
+            antialiasing (int): The supersampling factor, 1 for aliased images, 2 or 4 for smoother edges.
+            antialiasing_filter (str): The downsampling filter, box or lanczos.
+            encode_options (SvgEncodeOptions): The compression of the output PNG image.
+        """
+        SvgPngConverter.validate_antialiasing(antialiasing, antialiasing_filter)
+        SvgImageEncoder.validate(encode_options)
+        if encode_options.image_format != 'png' or encode_options.palette:
+            raise Exception('The tiled images can only be encoded as PNG images without a palette')
+        super().__init__(svg_deserialized_objects, output_file_path)
+        self.output_dim = output_dim
+        self.tile_size = tile_size
+        self.max_workers = max_workers
+        self.crop = crop
+        self.antialiasing = antialiasing
+        self.antialiasing_filter = antialiasing_filter
+        self.encode_options = encode_options
+
+    def convert(self) -> bool:
+        """
+        Converts the deserialized SVG objects into a PNG image and saves it to the specified output file path.
+
+        Returns:
+            bool: True if the image was saved, False otherwise.
+        """
+        return self.convert_to(self.output_file_path)
+
+    def convert_to_bytes(self) -> Optional[bytes]:
+        """
+        Converts the deserialized SVG objects into a PNG image and returns it, without writing any file.
+
+        Returns:
+            Optional[bytes]: The PNG image, or None if it could not be encoded.
+        """
+        output = io.BytesIO()
+        if not self.convert_to(output):
+            return None
+        return output.getvalue()
+
+    def convert_to(self, output: Union[str, BinaryIO]) -> bool:
+        """
+        Converts the deserialized SVG objects into a PNG image, streaming the bands of tiles into
+        the PNG encoder, and saves it to a file path or writes it to a binary file object.
+
+        Params:
+            output (Union[str, BinaryIO]): The path to the output file or a binary file object.
+
+        Returns:
+            bool: True if the image was saved, False otherwise.
+        """
+        try:
+            if isinstance(output, str):
+                with open(output, 'wb') as file:
+                    self.__write_png(file)
+            else:
+                self.__write_png(output)
+            print('Image saved successfully')
+            return True
+        except Exception as e:
+            print(f'Could not save the image: {e}')
+            return False
+
+    def render_image(self) -> Image.Image:
+        """
+        Converts the deserialized SVG objects into a single Pillow image, stitching the tiles together.
+
+        Returns:
+            Image.Image: The RGBA image.
+        """
+        image = Image.new('RGBA', self.output_dim, 'WHITE')
+        for top, band in self.iter_bands():
+            image.paste(band, (0, top))
+        return image
+
+    def iter_bands(self) -> Iterator[tuple[int, Image.Image]]:
+        """
+        Renders the image one band of tiles at a time, from top to bottom. The next band is
+        already being rendered by the workers while the current one is consumed.
+
+        Returns:
+            Iterator[tuple[int, Image.Image]]: The top row of every band and the band itself.
+        """
+        width, height = self.output_dim
+        tile_size = self.tile_size
+        antialiasing = self.antialiasing
+        # The filters that read around the tiles need the shapes of the neighbouring tiles too
+        margin = SvgPngConverter.antialiasing_margin(antialiasing, self.antialiasing_filter)
+        shapes, index = self.__bin_shapes()
+        band_count = (height + tile_size - 1) // tile_size
+        column_count = (width + tile_size - 1) // tile_size
+
+        executor: Optional[Executor] = None
+        if self.max_workers != 1:
+            executor = ProcessPoolExecutor(max_workers=self.max_workers or os.cpu_count() or 1)
+
+        def submit_band(row: int) -> list[tuple[tuple[int, int], Union[Future, bytes, None]]]:
+            tiles = []
+            for column in range(column_count):
+                origin = (column * tile_size, row * tile_size)
+                size = (min(tile_size, width - origin[0]), min(tile_size, height - origin[1]))
+                if margin:
+                    left, top = origin[0] * antialiasing - margin, origin[1] * antialiasing - margin
+                    right = (origin[0] + size[0]) * antialiasing + margin
+                    bottom = (origin[1] + size[1]) * antialiasing + margin
+                    tile_shapes = [shapes[i] for i in index.query((left, top, right, bottom))]
+                else:
+                    tile_shapes = [shapes[i] for i in index.cell(column, row)]
+                if not tile_shapes:
+                    tiles.append((origin, None))
+                    continue
+                arguments = (tile_shapes, origin + size, self.output_dim, antialiasing, self.antialiasing_filter)
+                if executor is None:
+                    tiles.append((origin, render_tile(*arguments)))
+                else:
+                    tiles.append((origin, executor.submit(render_tile, *arguments)))
+            return tiles
+
+        try:
+            pending = submit_band(0) if band_count else []
+            for row in range(band_count):
+                tiles = pending
+                if row + 1 < band_count:
+                    pending = submit_band(row + 1)
+
+                top = row * tile_size
+                band = Image.new('RGBA', (width, min(tile_size, height - top)), 'WHITE')
+                for origin, tile in tiles:
+                    if tile is None:
+                        continue
+                    if isinstance(tile, Future):
+                        tile = tile.result()
+                    size = (min(tile_size, width - origin[0]), band.height)
+                    band.paste(Image.frombytes('RGBA', size, tile), (origin[0], 0))
+                yield top, band
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+    def __write_png(self, output: BinaryIO):
+        options = self.encode_options
+        strategy = max(PNG_STRATEGIES[options.compress_strategy], 0)
+        # The tiles are drawn onto white and the translucent shapes are blended, so the image is opaque
+        mode = 'RGB' if options.downgrade_rgb else 'RGBA'
+        writer = PngStreamWriter(
+            output, self.output_dim[0], self.output_dim[1], mode, options.compress_level, strategy
+        )
+        for _, band in self.iter_bands():
+            if mode == 'RGB':
+                band = band.convert('RGB')
+            writer.write_rows(band.tobytes())
+        writer.close()
+
+    def __bin_shapes(self) -> tuple[list[SvgShape], SvgGridIndex]:
+        """
+        Maps the visible shapes onto the supersampled pixels of the image and bins them into
+        the tiles they overlap.
+        """
+        unknown_tags = Counter()
+        antialiasing = self.antialiasing
+        canvas = (0, 0, self.output_dim[0] * antialiasing - 1, self.output_dim[1] * antialiasing - 1)
+        index = SvgGridIndex(self.tile_size * antialiasing)
+        shapes: list[SvgShape] = []
+        placed = SvgPngConverter.place_shapes(
+            self.deserialized_objects,
+            self.output_dim,
+            unknown_tags,
+            self.crop,
+            antialiasing
+        )
+        for _, shape in placed:
+            shape = SvgPngConverter.snap_to_pixels(shape)
+            bounds = SvgBounds.of_shape(shape)
+            if bounds is None or not SvgBounds.intersects(bounds, canvas):
+                continue
+            index.insert(len(shapes), bounds, clip=canvas)
+            shapes.append(shape)
+        SvgPngConverter.report_unknown_tags(unknown_tags)
+        return shapes, index
+
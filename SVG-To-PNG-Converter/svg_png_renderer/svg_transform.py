@@ -0,0 +1,261 @@
+import math
+import re
+from typing import TYPE_CHECKING, NamedTuple, Optional
+from .svg_path import SvgSubpath
+from .svg_points import SvgPoints
+
+if TYPE_CHECKING:
+    # The display list compiles the transforms, so the shapes are only imported for the annotations
+    from .svg_display_list import SvgShape
+
+ViewBox = tuple[float, float, float, float]
+# The horizontal and vertical alignment as fractions (0, 0.5 or 1) and whether the
+# view box is sliced instead of met, or None when the view box is stretched
+AspectRatio = Optional[tuple[float, float, bool]]
+
+# A transform function of the transform attribute, optionally followed by a comma
+TRANSFORM_FUNCTION_PATTERN = re.compile(r'\s*(matrix|translate|scale|rotate|skewX|skewY)\s*\(([^)]*)\)\s*,?')
+ARGUMENT_SEPARATOR = re.compile(r'[\s,]+')
+# The allowed numbers of arguments of every transform function
+TRANSFORM_ARGUMENT_COUNTS = {
+    'matrix': (6,),
+    'translate': (1, 2),
+    'scale': (1, 2),
+    'rotate': (1, 3),
+    'skewX': (1,),
+    'skewY': (1,),
+}
+
+
+class SvgTransform(NamedTuple):
+    """
+    An immutable 2D affine transform, stored as the matrix
+
+        | a c e |
+        | b d f |
+        | 0 0 1 |
+
+    which maps the point (x, y) to (a * x + c * y + e, b * x + d * y + f).
+    """
+    a: float = 1.0
+    b: float = 0.0
+    c: float = 0.0
+    d: float = 1.0
+    e: float = 0.0
+    f: float = 0.0
+
+    @staticmethod
+    def translation(tx: float, ty: float = 0.0) -> 'SvgTransform':
+        return SvgTransform(1.0, 0.0, 0.0, 1.0, tx, ty)
+
+    @staticmethod
+    def scaling(sx: float, sy: Optional[float] = None) -> 'SvgTransform':
+        return SvgTransform(sx, 0.0, 0.0, sx if sy is None else sy, 0.0, 0.0)
+
+    @staticmethod
+    def rotation(angle: float, cx: float = 0.0, cy: float = 0.0) -> 'SvgTransform':
+        """
+        Returns the rotation by an angle in degrees around the point (cx, cy).
+        """
+        radians = math.radians(angle)
+        cos, sin = math.cos(radians), math.sin(radians)
+        return SvgTransform(cos, sin, -sin, cos, cx - cos * cx + sin * cy, cy - sin * cx - cos * cy)
+
+    @staticmethod
+    def parse(value: str) -> 'SvgTransform':
+        """
+        Parses a transform attribute, which is a list of transform functions separated by
+        whitespace or commas. The functions are applied from the last one to the first one.
+
+        Params:
+            value (str): The value of the transform attribute.
+
+        Returns:
+            SvgTransform: The transform of the whole list.
+
+        Raises:
+            ValueError: If the list or the arguments of a function are not valid.
+        """
+        transform = IDENTITY
+        value = value.strip()
+        position = 0
+        while position < len(value):
+            match = TRANSFORM_FUNCTION_PATTERN.match(value, position)
+            if match is None:
+                raise ValueError(f'Invalid transform function at position {position}: {value[position:]!r}')
+            name = match.group(1)
+            arguments = [float(argument) for argument in ARGUMENT_SEPARATOR.split(match.group(2).strip()) if argument]
+            if len(arguments) not in TRANSFORM_ARGUMENT_COUNTS[name]:
+                raise ValueError(f'Invalid number of arguments for {name}: {len(arguments)}')
+            transform = transform.multiply(SvgTransform.__function(name, arguments))
+            position = match.end()
+        return transform
+
+    @staticmethod
+    def __function(name: str, arguments: list[float]) -> 'SvgTransform':
+        """
+        Returns the transform of a single transform function.
+        """
+        if name == 'matrix':
+            return SvgTransform(*arguments)
+        if name == 'translate':
+            return SvgTransform.translation(*arguments)
+        if name == 'scale':
+            return SvgTransform.scaling(*arguments)
+        if name == 'rotate':
+            return SvgTransform.rotation(*arguments)
+        tangent = math.tan(math.radians(arguments[0]))
+        if name == 'skewX':
+            return SvgTransform(1.0, 0.0, tangent, 1.0, 0.0, 0.0)
+        return SvgTransform(1.0, tangent, 0.0, 1.0, 0.0, 0.0)
+
+    @staticmethod
+    def for_viewport(
+            view_box: ViewBox,
+            aspect_ratio: AspectRatio,
+            output_dim: tuple[int, int]
+    ) -> 'SvgTransform':
+        """
+        Computes the transform that maps the view box of a document onto the output image,
+        following the rules of the preserveAspectRatio attribute.
+
+        Params:
+            view_box (ViewBox): The (min_x, min_y, width, height) area of the user space to be shown.
+            aspect_ratio (AspectRatio): The alignment and the meet or slice mode, or None to stretch.
+            output_dim (tuple[int, int]): The dimensions of the output image.
+
+        Returns:
+            SvgTransform: The transform from the user space to the pixels of the output image.
+        """
+        min_x, min_y, width, height = view_box
+        sx = output_dim[0] / width
+        sy = output_dim[1] / height
+        if aspect_ratio is None:
+            return SvgTransform(sx, 0.0, 0.0, sy, -min_x * sx, -min_y * sy)
+
+        align_x, align_y, slice_view_box = aspect_ratio
+        scale = max(sx, sy) if slice_view_box else min(sx, sy)
+        tx = -min_x * scale + (output_dim[0] - width * scale) * align_x
+        ty = -min_y * scale + (output_dim[1] - height * scale) * align_y
+        return SvgTransform(scale, 0.0, 0.0, scale, tx, ty)
+
+    def inverse(self) -> Optional['SvgTransform']:
+        """
+        Returns the transform that undoes this transform, or None if it is not invertible.
+        """
+        determinant = self.a * self.d - self.b * self.c
+        if determinant == 0:
+            return None
+        a, b, c, d = self.d / determinant, -self.b / determinant, -self.c / determinant, self.a / determinant
+        return SvgTransform(a, b, c, d, -(a * self.e + c * self.f), -(b * self.e + d * self.f))
+
+    @property
+    def is_identity(self) -> bool:
+        return self == IDENTITY
+
+    @property
+    def is_axis_aligned(self) -> bool:
+        """
+        Returns True if the transform only translates and scales, so the boxes stay aligned with the axes.
+        """
+        return self.b == 0 and self.c == 0
+
+    @property
+    def stroke_scale(self) -> float:
+        """
+        Returns the factor applied to stroke widths, which is the mean scale of the transform.
+        """
+        return math.sqrt(abs(self.a * self.d - self.b * self.c))
+
+    def multiply(self, other: 'SvgTransform') -> 'SvgTransform':
+        """
+        Returns the transform that applies `other` first and then this transform.
+        """
+        return SvgTransform(
+            self.a * other.a + self.c * other.b,
+            self.b * other.a + self.d * other.b,
+            self.a * other.c + self.c * other.d,
+            self.b * other.c + self.d * other.d,
+            self.a * other.e + self.c * other.f + self.e,
+            self.b * other.e + self.d * other.f + self.f
+        )
+
+    def apply_point(self, x: float, y: float) -> tuple[float, float]:
+        return self.a * x + self.c * y + self.e, self.b * x + self.d * y + self.f
+
+    def apply_geometry(self, geometry: tuple) -> tuple:
+        """
+        Transforms the geometry of a SvgShape. A geometry is either a flat tuple of coordinates
+        (x1, y1, x2, y2, ...), an array of points, a SvgSubpath, a SvgInstance or a tuple of nested
+        geometries, such as a list of points or a list of subpaths, and keeps its layout.
+
+        Params:
+            geometry (tuple): The geometry to be transformed.
+
+        Returns:
+            tuple: The transformed geometry.
+        """
+        if SvgPoints.is_points(geometry):
+            return SvgPoints.transform(geometry, *self)
+        if isinstance(geometry, SvgSubpath):
+            return geometry._replace(points=self.apply_geometry(geometry.points))
+        if isinstance(geometry, SvgInstance):
+            # The shared shapes are left untouched, only the transform of the instance changes
+            return geometry._replace(transform=self.multiply(geometry.transform))
+        if not geometry:
+            return geometry
+        if isinstance(geometry[0], tuple) or SvgPoints.is_points(geometry[0]):
+            return tuple(self.apply_geometry(part) for part in geometry)
+
+        a, b, c, d, e, f = self
+        transformed = []
+        for i in range(0, len(geometry), 2):
+            x, y = geometry[i], geometry[i + 1]
+            transformed.append(a * x + c * y + e)
+            transformed.append(b * x + d * y + f)
+        return tuple(transformed)
+
+    def apply(self, shape: 'SvgShape') -> 'SvgShape':
+        """
+        Transforms the geometry and the stroke width of a shape. Only translations and scalings
+        keep the bounding boxes of rectangles and ellipses aligned with the axes.
+
+        Params:
+            shape (SvgShape): The shape to be transformed.
+
+        Returns:
+            SvgShape: The transformed shape.
+        """
+        stroke_width = shape.stroke_width
+        if stroke_width > 0:
+            stroke_width = max(1, round(stroke_width * self.stroke_scale))
+        return shape._replace(geometry=self.apply_geometry(shape.geometry), stroke_width=stroke_width)
+
+
+IDENTITY = SvgTransform()
+
+
+class SvgInstance(NamedTuple):
+    """
+    The geometry of a use element, which draws the shapes of another element with a transform.
+    The shapes are shared by all the instances of the same element, only the transform differs.
+
+    Attributes:
+        shapes (tuple[SvgShape, ...]): The shapes of the referenced element, in its own coordinates.
+        transform (SvgTransform): The transform from the coordinates of the referenced element.
+        bounds (tuple[float, float, float, float]): The bounding box of the shapes, strokes included,
+        in the coordinates of the referenced element.
+    """
+    shapes: tuple['SvgShape', ...]
+    transform: SvgTransform
+    bounds: tuple[float, float, float, float]
+
+    def transformed_bounds(self) -> tuple[float, float, float, float]:
+        """
+        Returns the box that contains the transformed bounding box of the shapes.
+        """
+        left, top, right, bottom = self.bounds
+        corners = self.transform.apply_geometry((left, top, right, top, right, bottom, left, bottom))
+        xs = corners[0::2]
+        ys = corners[1::2]
+        return min(xs), min(ys), max(xs), max(ys)
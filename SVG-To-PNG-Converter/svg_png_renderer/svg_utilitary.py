@@ -1,5 +1,6 @@
+from typing import Optional
+from .svg_color import Color, default_resolver
 from .svg_deserialization import SvgDeserializedObject
-from PIL import ImageColor
 
 
 class SvgUtility:
@@ -21,10 +22,7 @@ class SvgUtility:
         Returns:
             str: The value of the attribute if it exists, otherwise an empty string.
         """
-        for attribute in svg_object.attributes:
-            if attribute.name == attribute_name:
-                return attribute.value
-        return ''
+        return svg_object.get_attribute(attribute_name)
 
     @staticmethod
     def get_float(
@@ -95,12 +93,13 @@ class SvgUtility:
     @staticmethod
     def process_color_and_opacity(
             obj: SvgDeserializedObject,
-            attribute_name,
-            default_color=None,
-            default_opacity=1
-    ):
+            attribute_name: str,
+            default_color: str = None,
+            default_opacity: float = 1
+    ) -> Optional[Color]:
         """
         Processes the color and opacity attributes of an SvgDeserializedObject.
+        The colors are resolved by the shared SvgColorResolver, which caches them.
 
         Params:
             obj (SvgDeserializedObject): The object from which the attributes will be extracted.
@@ -109,19 +108,15 @@ class SvgUtility:
             default_opacity (float): The default opacity to be returned if the opacity attribute does not exist.
 
         Returns:
-            tuple: A tuple of the RGBA value if the attributes exist, otherwise None.
+            Optional[Color]: The RGBA value, or None if the color is none, missing or invalid.
         """
         color = SvgUtility.get_string(obj, attribute_name, default=default_color)
+        if color is None:
+            return None
         opacity = SvgUtility.get_float(
             obj,
             f'{attribute_name}-opacity',
             default=default_opacity
         )
-        try:
-            if 0 <= opacity <= 1:
-                opacity = int(opacity * 255)
-                color_rgb = ImageColor.getcolor(color, "RGB")
-                return color_rgb + (opacity,)
-            return None
-        except ValueError as ve:
-            print(f"Could not process {attribute_name} attributes: {ve}")
+        current_color = SvgUtility.get_string(obj, 'color') if color == 'currentColor' else None
+        return default_resolver.resolve(color, opacity, current_color)
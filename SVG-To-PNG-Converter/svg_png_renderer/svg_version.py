@@ -0,0 +1,4 @@
+# Must be changed whenever a change of the renderer changes the produced images, since it is
+# part of the keys of the SvgRenderCache. It is kept apart from svg_png_converter so the cache
+# computes its keys without loading Pillow and NumPy
+RENDERER_VERSION = '9'